@@ -1,5 +1,10 @@
 #!/usr/bin/env bash
 set -e
+# Faqat build. Ishga tushirish - Procfile: `web` dan tashqari har bir fon jarayoni alohida doimiy jarayon
+# bo'lishi kerak (Render: har biri uchun "Background Worker" servisi, start command - Procfile dagi buyruq):
+#   scan_worker         - xavfsizlik skanlari navbati (ScanJob)
+#   telegram_dispatcher - Telegram xabarlari navbati (TelegramMessage: xarid/tasdiqlash bildirishnomalari)
+# Ular ishlamasa navbatdagi ishlar bajarilmaydi.
 
 echo "=== 1. Paketlar o'rnatilmoqda ==="
 pip install -r requirements.txt
@@ -18,7 +23,10 @@ python manage.py migrate sites
 echo "=== 4. Barcha migratsiyalar bajarilmoqda ==="
 python manage.py migrate
 
-echo "=== 5. Static fayllar yig'ilmoqda ==="
+echo "=== 5. Loyiha hisoblagichlari tekshirilmoqda ==="
+python manage.py recount_project_stats
+
+echo "=== 6. Static fayllar yig'ilmoqda ==="
 python manage.py collectstatic --no-input
 
 echo "=== Deploy muvaffaqiyatli! ==="
\ No newline at end of file
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 import dj_database_url
 import cloudinary
@@ -131,6 +132,75 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Ko'rishlar soni xotirada yig'ilib, shu oraliqda (soniya) yoki shuncha ko'rishda bazaga yoziladi.
+# 0 - fon oqimi va vaqt bo'yicha flush o'chiq (testlar: flush() ni o'zlari chaqiradi, baza bilan to'qnashmaydi)
+TESTING = sys.argv[1:2] == ['test']
+VIEW_COUNTER_FLUSH_INTERVAL = 0 if TESTING else int(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 5))
+VIEW_COUNTER_FLUSH_HITS = int(os.environ.get('VIEW_COUNTER_FLUSH_HITS', 200))
+
+# Cloudinary manba fayllari uchun lokal disk keshi (projects/source_cache.py)
+SOURCE_CACHE_DIR = os.environ.get('SOURCE_CACHE_DIR', os.path.join(BASE_DIR, '.cache', 'sources'))
+SOURCE_CACHE_MAX_BYTES = int(os.environ.get('SOURCE_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+SOURCE_CACHE_REVALIDATE_SECONDS = int(os.environ.get('SOURCE_CACHE_REVALIDATE_SECONDS', 3600))
+
+# Xavfsizlik skani navbati (projects/scan_queue.py, `manage.py run_scan_worker`)
+SCAN_WORKER_CONCURRENCY = int(os.environ.get('SCAN_WORKER_CONCURRENCY', 2))
+SCAN_JOB_LEASE_SECONDS = int(os.environ.get('SCAN_JOB_LEASE_SECONDS', 300))
+SCAN_JOB_MAX_ATTEMPTS = int(os.environ.get('SCAN_JOB_MAX_ATTEMPTS', 4))
+
+# Telegram xabarlari navbati (projects/telegram_outbox.py, `manage.py run_telegram_dispatcher`).
+# Telegram cheklovlari: umumiy ~30 xabar/s, bitta chatga ~1 xabar/s
+TELEGRAM_GLOBAL_RATE = int(os.environ.get('TELEGRAM_GLOBAL_RATE', 25))
+TELEGRAM_CHAT_INTERVAL = float(os.environ.get('TELEGRAM_CHAT_INTERVAL', 1.0))
+TELEGRAM_OUTBOX_BATCH = int(os.environ.get('TELEGRAM_OUTBOX_BATCH', 100))
+TELEGRAM_DISPATCH_CONCURRENCY = int(os.environ.get('TELEGRAM_DISPATCH_CONCURRENCY', 4))
+TELEGRAM_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('TELEGRAM_OUTBOX_MAX_ATTEMPTS', 8))
+
+# Katta fayllarni bo'laklab skanlash (projects/chunk_scan.py)
+GEMINI_REQUESTS_PER_MINUTE = int(os.environ.get('GEMINI_REQUESTS_PER_MINUTE', 60))
+GEMINI_CONCURRENCY = int(os.environ.get('GEMINI_CONCURRENCY', 4))
+SCAN_MAX_LLM_CHUNKS = int(os.environ.get('SCAN_MAX_LLM_CHUNKS', 16))
+SCAN_CHUNK_TIMEOUT = int(os.environ.get('SCAN_CHUNK_TIMEOUT', 180))
+
+# Loyiha AI yordamchisi javoblari keshi (projects/ai_assistant.py)
+AI_ANSWER_CACHE_ENTRIES = int(os.environ.get('AI_ANSWER_CACHE_ENTRIES', 1000))
+AI_ANSWER_CACHE_MAX_BYTES = int(os.environ.get('AI_ANSWER_CACHE_MAX_BYTES', 4 * 1024 * 1024))
+AI_ANSWER_CACHE_TTL = int(os.environ.get('AI_ANSWER_CACHE_TTL', 6 * 3600))  # soniya
+# Savolga eng mos kod bo'laklari (projects/code_index.py): soni va promptdagi umumiy hajmi (belgi)
+AI_RAG_TOP_K = int(os.environ.get('AI_RAG_TOP_K', 4))
+AI_RAG_MAX_CHARS = int(os.environ.get('AI_RAG_MAX_CHARS', 6000))
+
+# Arxivlarni a'zoma-a'zo skanlash (projects/archive_scan.py)
+ARCHIVE_MAX_MEMBERS = int(os.environ.get('ARCHIVE_MAX_MEMBERS', 5000))
+ARCHIVE_MAX_EXPANDED_BYTES = int(os.environ.get('ARCHIVE_MAX_EXPANDED_BYTES', 500 * 1024 * 1024))
+ARCHIVE_MAX_RATIO = int(os.environ.get('ARCHIVE_MAX_RATIO', 100))
+ARCHIVE_MAX_LLM_MEMBERS = int(os.environ.get('ARCHIVE_MAX_LLM_MEMBERS', 5))
+ARCHIVE_SCAN_PROCESSES = int(os.environ.get('ARCHIVE_SCAN_PROCESSES', 2))  # 0 - jarayonlar pulisiz
+
+# Online kompilyator (projects/compiler.py). JUDGE0_CALLBACK_URL - saytning ochiq manzili
+# (masalan, https://devtube.uz); berilsa Judge0 natijani o'zi yuboradi, aks holda fon poller so'raydi
+JUDGE0_URL = os.environ.get('JUDGE0_URL', 'https://ce.judge0.com')
+JUDGE0_CALLBACK_URL = os.environ.get('JUDGE0_CALLBACK_URL', '')
+# 'local' - Python/Node lokal sandboxda (projects/sandbox.py, `unshare` kerak), qolganlari Judge0; 'judge0' - hammasi
+COMPILER_BACKEND = os.environ.get('COMPILER_BACKEND', 'local')
+LOCAL_EXECUTOR_WORKERS = int(os.environ.get('LOCAL_EXECUTOR_WORKERS', 4))
+LOCAL_EXECUTOR_WARM = int(os.environ.get('LOCAL_EXECUTOR_WARM', 2))  # Har bir til uchun tayyor jarayonlar
+LOCAL_EXECUTOR_TIMEOUT = int(os.environ.get('LOCAL_EXECUTOR_TIMEOUT', 5))  # Devor soati, soniya
+LOCAL_EXECUTOR_CPU_SECONDS = int(os.environ.get('LOCAL_EXECUTOR_CPU_SECONDS', 3))
+# Bir xil (til, kod, stdin) natijalari keshi (projects/compiler_cache.py)
+COMPILER_CACHE_ENABLED = os.environ.get('COMPILER_CACHE_ENABLED', 'True') == 'True'
+COMPILER_CACHE_ENTRIES = int(os.environ.get('COMPILER_CACHE_ENTRIES', 2000))
+COMPILER_CACHE_MAX_BYTES = int(os.environ.get('COMPILER_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+COMPILER_CACHE_TTL = int(os.environ.get('COMPILER_CACHE_TTL', 6 * 3600))  # soniya
+
+# Qimmat endpointlar uchun qabul nazorati (projects/admission.py); cheklovlar har bir jarayon uchun.
+# ADMISSION_LIMITS = {'compiler': {'concurrency': 8}} kabi DEFAULT_LIMITS ustidan yoziladi
+ADMISSION_ENABLED = os.environ.get('ADMISSION_ENABLED', 'True') == 'True'
+ADMISSION_LIMITS = {}
+# Mijoz IP si (admission, qidiruv takliflari): X-Forwarded-For ga o'ngdan nechta ishonchli proksi qo'shadi.
+# Render oldida bitta proksi bor (u RENDER o'zgaruvchisini o'rnatadi); proksisiz - 0, ya'ni REMOTE_ADDR
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 1 if os.environ.get('RENDER') else 0))
+
 CORS_ALLOW_ALL_ORIGINS = True
 X_FRAME_OPTIONS = 'SAMEORIGIN'
 
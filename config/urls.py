@@ -12,7 +12,7 @@ from projects import views
 # 2. API VIEWS IMPORTI
 from projects.views import (
     ProjectListAPI, ProjectDetailAPI,
-    RegisterAPI, ProjectCreateAPI, ProjectUpdateDeleteAPI, ProfileAPI
+    RegisterAPI, ProjectCreateAPI, ProjectUpdateDeleteAPI, ProfileAPI, FeedAPI
 )
 
 import notifications.urls
@@ -37,6 +37,7 @@ urlpatterns = [
     path('api/projects/create/', ProjectCreateAPI.as_view(), name='api_project_create'),
     path('api/projects/<int:pk>/', ProjectDetailAPI.as_view(), name='api_project_detail'),
     path('api/projects/<int:pk>/manage/', ProjectUpdateDeleteAPI.as_view(), name='api_project_manage'),
+    path('api/feed/', FeedAPI.as_view(), name='api_feed'),
 
     path('api/buy/<int:pk>/', views.api_buy_project, name='api_buy_project'),
     path('api/comment/add/<int:pk>/', views.api_post_comment, name='api_post_comment'),
@@ -56,6 +57,7 @@ urlpatterns = [
     # ==========================================
     path('', views.home_page, name='home'),
     path('search/', views.global_search, name='global_search'),
+    path('search/suggest/', views.search_suggest, name='search_suggest'),
     path('live-view/<slug:slug>/', views.live_project_view, name='live_project_view'),
     path('trending/', views.trending, name='trending'),
     path('feed/', views.syncing_projects, name='syncing'),
@@ -65,7 +67,9 @@ urlpatterns = [
 
     path('create/', views.create_project, name='create_project'),
     path('watch/<slug:slug>/', views.project_detail, name='project_detail'),
+    path('watch/<slug:slug>/code/', views.project_code, name='project_code'),
     path('project/<int:pk>/ask-ai/', views.project_ai_ask, name='project_ai_ask'),
+    path('project/<int:pk>/ask-ai/stream/', views.project_ai_stream, name='project_ai_stream'),
     path('update/<int:pk>/', views.update_project, name='update_project'),
     path('delete/<int:pk>/', views.delete_project, name='delete_project'),
 
@@ -89,6 +93,9 @@ urlpatterns = [
     path('dispute/resolve/<int:pk>/<str:decision>/', views.resolve_dispute, name='resolve_dispute'),
 
     path('compiler/', views.online_compiler, name='compiler'),
+    path('compiler/submit/', views.compiler_submit, name='compiler_submit'),
+    path('compiler/result/<str:token>/', views.compiler_result, name='compiler_result'),
+    path('compiler/callback/<str:signed>/', views.compiler_callback, name='compiler_callback'),
     path('tools/cpp-test/', views.cpp_test, name='cpp_test'),
     path('chat/', views.community_chat, name='community_chat'),
     path('telegram-webhook/', views.telegram_webhook, name='telegram_webhook'),
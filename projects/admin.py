@@ -7,7 +7,7 @@ from django.db import transaction  # <--- MUHIM: Moliya xavfsizligi uchun
 # Modellar importi
 from .models import (
     Profile, Project, ProjectImage, Comment, Sync,
-    CommunityMessage, Contact, Transaction, Withdrawal, Deposit
+    CommunityMessage, Contact, Transaction, Withdrawal, Deposit, ScanJob, ScanVerdict, ScanFinding
 )
 
 # =========================================================
@@ -75,10 +75,22 @@ class ProjectImageInline(admin.TabularInline):
     extra = 1
 
 
+class ScanFindingInline(admin.TabularInline):
+    """Arxivning qaysi fayli hukmga sabab bo'lgani (skan natijasi, qo'lda o'zgartirilmaydi)"""
+    model = ScanFinding
+    extra = 0
+    can_delete = False
+    fields = ('path', 'verdict', 'size', 'reasons', 'ai_result')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Project)
 class ProjectAdmin(admin.ModelAdmin):
     list_select_related = ('author',)  # Avtor ma'lumotlarini tez yuklash
-    inlines = [ProjectImageInline]
+    inlines = [ProjectImageInline, ScanFindingInline]
 
     list_display = ('get_thumbnail', 'title', 'author', 'get_price_tag', 'get_security_badge', 'is_frozen', 'views',
                     'created_at')
@@ -86,7 +98,7 @@ class ProjectAdmin(admin.ModelAdmin):
     search_fields = ('title', 'author__username', 'description')
     list_editable = ('is_frozen',)
     prepopulated_fields = {"slug": ("title",)}
-    readonly_fields = ('views', 'likes', 'saved_by', 'buyers')  # Bularni admin qo'lda o'zgartirmasligi kerak
+    readonly_fields = ('views', 'likes', 'saved_by', 'buyers', 'trending_score') + Project.COUNTER_FIELDS  # Bularni admin qo'lda o'zgartirmasligi kerak
     list_per_page = 15
 
     def get_thumbnail(self, obj):
@@ -264,6 +276,31 @@ class SyncAdmin(admin.ModelAdmin):
     list_display = ('follower', 'following', 'created_at')
 
 
+@admin.register(ScanJob)
+class ScanJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'project', 'status', 'priority', 'attempts', 'run_after', 'locked_by', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('locked_by', 'lease_expires', 'attempts', 'last_error', 'created_at', 'finished_at')
+    actions = ['retry_now']
+
+    @admin.action(description="🔁 Hozir qayta skanlash")
+    def retry_now(self, request, queryset):
+        from .scan_queue import enqueue_scan, PRIORITY_HIGH
+        project_ids = set(queryset.values_list('project_id', flat=True))
+        for project_id in project_ids:
+            enqueue_scan(project_id, priority=PRIORITY_HIGH)
+        self.message_user(request, f"{len(project_ids)} ta loyiha navbatga qo'yildi.", messages.SUCCESS)
+
+
+@admin.register(ScanVerdict)
+class ScanVerdictAdmin(admin.ModelAdmin):
+    # Hukmni o'chirish = shu mazmunli fayllar keyingi skanda qayta tekshiriladi
+    list_display = ('sha256', 'security_status', 'size', 'hits', 'updated_at')
+    list_filter = ('security_status',)
+    search_fields = ('sha256',)
+    readonly_fields = ('sha256', 'size', 'hits', 'created_at', 'updated_at')
+
+
 @admin.register(CommunityMessage)
 class CommunityMessageAdmin(admin.ModelAdmin):
     list_display = ('user', 'body_short', 'created_at')
@@ -0,0 +1,234 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+
+# ==========================================
+# QABUL NAZORATI (Admission control: qimmat endpointlar uchun o'rinlar)
+# ==========================================
+# Kompilyator, AI yordamchi va kod o'qish sekin tashqi servislarni (Judge0, Gemini, Cloudinary) kutadi.
+# Cheklovsiz bo'lsa ular barcha worker oqimlarini band qiladi va arzon sahifalar (home, trending) ham
+# navbatda qoladi. Har bir guruh uchun jarayonda:
+#   concurrency - bir vaqtda bajariladigan so'rovlar
+#   queue       - o'rin bo'shashini kutayotganlar (ko'pi bilan `wait` soniya); navbat to'la bo'lsa darhol 503
+#   per_client  - bitta foydalanuvchi/IP ning bir vaqtdagi so'rovlari; oshsa darhol 429
+# Rad javobida Retry-After - o'rtacha bajarilish vaqti va navbat uzunligidan hisoblanadi.
+# Cheklovlar bitta jarayon uchun: guruhlarning concurrency + queue yig'indisi gunicorn oqimlari sonidan
+# kichik bo'lishi kerak, aks holda arzon sahifalarga oqim qolmaydi.
+
+DEFAULT_LIMITS = {
+    'compiler': {'concurrency': 2, 'queue': 2, 'wait': 0.5, 'per_client': 2},
+    'ai':       {'concurrency': 2, 'queue': 2, 'wait': 1.0, 'per_client': 1},
+    'source':   {'concurrency': 3, 'queue': 3, 'wait': 0.5, 'per_client': 3},
+}
+RETRY_AFTER_MAX = 30
+EWMA_ALPHA = 0.2
+
+BUSY_MESSAGE = "⏳ Server hozir band. {seconds} soniyadan so'ng qayta urinib ko'ring."
+CLIENT_MESSAGE = "⏳ Oldingi so'rovingiz hali bajarilmoqda. {seconds} soniyadan so'ng qayta urinib ko'ring."
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class Rejected:
+    __slots__ = ('status', 'retry_after')
+
+    def __init__(self, status, retry_after):
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Gate:
+    """Bitta guruh: semafor + chegaralangan navbat + mijoz bo'yicha hisob."""
+
+    def __init__(self, name, concurrency, queue, wait, per_client):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.wait = wait
+        self.per_client = per_client
+        self.active = 0
+        self.waiting = 0
+        self._clients = {}  # mijoz -> bajarilayotgan + kutayotgan so'rovlari
+        self._avg_seconds = 1.0
+        self._cond = threading.Condition()
+        self._stats = {'admitted': 0, 'queued': 0, 'rejected_busy': 0, 'rejected_client': 0, 'peak_active': 0}
+
+    def enter(self, client):
+        """O'rin oladi. Qaytaradi: None (qabul qilindi) yoki Rejected."""
+        with self._cond:
+            if self._clients.get(client, 0) >= self.per_client:
+                self._stats['rejected_client'] += 1
+                return Rejected(429, self._retry_after(0))
+            if self.active >= self.concurrency:
+                if self.waiting >= self.queue:
+                    self._stats['rejected_busy'] += 1
+                    return Rejected(503, self._retry_after(self.waiting))
+                self._stats['queued'] += 1
+                self.waiting += 1
+                self._clients[client] = self._clients.get(client, 0) + 1
+                deadline = time.monotonic() + self.wait
+                try:
+                    while self.active >= self.concurrency:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._stats['rejected_busy'] += 1
+                            self._release_client(client)
+                            return Rejected(503, self._retry_after(self.waiting))
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            else:
+                self._clients[client] = self._clients.get(client, 0) + 1
+            self.active += 1
+            self._stats['admitted'] += 1
+            self._stats['peak_active'] = max(self._stats['peak_active'], self.active)
+            return None
+
+    def leave(self, client, seconds):
+        with self._cond:
+            self.active -= 1
+            self._release_client(client)
+            self._avg_seconds += EWMA_ALPHA * (seconds - self._avg_seconds)
+            self._cond.notify()
+
+    def _release_client(self, client):
+        count = self._clients.get(client, 0) - 1
+        if count > 0:
+            self._clients[client] = count
+        else:
+            self._clients.pop(client, None)
+
+    def _retry_after(self, ahead):
+        # Oldinda turganlar o'rinlar bo'yicha taqsimlanadi
+        seconds = self._avg_seconds * (ahead + 1) / self.concurrency
+        return max(1, min(RETRY_AFTER_MAX, math.ceil(seconds)))
+
+    def stats(self):
+        with self._cond:
+            return {
+                **self._stats,
+                'active': self.active,
+                'waiting': self.waiting,
+                'concurrency': self.concurrency,
+                'queue': self.queue,
+                'avg_ms': round(self._avg_seconds * 1000, 1),
+            }
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(name):
+    gate = _gates.get(name)
+    if gate is None:
+        with _gates_lock:
+            gate = _gates.get(name)
+            if gate is None:
+                limits = {**DEFAULT_LIMITS[name], **_setting('ADMISSION_LIMITS', {}).get(name, {})}
+                gate = _gates[name] = Gate(name, **limits)
+    return gate
+
+
+def admission_stats():
+    """stats sahifasi va API uchun: guruh -> hisoblagichlar."""
+    return {name: gate.stats() for name, gate in sorted(_gates.items())}
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    # X-Forwarded-For ning chap qismini mijoz o'zi yozadi - faqat ishonchli proksilar (Render - bitta) o'ngdan
+    # qo'shgan qiymatlarga ishoniladi. Proksi yo'q bo'lsa (TRUSTED_PROXY_COUNT=0) - REMOTE_ADDR
+    hops = _setting('TRUSTED_PROXY_COUNT', 0)
+    forwarded = [ip.strip() for ip in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if ip.strip()]
+    if hops and forwarded:
+        return 'ip:' + forwarded[-min(hops, len(forwarded))]
+    return 'ip:' + request.META.get('REMOTE_ADDR', '')
+
+
+def acquire(name, request):
+    """O'rin oladi. Qaytaradi: (Rejected yoki None, release). release() bir necha marta chaqirilsa ham bir marta
+    bo'shatadi - oqimli (streaming) javobda o'rin generator tugaguncha ushlab turiladi."""
+    if not _setting('ADMISSION_ENABLED', True):
+        return None, lambda: None
+    gate, client = get_gate(name), client_key(request)
+    rejected = gate.enter(client)
+    if rejected is not None:
+        return rejected, lambda: None
+    started = time.monotonic()
+    released = []
+
+    def release():
+        if not released:
+            released.append(True)
+            gate.leave(client, time.monotonic() - started)
+    return None, release
+
+
+class ReleaseOnClose:
+    """Oqimli javob tanasi: server javobni yopganda o'rin albatta bo'shaydi (generator boshlanmagan bo'lsa ham)."""
+
+    def __init__(self, iterable, release):
+        self.iterable = iterable
+        self.release = release
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def close(self):
+        try:
+            close = getattr(self.iterable, 'close', None)
+            if close:
+                close()
+        finally:
+            self.release()
+
+
+@contextmanager
+def slot(name, request):
+    """`with slot('source', request) as rejected:` - None bo'lsa o'rin olindi, aks holda Rejected."""
+    rejected, release = acquire(name, request)
+    try:
+        yield rejected
+    finally:
+        release()
+
+
+def rejection_message(rejected):
+    return (CLIENT_MESSAGE if rejected.status == 429 else BUSY_MESSAGE).format(seconds=rejected.retry_after)
+
+
+def rejection_response(rejected, json_field=None):
+    message = rejection_message(rejected)
+    if json_field:
+        response = JsonResponse({'status': 'failed', json_field: message}, status=rejected.status)
+    else:
+        response = HttpResponse(message, status=rejected.status, content_type='text/plain; charset=utf-8')
+    response['Retry-After'] = str(rejected.retry_after)
+    return response
+
+
+def admit(name, json_field=None, methods=None):
+    """View dekoratori: o'rin bo'lmasa view chaqirilmaydi, darhol 429/503 + Retry-After.
+    methods - faqat shu metodlar cheklanadi (masalan, forma sahifasining GET'i bepul)."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if methods and request.method not in methods:
+                return view(request, *args, **kwargs)
+            with slot(name, request) as rejected:
+                if rejected is not None:
+                    return rejection_response(rejected, json_field)
+                return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
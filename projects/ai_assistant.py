@@ -0,0 +1,218 @@
+import hashlib
+import os
+import re
+import threading
+
+from django.conf import settings
+
+from . import code_index
+from .lru import LRUCache
+
+
+# ==========================================
+# LOYIHA AI YORDAMCHISI (project_ai_ask)
+# ==========================================
+# Tashrif buyuruvchilar bir xil savollarni beradi ("bu nima qiladi?", "narxi qancha?"), shuning uchun:
+#   kalit   - (loyiha, kontent versiyasi, kirish huquqi, normallashtirilgan savol)
+#   versiya - title/description/price/ai_analysis va kod indeksi (fayl sha256) xeshi: loyiha tahrirlansa,
+#             yangi kod yuklansa yoki qayta skanlansa kalit o'zgaradi va eski javoblar ishlatilmaydi
+#             (LRU/TTL orqali o'zi chiqib ketadi)
+# Loyiha konteksti (prompt boshi) ham versiya bo'yicha bir marta quriladi. Savolga eng mos kod bo'laklari
+# code_index dan (BM25) qo'shiladi - model kod haqida taxmin qilmaydi. Kod bo'laklari faqat to'liq kirish
+# huquqi borlarga (Project.has_full_access: bepul loyiha, muallif, xaridor); qolganlarga model kodni
+# ko'chirmasdan umumiy tushuntiradi va ularning javoblari alohida kalit ostida keshlanadi.
+# Gemini klienti jarayonda bitta (har so'rovda configure/GenerativeModel yaratilmaydi).
+# Xato va "API kalit yo'q" javoblari keshlanmaydi.
+
+MODEL = 'gemini-2.5-flash'
+NO_KEY_ANSWER = "Tizim xatosi: API kalit topilmadi."
+ERROR_PREFIX = "Xatolik yuz berdi"
+
+_APOSTROPHES_RE = re.compile(r"[`ʻʼ‘’′]")
+_PUNCTUATION_RE = re.compile(r"[^\w\s']+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_question(question):
+    """Kesh kaliti uchun: "Bu nima qiladi?" va "bu  NIMA qiladi" -> "bu nima qiladi"."""
+    text = _APOSTROPHES_RE.sub("'", question.casefold())
+    text = _PUNCTUATION_RE.sub(' ', text)
+    return _SPACES_RE.sub(' ', text).strip()
+
+
+def content_version(project, index_sha=None):
+    if index_sha is None:
+        index_sha = code_index.index_version(project)
+    h = hashlib.sha1()
+    for part in (project.title, project.description, str(project.price), project.ai_analysis or '', index_sha):
+        h.update(part.encode())
+        h.update(b'\0')
+    return h.hexdigest()[:16]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Jarayonda bitta google-genai klienti; API kalit bo'lmasa None."""
+    global _client
+    api_key = os.environ.get("GEMINI_API_KEY") or _setting('GEMINI_API_KEY', None)
+    if not api_key:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                _client = genai.Client(api_key=api_key)
+    return _client
+
+
+class AnswerCache:
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        self._answers = LRUCache(max_entries or _setting('AI_ANSWER_CACHE_ENTRIES', 1000),
+                                 max_bytes or _setting('AI_ANSWER_CACHE_MAX_BYTES', 4 * 1024 * 1024),
+                                 ttl if ttl is not None else _setting('AI_ANSWER_CACHE_TTL', 6 * 3600))
+        self._contexts = LRUCache(256, 2 * 1024 * 1024, self._answers.ttl)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0}
+
+    @staticmethod
+    def key(project, question, version=None, full_access=False):
+        access = 'full' if full_access else 'public'
+        return f"{project.pk}:{version or content_version(project)}:{access}:{normalize_question(question)}"
+
+    def get(self, key):
+        answer = self._answers.get(key)
+        with self._lock:
+            self._stats['hits' if answer is not None else 'misses'] += 1
+        return answer
+
+    def put(self, key, answer):
+        if self._answers.put(key, answer):
+            with self._lock:
+                self._stats['stores'] += 1
+
+    def context(self, project, version):
+        """Loyiha haqidagi prompt qismi (versiya bo'yicha bir marta quriladi)."""
+        key = f"{project.pk}:{version}"
+        context = self._contexts.get(key)
+        if context is None:
+            context = build_context(project)
+            self._contexts.put(key, context)
+        return context
+
+    def clear(self):
+        self._answers.clear()
+        self._contexts.clear()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s['hits'] + s['misses']
+        return {
+            **s,
+            'evictions': self._answers.evictions,
+            'entries': len(self._answers),
+            'hit_ratio': round(s['hits'] / lookups, 3) if lookups else 0.0,
+        }
+
+
+def build_context(project):
+    return (
+        f"Sen 'DevTube' platformasida sotuvchi yordamchisisan. "
+        f"Loyiha nomi: '{project.title}'. "
+        f"Tavsifi: '{project.description}'. "
+        f"Narxi: {'$' + str(project.price) if project.price > 0 else 'Bepul'}. "
+        f"Xavfsizlik tahlili: '{project.ai_analysis}'. "
+    )
+
+
+def format_snippets(chunks):
+    return "\n\n".join(f"--- {path} ({start}-{end} qatorlar) ---\n{text}" for path, start, end, text in chunks)
+
+
+def build_prompt(context, question, chunks=(), full_access=True):
+    if chunks:
+        code = (
+            f"Loyiha kodidan savolga tegishli qismlar (kod haqidagi savolga shularga tayanib javob ber, "
+            f"kodni to'liq ko'chirib berma):\n{format_snippets(chunks)}\n\n"
+        )
+    elif not full_access:
+        code = ("Loyiha kodi faqat xaridorlar uchun ochiq: kod haqidagi savolga umumiy tushuntirish ber, "
+                "kodni ko'chirma va undan iqtibos keltirma. ")
+    else:
+        code = ""
+    return (
+        f"{context}"
+        f"{code}"
+        f"Foydalanuvchi savoli: '{question}'. "
+        f"Vazifang: Foydalanuvchiga loyihani tushuntirish va sotib olishga qiziqtirish. "
+        f"Javobni qisqa, do'stona va o'zbek tilida ber."
+    )
+
+
+_answer_cache = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache()
+    return _answer_cache
+
+
+def cached_answer(project, question, full_access=False):
+    """Keshdagi javob yoki None (Gemini'ga murojaat qilinmaydi)."""
+    return get_answer_cache().get(AnswerCache.key(project, question, full_access=full_access))
+
+
+def _prepare(project, question, full_access):
+    """(prompt, kesh kaliti) - ikkalasi ham bir xil kontent versiyasidan. Kod bo'laklari - faqat full_access."""
+    cache = get_answer_cache()
+    index_sha = code_index.index_version(project)
+    version = content_version(project, index_sha)
+    chunks = code_index.retrieve(project, question, version=index_sha) if full_access else ()
+    prompt = build_prompt(cache.context(project, version), question, chunks, full_access)
+    return prompt, AnswerCache.key(project, question, version, full_access)
+
+
+def generate_answer(project, question, full_access=False):
+    """Gemini'dan javob (kesh tekshirilmaydi - avval cached_answer); muvaffaqiyatli javob keshlanadi."""
+    client = get_client()
+    if client is None:
+        return NO_KEY_ANSWER
+    prompt, key = _prepare(project, question, full_access)
+    try:
+        response = client.models.generate_content(model=MODEL, contents=prompt)
+    except Exception as e:
+        return f"{ERROR_PREFIX}: {e}"
+    if not response.text:
+        return f"{ERROR_PREFIX}: AI javob bermadi."
+    get_answer_cache().put(key, response.text)
+    return response.text
+
+
+def stream_answer(project, question, full_access=False):
+    """Javob bo'laklari (matn) generatori: model token chiqarishi bilan uzatiladi.
+    To'liq javob oxirida keshlanadi; model xatosi chaqiruvchiga exception bo'lib chiqadi."""
+    client = get_client()
+    if client is None:
+        yield NO_KEY_ANSWER
+        return
+    prompt, key = _prepare(project, question, full_access)
+    parts = []
+    for chunk in client.models.generate_content_stream(model=MODEL, contents=prompt):
+        if chunk.text:
+            parts.append(chunk.text)
+            yield chunk.text
+    if not parts:
+        raise ValueError("AI javob bermadi.")
+    get_answer_cache().put(key, ''.join(parts))
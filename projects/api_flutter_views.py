@@ -4,6 +4,12 @@ from rest_framework.response import Response
 from django.db.models import Sum, Count, Max
 from django.contrib.auth.models import User
 from .models import PrivateMessage, Project, Transaction, Withdrawal, Contact, Sync
+from .source_cache import get_source_cache
+from .compiler_cache import get_result_cache
+from .ai_assistant import get_answer_cache
+from .http_client import outbound_stats
+from .admission import admission_stats
+from .telegram_outbox import outbox_stats
 from django.utils import timezone
 from datetime import timedelta
 import os
@@ -74,23 +80,34 @@ def api_admin_stats(request):
     total_revenue = float(revenue_agg['amount__sum'] or 0)
     
     top_spenders = list(User.objects.annotate(
-        spent=Sum('buyer_transactions__amount')
+        spent=Sum('transactions__amount')
     ).order_by('-spent')[:3].values('username', 'spent'))
     
     top_sellers = list(User.objects.annotate(
-        sales=Count('projects__transactions')
+        sales=Count('project__transaction')
     ).order_by('-sales')[:3].values('username', 'sales'))
     for t in top_spenders:
          if t['spent'] is not None: t['spent'] = float(t['spent'])
          
-    return Response({
+    data = {
         'totalUsers': total_users,
         'onlineUsers': 0, # WebSockets orqali sanaladi, hozircha 0
         'totalRevenue': total_revenue,
         'totalProjects': total_projects,
         'topSpenders': top_spenders,
-        'topSellers': top_sellers
-    })
+        'topSellers': top_sellers,
+    }
+    if request.user.is_superuser:
+        # Ichki ko'rsatkichlar (keshlar, tashqi servislar, navbatlar) - faqat superuser
+        data.update({
+            'sourceCache': get_source_cache().stats(),
+            'compilerCache': get_result_cache().stats(),
+            'aiCache': get_answer_cache().stats(),
+            'outbound': outbound_stats(),
+            'admission': admission_stats(),
+            'telegramOutbox': outbox_stats(),
+        })
+    return Response(data)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -1,5 +1,12 @@
+import atexit
+
 from django.apps import AppConfig
 
 
 class ProjectsConfig(AppConfig):
     name = 'projects'
+
+    def ready(self):
+        # Worker to'xtaganda xotirada qolgan ko'rishlar yo'qolmasligi uchun
+        from .view_counter import view_counter
+        atexit.register(view_counter.flush)
@@ -0,0 +1,180 @@
+import gzip
+import os
+import tarfile
+import zipfile
+from collections import Counter
+
+
+# ==========================================
+# ARXIV MANIFESTI (zip / tar / gz / 7z / rar)
+# ==========================================
+# Yuklangandan keyin orqa fonda arxiv bir marta o'qiladi va Project.source_manifest ga ixcham
+# JSON yoziladi: fayllar daraxti, hajmlar, tillar va asosiy fayllarning birinchi qatorlari.
+# project_detail va API arxivni yuklab olmasdan loyiha tuzilmasini shundan ko'rsatadi.
+
+ARCHIVE_EXTENSIONS = ('.zip', '.rar', '.7z', '.tar', '.gz', '.tgz')
+MAX_ENTRIES = 2000  # Manifestga yoziladigan fayllar soni (qolgani faqat sanaladi)
+PREVIEW_LINES = 30
+PREVIEW_MAX_BYTES = 16 * 1024
+MAX_PREVIEWS = 5
+
+LANGUAGES = {
+    '.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript', '.jsx': 'JavaScript', '.tsx': 'TypeScript',
+    '.html': 'HTML', '.css': 'CSS', '.scss': 'CSS', '.java': 'Java', '.kt': 'Kotlin', '.dart': 'Dart',
+    '.go': 'Go', '.php': 'PHP', '.cpp': 'C++', '.cc': 'C++', '.hpp': 'C++', '.c': 'C', '.h': 'C',
+    '.cs': 'C#', '.rb': 'Ruby', '.rs': 'Rust', '.swift': 'Swift', '.sql': 'SQL', '.sh': 'Shell',
+    '.vue': 'Vue', '.json': 'JSON', '.yml': 'YAML', '.yaml': 'YAML', '.md': 'Markdown',
+}
+# Birinchi qatorlari ko'rsatiladigan "asosiy" fayllar (tartib = ustuvorlik)
+KEY_FILES = (
+    'readme.md', 'readme.txt', 'readme', 'main.py', 'app.py', 'manage.py', 'index.html', 'index.js',
+    'main.dart', 'main.go', 'package.json', 'requirements.txt', 'pubspec.yaml', 'pom.xml', 'dockerfile',
+)
+
+
+def is_archive(name):
+    return (name or '').lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+def _head(data):
+    text = data[:PREVIEW_MAX_BYTES].decode('utf-8', errors='ignore')
+    return '\n'.join(text.splitlines()[:PREVIEW_LINES])
+
+
+class _ManifestBuilder:
+    def __init__(self, fmt, name=''):
+        self.fmt = fmt
+        self.name = name
+        self.files = []
+        self.total_files = 0
+        self.total_size = 0
+        self.languages = Counter()
+        self.previews = {}
+
+    def wants_preview(self, path):
+        base = os.path.basename(path).lower()
+        return base in KEY_FILES and len(self.previews) < MAX_PREVIEWS and path not in self.previews
+
+    def add(self, path, size, read=None):
+        path = path.replace('\\', '/').lstrip('/')
+        if not path or path.endswith('/') or '__MACOSX/' in path:
+            return
+        self.total_files += 1
+        self.total_size += size
+        if len(self.files) < MAX_ENTRIES:
+            self.files.append({'path': path, 'size': size})
+        language = LANGUAGES.get(os.path.splitext(path)[1].lower())
+        if language:
+            self.languages[language] += size
+        if read and self.wants_preview(path):
+            try:
+                self.previews[path] = _head(read())
+            except Exception:
+                pass
+
+    def result(self):
+        # Asosiy fayllar KEY_FILES tartibida, ildizga yaqinlari oldin
+        order = {name: i for i, name in enumerate(KEY_FILES)}
+        previews = sorted(self.previews.items(),
+                          key=lambda item: (order[os.path.basename(item[0]).lower()], item[0].count('/')))
+        return {
+            'format': self.fmt,
+            'files': self.files,
+            'total_files': self.total_files,
+            'total_size': self.total_size,
+            'truncated': self.total_files > len(self.files),
+            'languages': [{'name': name, 'bytes': size} for name, size in self.languages.most_common()],
+            'previews': [{'path': path, 'head': head} for path, head in previews],
+        }
+
+
+def _zip(path, builder):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            builder.add(info.filename, info.file_size,
+                        lambda info=info: archive.open(info).read(PREVIEW_MAX_BYTES))
+
+
+def _tar(path, builder):
+    # 'r|*' - oqim rejimi: arxiv boshidan oxirigacha bir marta o'qiladi (seek'siz)
+    with tarfile.open(path, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            builder.add(member.name, member.size,
+                        lambda member=member: archive.extractfile(member).read(PREVIEW_MAX_BYTES))
+
+
+def _gzip(path, builder):
+    # Bitta siqilgan fayl: ichidagi nom storage nomidan (.gz siz) olinadi
+    name = os.path.basename(builder.name)
+    inner = name[:-3] if name.lower().endswith('.gz') else name
+    with gzip.open(path, 'rb') as f:
+        head = f.read(PREVIEW_MAX_BYTES)
+        size = len(head)
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            size += len(chunk)
+    builder.add(inner, size, lambda: head)
+
+
+def _7z(path, builder):
+    import py7zr  # Ixtiyoriy kutubxona: o'rnatilmagan bo'lsa ImportError -> 'unsupported'
+    with py7zr.SevenZipFile(path, mode='r') as archive:
+        for info in archive.list():
+            if not info.is_directory:
+                builder.add(info.filename, info.uncompressed or 0)
+
+
+def _rar(path, builder):
+    import rarfile  # Ixtiyoriy kutubxona (unrar binar fayli ham kerak)
+    with rarfile.RarFile(path) as archive:
+        for info in archive.infolist():
+            if not info.is_dir():
+                builder.add(info.filename, info.file_size)
+
+
+def build_manifest(path, name):
+    """`path` - lokal fayl (source_cache), `name` - storage nomi (format kengaytmadan aniqlanadi)."""
+    lower = (name or '').lower()
+    if lower.endswith('.zip'):
+        fmt, reader = 'zip', _zip
+    elif lower.endswith(('.tar', '.tar.gz', '.tgz')):
+        fmt, reader = 'tar', _tar
+    elif lower.endswith('.gz'):
+        # .gz ichida tar bo'lishi ham mumkin
+        fmt, reader = ('tar', _tar) if tarfile.is_tarfile(path) else ('gz', _gzip)
+    elif lower.endswith('.7z'):
+        fmt, reader = '7z', _7z
+    elif lower.endswith('.rar'):
+        fmt, reader = 'rar', _rar
+    else:
+        return None
+
+    builder = _ManifestBuilder(fmt, name)
+    try:
+        reader(path, builder)
+    except ImportError:
+        return {**builder.result(), 'error': 'unsupported'}
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, ValueError) as e:
+        return {**builder.result(), 'error': f'corrupt: {e}'[:200]}
+    return builder.result()
+
+
+def extract_project_manifest(project, path=None):
+    """Yuklash pipeline bosqichi: arxivni keshdan bir marta o'qib, manifestni saqlaydi."""
+    from .models import Project
+    from .source_cache import get_source_cache
+
+    if not project.source_code or not is_archive(project.source_code.name):
+        return None
+    path = path or get_source_cache().get_path(project.source_code)
+    manifest = build_manifest(path, project.source_code.name) if path else None
+    # source_manifest SAVE_EXCLUDED_FIELDS da: skan oxiridagi project.save() uni ustidan yozmaydi
+    Project.objects.filter(pk=project.pk).update(source_manifest=manifest)
+    project.source_manifest = manifest
+    return manifest
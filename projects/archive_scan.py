@@ -0,0 +1,325 @@
+import heapq
+import multiprocessing
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+
+from .archive_manifest import ARCHIVE_EXTENSIONS
+from .chunk_scan import BytesArtifact, ask_gemini_parallel, get_gemini_limiter, merge_results, riskiest_chunk
+from .prescan import DANGER, MAX_PRESCAN_BYTES, SAFE, SCRIPT_EXTENSIONS, TEXT_EXTENSIONS, UNSURE, prescan_bytes
+
+
+# ==========================================
+# ARXIVLARNI A'ZOMA-A'ZO SKANLASH (zip / tar / gz)
+# ==========================================
+# Arxiv diskka ochilmaydi: a'zolar oqim bilan o'qiladi (har biri MAX_PRESCAN_BYTES gacha).
+#   himoya:  a'zolar soni, ochilgan umumiy hajm va siqish nisbati cheklangan - oshsa "arxiv bomba" (DANGER)
+#   map:     kod fayllari lokal prescan bilan tekshiriladi (ko'p a'zoli arxivda - jarayonlar pulida)
+#   LLM:     faqat eng shubhali ARCHIVE_MAX_LLM_MEMBERS ta a'zoning eng shubhali bo'lagi Gemini'ga
+#   reduce:  chunk_scan.merge_results (birlik - "fayl"); SAFE bo'lmagan a'zolar ScanFinding ga yoziladi
+# Rasm, shrift, json kabi ma'lumot fayllari tekshirilmaydi; bajariladigan fayllar va ichki arxivlar
+# AI'ga yuborilmaydi - ular "tekshirilmagan" deb sanaladi (hukm 'warning', VirusTotal butun arxivni ko'radi).
+
+CODE_EXTENSIONS = TEXT_EXTENSIONS + SCRIPT_EXTENSIONS
+EXECUTABLE_EXTENSIONS = ('.exe', '.dll', '.so', '.dylib', '.jar', '.apk', '.msi', '.scr', '.com', '.elf')
+INLINE_MEMBERS = 32  # Shundan kam a'zoli arxiv uchun jarayonlar puli ishga tushirilmaydi
+MAX_FINDINGS = 50    # Loyiha uchun saqlanadigan ScanFinding lar
+RATIO_MIN_BYTES = 1024 * 1024  # Kichik fayllarda yuqori siqish nisbati (bo'sh qatorlar va h.k.) normal
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class ArchiveBomb(Exception):
+    """Arxiv cheklovlardan oshdi (a'zolar soni / ochilgan hajm / siqish nisbati)."""
+
+
+class Finding:
+    """Bitta arxiv a'zosining natijasi (merge_results uchun `label`/`result`, saqlash uchun qolgani)."""
+    __slots__ = ('path', 'size', 'verdict', 'reasons', 'result', 'data')
+
+    def __init__(self, path, size, verdict, reasons, data=None):
+        self.path = path
+        self.size = size
+        self.verdict = verdict
+        self.reasons = reasons
+        self.result = None  # Gemini javobi
+        self.data = data    # Faqat AI'ga yuboriladigan a'zolar uchun saqlanadi
+
+    @property
+    def label(self):
+        return self.path
+
+
+class ArchiveReport:
+    """gemini_stage natijasi: `summary` - decide_verdict o'qiydigan matn, `findings` - SAFE bo'lmagan a'zolar."""
+
+    def __init__(self, summary, findings=()):
+        self.summary = summary
+        self.findings = list(findings)[:MAX_FINDINGS]
+
+    def __str__(self):
+        return self.summary
+
+
+# --- Oqim bilan o'qish (cheklovlar bilan) ---
+class _Budget:
+    def __init__(self, compressed_size):
+        self.compressed_size = max(compressed_size, 1)
+        self.max_members = _setting('ARCHIVE_MAX_MEMBERS', 5000)
+        self.max_expanded = _setting('ARCHIVE_MAX_EXPANDED_BYTES', 500 * 1024 * 1024)
+        self.max_ratio = _setting('ARCHIVE_MAX_RATIO', 100)
+        self.members = 0
+        self.expanded = 0
+
+    def add(self, size):
+        self.members += 1
+        self.expanded += size
+        if self.members > self.max_members:
+            raise ArchiveBomb(f"a'zolar soni {self.max_members} dan ko'p")
+        if self.expanded > self.max_expanded:
+            raise ArchiveBomb(f"ochilgan hajm {self.max_expanded // (1024 * 1024)} MB dan katta")
+        if self.expanded > RATIO_MIN_BYTES and self.expanded > self.compressed_size * self.max_ratio:
+            raise ArchiveBomb(f"siqish nisbati {self.max_ratio}:1 dan yuqori")
+
+
+def _read_capped(f):
+    """MAX_PRESCAN_BYTES + 1 gacha o'qiydi: sarlavhadagi hajm yolg'on bo'lsa ham xotira cheklangan."""
+    return f.read(MAX_PRESCAN_BYTES + 1)
+
+
+def _zip_members(path, budget):
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            # Sarlavhadagi hajm bo'yicha - ochmasdan oldin (bitta a'zo 1 GB ga "portlasa" ham o'qilmaydi)
+            budget.add(info.file_size)
+            yield info.filename, info.file_size, lambda info=info: _read_capped(archive.open(info))
+
+
+def _tar_members(path, budget):
+    # 'r|*' - oqim rejimi (seek'siz); o'tkazib yuborilgan a'zo ham ochiladi, shuning uchun hajm haqiqiy
+    with tarfile.open(path, mode='r|*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            budget.add(member.size)
+            yield member.name, member.size, lambda member=member: _read_capped(archive.extractfile(member))
+
+
+def _gzip_member(path, name, budget):
+    import gzip
+    inner = os.path.basename(name)[:-3]
+    with gzip.open(path, 'rb') as f:
+        data = _read_capped(f)
+        size = len(data)
+        while True:
+            block = f.read(1024 * 1024)
+            if not block:
+                break
+            size += len(block)
+            if size > budget.max_expanded:
+                break
+    budget.add(size)
+    yield inner, size, lambda: data
+
+
+def iter_members(path, name, budget):
+    """(yo'l, hajm, o'qish_funksiyasi); qo'llab-quvvatlanmaydigan format (7z/rar) uchun None."""
+    lower = (name or '').lower()
+    if lower.endswith('.zip'):
+        return _zip_members(path, budget)
+    if lower.endswith(('.tar', '.tar.gz', '.tgz')) or (lower.endswith('.gz') and tarfile.is_tarfile(path)):
+        return _tar_members(path, budget)
+    if lower.endswith('.gz'):
+        return _gzip_member(path, name, budget)
+    return None
+
+
+def archive_members(path, name):
+    """iter_members odatiy cheklovlar bilan (code_index uchun); 7z/rar uchun None."""
+    return iter_members(path, name, _Budget(os.path.getsize(path)))
+
+
+# --- Lokal tahlil (jarayonlar pulida yoki shu jarayonda) ---
+def _prescan_member(data, path):
+    # Jarayonlar puli uchun modul darajasidagi funksiya (pickle qilinadi)
+    local = prescan_bytes(data, path)
+    return local.verdict, local.reasons
+
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    """Lokal tahlil uchun umumiy jarayonlar puli (bir marta, birinchi katta arxivda yaratiladi)."""
+    global _process_pool
+    processes = _setting('ARCHIVE_SCAN_PROCESSES', 2)
+    if processes <= 0:
+        return None
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                # forkserver: worker oqimlari va DB ulanishlari bor jarayondan fork qilinmaydi
+                method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+                _process_pool = ProcessPoolExecutor(max_workers=processes,
+                                                    mp_context=multiprocessing.get_context(method))
+    return _process_pool
+
+
+def _reset_process_pool():
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not None:
+            _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+def _member_kind(path, size):
+    ext = os.path.splitext(path)[1].lower()
+    if ext in EXECUTABLE_EXTENSIONS:
+        return "Bajariladigan fayl"
+    if path.lower().endswith(ARCHIVE_EXTENSIONS):
+        return "Ichki arxiv"
+    if ext not in CODE_EXTENSIONS:
+        return None  # Ma'lumot fayli (rasm, shrift, json, md ...) - tekshirilmaydi
+    if size > MAX_PRESCAN_BYTES:
+        return "Fayl lokal tahlil uchun juda katta"
+    return 'code'
+
+
+class _Collector:
+    """Lokal natijalarni yig'adi: DANGER/UNSURE ro'yxati va AI uchun eng shubhali K ta a'zo (heap)."""
+
+    def __init__(self, max_llm_members):
+        self.max_llm_members = max_llm_members
+        self.scanned = 0
+        self.findings = []
+        self.danger = []
+        self.unanswered = []  # AI'ga yuborilmaydigan shubhali a'zolar
+        self._heap = []       # (sabablar soni, -tartib, Finding) - eng kam shubhalisi tepada
+
+    def add(self, path, size, verdict, reasons, data):
+        self.scanned += 1
+        if verdict == SAFE:
+            return
+        finding = Finding(path, size, verdict, reasons)
+        self.findings.append(finding)
+        if verdict == DANGER:
+            self.danger.append(finding)
+            return
+        finding.data = data
+        heapq.heappush(self._heap, (len(reasons), -self.scanned, finding))
+        if len(self._heap) > self.max_llm_members:
+            dropped = heapq.heappop(self._heap)[2]
+            dropped.data = None
+            self.unanswered.append(dropped)
+
+    def skip(self, path, size, reason):
+        self.scanned += 1
+        finding = Finding(path, size, UNSURE, [reason])
+        self.findings.append(finding)
+        self.unanswered.append(finding)
+
+    def for_llm(self):
+        return [item[2] for item in sorted(self._heap, reverse=True)]
+
+
+def _scan_locally(members, collector):
+    """A'zolarni tekshiradi; birinchi DANGER da to'xtaydi. Katta arxivlarda tahlil jarayonlar pulida."""
+    pool, pending = None, {}
+    max_pending = max(_setting('ARCHIVE_SCAN_PROCESSES', 2), 1) * 4
+
+    def drain(block):
+        done = wait(pending, return_when=FIRST_COMPLETED).done if block else [f for f in pending if f.done()]
+        for future in done:
+            path, size, data = pending.pop(future)
+            collector.add(path, size, *future.result(), data)
+
+    try:
+        for path, size, read in members:
+            kind = _member_kind(path, size)
+            if kind is None:
+                continue
+            if kind != 'code':
+                collector.skip(path, size, kind)
+                continue
+            data = read()
+            if pool is None and collector.scanned == INLINE_MEMBERS:
+                try:
+                    pool = get_process_pool()
+                except OSError:
+                    pass  # Jarayon yaratib bo'lmadi (konteyner cheklovlari) - shu jarayonda davom etamiz
+            if pool is None:
+                collector.add(path, size, *_prescan_member(data, path), data)
+            else:
+                pending[pool.submit(_prescan_member, data, path)] = (path, size, data)
+                drain(block=len(pending) >= max_pending)
+            if collector.danger:
+                return
+        while pending and not collector.danger:
+            drain(block=True)
+    except BrokenProcessPool:
+        # Pul buzilgan (masalan, worker xotira yetmay o'ldi) - qolganlari shu jarayonda tekshiriladi
+        _reset_process_pool()
+        for future, (path, size, data) in pending.items():
+            collector.add(path, size, *_prescan_member(data, path), data)
+        pending.clear()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+# --- Asosiy funksiya ---
+def scan_archive(artifact, max_llm_members=None, concurrency=None, timeout=None, limiter=None):
+    """ArchiveReport yoki None (format qo'llab-quvvatlanmaydi - eski "Binary" yo'li ishlaydi)."""
+    max_llm_members = max_llm_members or _setting('ARCHIVE_MAX_LLM_MEMBERS', 5)
+    budget = _Budget(artifact.size)
+    members = iter_members(artifact.path, artifact.name, budget)
+    if members is None:
+        return None
+
+    collector = _Collector(max_llm_members)
+    try:
+        _scan_locally(members, collector)
+    except ArchiveBomb as e:
+        return ArchiveReport(f"DANGER: Arxiv bomba belgilari - {e}.", collector.findings)
+    except (OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, ValueError) as e:
+        return ArchiveReport(f"Arxivni ochib bo'lmadi ({e}), faqat VirusTotal tekshiradi.", collector.findings)
+
+    if collector.danger:
+        details = '; '.join(f"{f.path}: {', '.join(f.reasons[:2])}" for f in collector.danger[:3])
+        return ArchiveReport(f"DANGER: Lokal tahlil ({collector.scanned} fayl) - {details}", collector.findings)
+
+    selected = collector.for_llm()
+    if not selected and not collector.unanswered:
+        return ArchiveReport(f"SAFE: Lokal tahlil - arxivdagi {collector.scanned} ta kod faylining "
+                             f"birortasida shubhali kod topilmadi.")
+
+    # --- Gemini: har bir tanlangan a'zoning eng shubhali bo'lagi (10 KB), parallel ---
+    jobs = []
+    for finding in selected:
+        member = BytesArtifact(finding.data, finding.path)
+        finding.data = None
+        jobs.append((member, riskiest_chunk(member)))
+    deadline = time.monotonic() + (timeout or _setting('SCAN_CHUNK_TIMEOUT', 180))
+    ask_gemini_parallel(jobs, concurrency or _setting('GEMINI_CONCURRENCY', 4),
+                        limiter or get_gemini_limiter(), deadline)
+    for finding, (_, chunk) in zip(selected, jobs):
+        finding.result = chunk.result
+        if chunk.result is not None and "DANGER" in str(chunk.result):
+            finding.verdict = DANGER
+
+    summary = merge_results(collector.scanned, selected,
+                            collector.unanswered + [f for f in selected if f.result is None], unit="fayl")
+    findings = [f for f in collector.findings if not (f.result and f.verdict != DANGER and "SAFE" in str(f.result))]
+    return ArchiveReport(summary, findings)
@@ -0,0 +1,218 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from .prescan import DANGER, SAFE, prescan_text
+from .security import INCONCLUSIVE_AI_PREFIXES, scan_with_gemini
+
+
+# ==========================================
+# KATTA FAYLLARNI BO'LAKLAB SKANLASH (map-reduce)
+# ==========================================
+# scan_with_gemini faqat 10 KB ko'radi. Katta fayl ~10 KB lik, bir-birini qoplaydigan bo'laklarga
+# bo'linadi (mmap orqali - xotirada bir vaqtda faqat bitta bo'lak):
+#   map:    har bir bo'lak lokal prescan bilan baholanadi (SAFE - o'tkaziladi, DANGER - yakuniy hukm);
+#           shubhali (UNSURE) bo'laklar xavf bahosi bo'yicha saralanib Gemini'ga parallel yuboriladi
+#           (jarayon bo'yicha umumiy rate limit, umumiy muddat - SCAN_CHUNK_TIMEOUT)
+#   reduce: biror bo'lak DANGER bo'lsa - DANGER; AI ko'rmagan shubhali bo'lak qolsa - qo'lda tekshiruv
+#           ('warning'); aks holda SAFE.
+
+CHUNK_BYTES = 10000   # scan_with_gemini kesadigan hajm bilan bir xil
+OVERLAP_BYTES = 1000  # Chegarada bo'lingan chaqiruv ikkala bo'lakda ham to'liq ko'rinishi uchun
+MAX_DETAILS = 3       # Yakuniy matnga kiritiladigan AI izohlari
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RateLimiter:
+    """Token bucket: daqiqasiga `per_minute` ta so'rov, `burst` tagacha birdaniga."""
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst or max(1, per_minute // 10)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Token olinsa True; `timeout` ichida olib bo'lmasa False."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                delay = (1 - self.tokens) / self.rate
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return False
+            time.sleep(delay)
+
+
+_gemini_limiter = None
+_gemini_limiter_lock = threading.Lock()
+
+
+def get_gemini_limiter():
+    """Barcha skan oqimlari uchun bitta limiter (Gemini kvotasi jarayon bo'yicha umumiy)."""
+    global _gemini_limiter
+    if _gemini_limiter is None:
+        with _gemini_limiter_lock:
+            if _gemini_limiter is None:
+                _gemini_limiter = RateLimiter(_setting('GEMINI_REQUESTS_PER_MINUTE', 60))
+    return _gemini_limiter
+
+
+class BytesArtifact:
+    """Xotiradagi fayl (arxiv a'zosi) - ScanArtifact bilan bir xil interfeys: name, size, read_slice."""
+
+    def __init__(self, data, name):
+        self.data = data
+        self.name = name
+        self.size = len(data)
+
+    def read_slice(self, length, offset=0):
+        return self.data[offset:offset + length]
+
+
+class Chunk:
+    __slots__ = ('index', 'offset', 'length', 'start_line', 'end_line', 'verdict', 'reasons', 'result')
+
+    def __init__(self, index, offset, length, start_line, end_line):
+        self.index = index
+        self.offset = offset
+        self.length = length
+        self.start_line = start_line
+        self.end_line = end_line
+        self.verdict = None
+        self.reasons = []
+        self.result = None  # Gemini javobi
+
+    @property
+    def label(self):
+        return f"{self.start_line}-{self.end_line} qatorlar"
+
+
+def _cut_point(data, minimum):
+    """Bo'lak oxiri: iloji bo'lsa chekkadan boshlanadigan qator (def/class/funksiya) oldidan, aks holda qator oxiri."""
+    last_newline = end = data.rfind(b'\n', minimum)
+    while end >= minimum:
+        if end + 1 < len(data) and data[end + 1] not in b' \t\r\n}':
+            return end + 1
+        end = data.rfind(b'\n', minimum, end)
+    return last_newline + 1 if last_newline >= 0 else len(data)
+
+
+def iter_chunks(artifact, chunk_bytes=CHUNK_BYTES, overlap=OVERLAP_BYTES):
+    """(Chunk, matn) juftliklari; matn faqat shu bo'lak uchun o'qiladi."""
+    offset, line, index = 0, 1, 0
+    while offset < artifact.size:
+        data = artifact.read_slice(chunk_bytes, offset)
+        if offset + len(data) < artifact.size:
+            data = data[:_cut_point(data, len(data) * 3 // 4)]
+        text = data.decode('utf-8', errors='ignore')
+        end_line = line + max(text.count('\n') - (1 if text.endswith('\n') else 0), 0)
+        yield Chunk(index, offset, len(data), line, end_line), text
+        if offset + len(data) >= artifact.size:
+            break
+        # Keyingi bo'lak oxirgi `overlap` baytning qator boshidan boshlanadi
+        back = data.rfind(b'\n', 0, max(len(data) - overlap, 1))
+        next_offset = offset + (back + 1 if back >= 0 else max(len(data) - overlap, 1))
+        line += data[:next_offset - offset].count(b'\n')
+        offset = next_offset
+        index += 1
+
+
+def riskiest_chunk(artifact):
+    """Eng ko'p shubhali belgili bo'lak (arxiv a'zosidan AI'ga faqat shu oyna yuboriladi)."""
+    best = None
+    for chunk, text in iter_chunks(artifact):
+        chunk.reasons = prescan_text(text, artifact.name).reasons
+        if best is None or len(chunk.reasons) > len(best.reasons):
+            best = chunk
+    return best
+
+
+def _ask_gemini(artifact, chunk, limiter, deadline):
+    if not limiter.acquire(timeout=max(deadline - time.monotonic(), 0)):
+        return None  # Muddat tugadi - bu bo'lak AI tekshiruvisiz qoladi
+    text = artifact.read_slice(chunk.length, chunk.offset).decode('utf-8', errors='ignore')
+    return scan_with_gemini(text, context=f"{artifact.name}, {chunk.label}")
+
+
+def ask_gemini_parallel(jobs, concurrency, limiter, deadline):
+    """jobs: [(artifact, chunk)]; javob chunk.result ga yoziladi (muddatga ulgurmaganlarda - None)."""
+    pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='scan-chunk')
+    futures = {pool.submit(_ask_gemini, artifact, chunk, limiter, deadline): chunk for artifact, chunk in jobs}
+    done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    pool.shutdown(wait=False, cancel_futures=True)
+    for future in done:
+        try:
+            futures[future].result = future.result()
+        except Exception as e:
+            futures[future].result = f"AI Xatosi: {e}"
+
+
+def scan_chunks(artifact, concurrency=None, max_llm_chunks=None, timeout=None, limiter=None):
+    """Butun faylni bo'laklab tekshiradi; qaytaradi: scan_with_gemini bilan bir xil ko'rinishdagi matn."""
+    concurrency = concurrency or _setting('GEMINI_CONCURRENCY', 4)
+    max_llm_chunks = max_llm_chunks or _setting('SCAN_MAX_LLM_CHUNKS', 16)
+    timeout = timeout or _setting('SCAN_CHUNK_TIMEOUT', 180)
+    limiter = limiter or get_gemini_limiter()
+    deadline = time.monotonic() + timeout
+
+    # --- map (lokal): matnlar saqlanmaydi, faqat offset/baho ---
+    chunks, local_danger, risky = [], [], []
+    for chunk, text in iter_chunks(artifact):
+        local = prescan_text(text, artifact.name)
+        chunk.verdict, chunk.reasons = local.verdict, local.reasons
+        chunks.append(chunk)
+        if local.verdict == DANGER:
+            local_danger.append(chunk)
+        elif local.verdict != SAFE:
+            risky.append(chunk)
+
+    if local_danger:
+        details = '; '.join(f"{c.label}: {', '.join(c.reasons[:2])}" for c in local_danger[:MAX_DETAILS])
+        return f"DANGER: Lokal tahlil ({len(local_danger)}/{len(chunks)} bo'lak) - {details}"
+    if not risky:
+        return f"SAFE: Lokal tahlil - {len(chunks)} ta bo'lakning birortasida shubhali kod topilmadi."
+
+    # --- map (Gemini): eng shubhali bo'laklar, parallel, rate limit bilan ---
+    risky.sort(key=lambda c: (-len(c.reasons), c.index))
+    selected, skipped = risky[:max_llm_chunks], risky[max_llm_chunks:]
+    ask_gemini_parallel([(artifact, c) for c in selected], concurrency, limiter, deadline)
+    unanswered = [c for c in selected if c.result is None] + skipped
+
+    return merge_results(len(chunks), selected, unanswered)
+
+
+def merge_results(total, asked, unanswered, unit="bo'lak"):
+    """
+    reduce: natijalarni bitta xulosaga birlashtiradi (decide_verdict shu matnni o'qiydi).
+    asked/unanswered elementlarida `label` va `result` bo'lsa yetarli (Chunk yoki arxiv a'zosi).
+    """
+    answered = [c for c in asked if c.result is not None]
+    dangerous = [c for c in answered if "DANGER" in str(c.result)]
+    # Na SAFE, na DANGER (kutilmagan javob yoki istisno) - tekshirilmagan deb hisoblanadi
+    unanswered = unanswered + [c for c in answered if "SAFE" not in str(c.result) and c not in dangerous]
+    coverage = f"{total} {unit}, {len(answered)} tasi AI'da tekshirildi"
+
+    if dangerous:
+        details = '\n'.join(f"[{c.label}] {str(c.result)[:500]}" for c in dangerous[:MAX_DETAILS])
+        return f"DANGER: {len(dangerous)} ta {unit}da xavfli kod ({coverage}).\n{details}"
+    if unanswered:
+        # "SAFE" ham "DANGER" ham yo'q -> decide_verdict 'warning' qo'yadi (qo'lda tekshirish uchun)
+        labels = ', '.join(c.label for c in unanswered[:5])
+        return f"Shubhali {len(unanswered)} ta {unit} AI tekshiruvisiz qoldi ({coverage}): {labels}"
+    inconclusive = [c for c in answered if str(c.result).startswith(INCONCLUSIVE_AI_PREFIXES)]
+    if inconclusive:
+        # Oldingi xatti-harakat saqlanadi (AI xatosi -> SAFE), lekin prefiks tufayli hukm keshlanmaydi
+        return f"{inconclusive[0].result} ({coverage})"
+    return f"SAFE: Barcha shubhali {unit}lar xavfsiz ({coverage})."
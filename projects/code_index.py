@@ -0,0 +1,234 @@
+import json
+import math
+import os
+import re
+import tarfile
+import threading
+import zipfile
+import zlib
+from collections import Counter
+
+from django.conf import settings
+
+from .archive_manifest import LANGUAGES, is_archive
+from .archive_scan import ArchiveBomb, archive_members
+from .lru import LRUCache
+
+
+# ==========================================
+# AI YORDAMCHI UCHUN KOD INDEKSI (BM25, retrieval)
+# ==========================================
+# Yuklash skani vaqtida (scan_pipeline, o'sha lokal fayldan) kod fayllari CHUNK_LINES qatorli bo'laklarga
+# bo'linadi va BM25 inverted indeksi quriladi: {'chunks': [[yo'l, boshi, oxiri, matn]], 'lengths': [...],
+# 'postings': {so'z: [bo'lak, tf, bo'lak, tf, ...]}} -> JSON + zlib -> CodeIndex.data.
+# Savol vaqtida faqat savoldagi so'zlarning postinglari o'qiladi va eng mos TOP_K bo'lak (jami MAX_CHARS gacha)
+# promptga qo'shiladi - butun kod yuborilmaydi. Ochilgan indeks xotirada (LRU) sha256 bo'yicha saqlanadi.
+# Identifikatorlar bo'laklanadi: getUserName / get_user_name -> get, user, name.
+
+INDEX_EXTENSIONS = tuple(LANGUAGES) + ('.txt',)
+SKIP_DIRS = ('node_modules/', 'venv/', '.venv/', '.git/', '__pycache__/', 'dist/', 'build/', 'vendor/', '.idea/')
+MAX_FILE_BYTES = 256 * 1024
+MAX_LINE_AVG = 300  # Minifikatsiya qilingan fayllar (bitta uzun qator) indekslanmaydi
+CHUNK_LINES = 40
+CHUNK_CHARS = 2000
+MAX_CHUNKS = 600
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WORD_RE = re.compile(r'[^\W_]+')
+CAMEL_RE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+')
+STOPWORDS = frozenset((
+    # Savollarda ko'p uchraydigan so'zlar
+    'bu', 'nima', 'nimalar', 'qanday', 'qanaqa', 'qiladi', 'qilinadi', 'qayerda', 'qaysi', 'va', 'uchun',
+    'bilan', 'ham', 'men', 'kod', 'kodi', 'kodda', 'loyiha', 'loyihada', 'bormi', 'ishlaydi', 'the', 'is',
+    # Kodda hamma joyda uchraydigan kalit so'zlar
+    'def', 'self', 'return', 'import', 'from', 'if', 'else', 'for', 'in', 'not', 'none', 'true', 'false',
+    'var', 'let', 'const', 'function', 'this', 'new', 'public', 'private', 'static', 'void', 'int', 'str',
+))
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def tokenize(text):
+    tokens = []
+    for word in WORD_RE.findall(text):
+        parts = CAMEL_RE.findall(word) if word.isascii() and not word.islower() else [word]
+        for part in parts:
+            part = part.lower()
+            if len(part) > 1 and not part.isdigit() and part not in STOPWORDS:
+                tokens.append(part)
+    return tokens
+
+
+def _indexable(path):
+    lower = '/' + path.lower()
+    return lower.endswith(INDEX_EXTENSIONS) and not any('/' + d in lower for d in SKIP_DIRS)
+
+
+def _decode(data):
+    if len(data) > MAX_FILE_BYTES or b'\x00' in data[:1024]:
+        return None
+    text = data.decode('utf-8', errors='ignore')
+    lines = text.count('\n') + 1
+    if len(text) / lines > MAX_LINE_AVG:
+        return None
+    return text
+
+
+def split_chunks(path, text):
+    """(yo'l, boshlang'ich qator, oxirgi qator, matn) - CHUNK_LINES qator yoki CHUNK_CHARS belgigacha."""
+    lines = text.splitlines()
+    start = 0
+    while start < len(lines):
+        end, size = start, 0
+        while end < len(lines) and end - start < CHUNK_LINES and size + len(lines[end]) <= CHUNK_CHARS:
+            size += len(lines[end]) + 1
+            end += 1
+        end = max(end, start + 1)  # Bitta juda uzun qator ham bo'lak bo'ladi (kesilgan)
+        body = '\n'.join(lines[start:end])[:CHUNK_CHARS]
+        if body.strip():
+            yield path, start + 1, end, body
+        start = end
+
+
+class CodeIndexData:
+    def __init__(self, chunks, lengths, postings):
+        self.chunks = chunks
+        self.lengths = lengths
+        self.postings = postings
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, files):
+        """files: (yo'l, matn) lar. Bo'laklar soni MAX_CHUNKS bilan cheklangan."""
+        chunks, lengths, postings = [], [], {}
+        for path, text in files:
+            if len(chunks) >= MAX_CHUNKS:
+                break
+            for chunk in split_chunks(path, text):
+                if len(chunks) >= MAX_CHUNKS:
+                    break
+                # Fayl nomi ham bo'lak so'zlariga kiradi ("auth.py" haqidagi savol)
+                counts = Counter(tokenize(chunk[0]) + tokenize(chunk[3]))
+                i = len(chunks)
+                for term, tf in counts.items():
+                    postings.setdefault(term, []).extend((i, tf))
+                chunks.append(list(chunk))
+                lengths.append(sum(counts.values()))
+        return cls(chunks, lengths, postings)
+
+    def to_bytes(self):
+        payload = {'chunks': self.chunks, 'lengths': self.lengths, 'postings': self.postings}
+        return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode(), 6)
+
+    @classmethod
+    def from_bytes(cls, data):
+        payload = json.loads(zlib.decompress(bytes(data)))
+        return cls(payload['chunks'], payload['lengths'], payload['postings'])
+
+    def search(self, query, k=4):
+        """BM25 bo'yicha eng mos k ta bo'lak (yo'l, boshi, oxiri, matn), kamayish tartibida."""
+        n = len(self.chunks)
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            df = len(posting) // 2
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for j in range(0, len(posting), 2):
+                i, tf = posting[j], posting[j + 1]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / (self.avg_length or 1))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        best = sorted(scores, key=lambda i: (-scores[i], i))[:k]
+        return [tuple(self.chunks[i]) for i in best]
+
+
+def _iter_files(path, name):
+    """Loyiha faylidan (yo'l, matn): bitta kod fayli yoki arxiv a'zolari."""
+    if not is_archive(name):
+        if _indexable(name):
+            with open(path, 'rb') as f:
+                text = _decode(f.read(MAX_FILE_BYTES + 1))
+            if text is not None:
+                yield os.path.basename(name), text
+        return
+    members = archive_members(path, name)
+    if members is None:
+        return  # 7z/rar
+    for member_path, size, read in members:
+        if size <= MAX_FILE_BYTES and _indexable(member_path):
+            text = _decode(read())
+            if text is not None:
+                yield member_path, text
+
+
+def build_project_index(project, artifact):
+    """Yuklash pipeline bosqichi: indeksni quradi va saqlaydi. Qaytaradi: bo'laklar soni."""
+    from .models import CodeIndex
+
+    try:
+        index = CodeIndexData.build(_iter_files(artifact.path, artifact.name))
+    except (ArchiveBomb, OSError, EOFError, zipfile.BadZipFile, tarfile.TarError, ValueError):
+        index = None
+    if not index or not index.chunks:
+        CodeIndex.objects.filter(project=project).delete()
+        return 0
+    CodeIndex.objects.update_or_create(project=project, defaults={
+        'sha256': artifact.sha256, 'data': index.to_bytes(), 'chunk_count': len(index.chunks),
+    })
+    return len(index.chunks)
+
+
+_loaded = None
+_loaded_lock = threading.Lock()
+
+
+def _loaded_indexes():
+    global _loaded
+    if _loaded is None:
+        with _loaded_lock:
+            if _loaded is None:
+                _loaded = LRUCache(64, _setting('CODE_INDEX_CACHE_MAX_BYTES', 64 * 1024 * 1024), 3600)
+    return _loaded
+
+
+def index_version(project):
+    """Indekslangan fayl sha256 (bo'sh - indeks yo'q)."""
+    from .models import CodeIndex
+
+    return CodeIndex.objects.filter(project=project).values_list('sha256', flat=True).first() or ''
+
+
+def load_index(project, version=None):
+    from .models import CodeIndex
+
+    version = version if version is not None else index_version(project)
+    if not version:
+        return None
+    key = f"{project.pk}:{version}"
+    index = _loaded_indexes().get(key)
+    if index is None:
+        data = CodeIndex.objects.filter(project=project, sha256=version).values_list('data', flat=True).first()
+        if data is None:
+            return None
+        index = CodeIndexData.from_bytes(data)
+        _loaded_indexes().put(key, index, size=len(data) * 4)  # Ochilgan JSON taxminan siqilganidan 4 barobar
+    return index
+
+
+def retrieve(project, question, version=None, k=None, max_chars=None):
+    """Savolga eng mos kod bo'laklari, jami max_chars belgigacha."""
+    index = load_index(project, version)
+    if index is None:
+        return []
+    max_chars = max_chars or _setting('AI_RAG_MAX_CHARS', 6000)
+    selected, total = [], 0
+    for chunk in index.search(question, k or _setting('AI_RAG_TOP_K', 4)):
+        if total + len(chunk[3]) > max_chars:
+            break
+        selected.append(chunk)
+        total += len(chunk[3])
+    return selected
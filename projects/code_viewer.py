@@ -0,0 +1,94 @@
+import hashlib
+import os
+from array import array
+
+from .source_cache import BLOB_NAME_RE, get_source_cache
+
+
+# ==========================================
+# KOD KO'RUVCHI (qatorlar oralig'i bo'yicha o'qish)
+# ==========================================
+# Fayl butunligicha xotiraga o'qilmaydi: birinchi murojaatda qator boshlari (bayt offsetlari)
+# source_cache ildizidagi `lines/<sha256>.lines` ga yoziladi, keyin istalgan oraliq seek + read bilan olinadi.
+# Kesh blobi sha256 bo'yicha nomlangani uchun indeks eskirmaydi; lokal storage fayli (FileSystemStorage)
+# uchun kalit - yo'l, hajm va mtime xeshi. Indeks hech qachon storage fayli yoniga (MEDIA_ROOT) yozilmaydi.
+
+CHUNK_SIZE = 1024 * 1024
+FIRST_SCREEN_LINES = 200
+MAX_RANGE_LINES = 500
+LOCKED_PREVIEW_LINES = 15  # Premium (sotib olinmagan) loyihalarda ko'rsatiladigan qatorlar
+
+
+def _index_path(path):
+    key = os.path.basename(path)
+    if not BLOB_NAME_RE.match(key):
+        stat = os.stat(path)
+        key = hashlib.sha256(f'{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+    return get_source_cache().line_index_path(key)
+
+
+def build_line_index(path):
+    """Har bir qator boshining bayt offseti (oxirida fayl hajmi) - array('Q')."""
+    offsets = array('Q', [0])
+    position = 0
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            start = 0
+            while True:
+                i = chunk.find(b'\n', start)
+                if i < 0:
+                    break
+                offsets.append(position + i + 1)
+                start = i + 1
+            position += len(chunk)
+    if offsets[-1] != position:
+        offsets.append(position)  # Oxirgi qator \n bilan tugamagan
+    return offsets
+
+
+def load_line_index(path):
+    index_path = _index_path(path)
+    try:
+        offsets = array('Q')
+        with open(index_path, 'rb') as f:
+            offsets.frombytes(f.read())
+        # Oxirgi offset = fayl hajmi bo'lsa indeks shu faylniki (mtime LRU uchun o'zgaradi, unga qaramaymiz)
+        if offsets and offsets[-1] == os.path.getsize(path):
+            return offsets
+    except (OSError, ValueError):
+        pass
+
+    offsets = build_line_index(path)
+    tmp = f'{index_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            offsets.tofile(f)
+        os.replace(tmp, index_path)
+    except OSError:
+        pass  # Faqat o'qish mumkin bo'lgan storage: indeks har safar xotirada quriladi
+    return offsets
+
+
+def read_lines(path, start=0, count=FIRST_SCREEN_LINES, limit=None):
+    """
+    [start, start+count) qatorlarni qaytaradi. `limit` - ruxsat etilgan qatorlar soni (premium preview).
+    Qaytaradi: {'lines', 'start', 'end', 'total_lines', 'has_more'}
+    """
+    offsets = load_line_index(path)
+    total = len(offsets) - 1
+    allowed = total if limit is None else min(total, limit)
+    start = max(0, min(start, allowed))
+    end = min(start + max(0, min(count, MAX_RANGE_LINES)), allowed)
+
+    lines = []
+    if end > start:
+        with open(path, 'rb') as f:
+            f.seek(offsets[start])
+            data = f.read(offsets[end] - offsets[start])
+        lines = [line.rstrip('\r') for line in data.decode('utf-8', errors='ignore').split('\n')]
+        if data.endswith(b'\n'):
+            lines.pop()
+    return {'lines': lines, 'start': start, 'end': end, 'total_lines': total, 'has_more': end < allowed}
@@ -0,0 +1,370 @@
+import base64
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.core import signing
+from django.db import close_old_connections
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import get_random_string
+
+from . import sandbox
+from .compiler_cache import get_result_cache, is_deterministic, make_key
+from .http_client import get_client
+from .models import CompilerRun
+
+
+# ==========================================
+# ONLINE KOMPILYATOR (Judge0, asinxron)
+# ==========================================
+# So'rov ichida kutilmaydi:
+#   submit  - kod Judge0 ga `wait=false` bilan yuboriladi, CompilerRun qatori yoziladi, token darhol qaytadi
+#   natija  - brauzer /compiler/result/<token>/ ni so'raydi: bazadan bitta qator o'qiladi (Judge0 ga so'rovsiz)
+# Qatorni to'ldiruvchilar:
+#   callback - JUDGE0_CALLBACK_URL berilgan bo'lsa Judge0 natijani o'zi PUT qiladi (imzolangan token bilan)
+#   poller   - aks holda jarayondagi bitta fon oqimi barcha kutilayotgan tokenlarni /submissions/batch
+#              orqali bitta so'rovda tekshiradi
+# Natija STALE_SECONDS dan beri yangilanmagan bo'lsa (poller boshqa workerda edi va u qayta ishga tushdi,
+# callback yo'qoldi) natija so'rovining o'zi Judge0 dan bir marta, kutmasdan so'raydi.
+#
+# Bajaruvchilar (executor): COMPILER_BACKEND='local' bo'lsa Python va Node lokal sandboxda (sandbox.py)
+# bajariladi - tarmoqqa chiqilmaydi, natija odatda submit javobining o'zida qaytadi (INLINE_WAIT ichida).
+# Qolgan tillar (va sandbox ishlamaydigan serverda hammasi) - Judge0.
+#
+# Bir xil (til, kod, stdin) uchun tayyor natija compiler_cache dan olinadi - bajaruvchiga umuman bormaymiz.
+
+JUDGE0_LANG_IDS = {
+    'python':     71,   # Python 3
+    'javascript': 63,   # Node.js
+    'cpp':        54,   # C++ (GCC 9.2.0)
+    'java':       62,   # Java (OpenJDK 13)
+    'go':         60,   # Go
+    'php':        68,   # PHP
+    'csharp':     51,   # C# (Mono)
+    'ruby':       72,   # Ruby
+}
+LANGUAGES = [
+    ('python', 'Python'),
+    ('javascript', 'Node.js'),
+    ('cpp', 'C++'),
+    ('java', 'Java'),
+    ('go', 'Go'),
+    ('php', 'PHP'),
+    ('csharp', 'C#'),
+    ('ruby', 'Ruby'),
+]
+MAX_CODE_BYTES = 64 * 1024
+RUN_TIMEOUT_SECONDS = 20   # Shundan keyin ham natija bo'lmasa - "Vaqt tugadi"
+STALE_SECONDS = 4
+POLL_INTERVAL = 1.0
+RESULT_FIELDS = 'token,status,stdout,stderr,compile_output'
+CALLBACK_SALT = 'compiler-callback'
+INLINE_WAIT = 0.5  # Lokal natija shu vaqt ichida tayyor bo'lsa submit javobida qaytadi
+LOCAL_TOKEN_PREFIX = 'local-'
+CACHED_TOKEN_PREFIX = 'cache-'
+# Judge0 holatlari: 5 = vaqt limiti (server yukiga bog'liq), 13 = ichki xato, 14 = exec format xatosi.
+# Ular koddan emas, bajaruvchidan kelib chiqadi - FAILED sifatida yoziladi va keshga tushmaydi
+JUDGE0_TIME_LIMIT = 5
+JUDGE0_FAILED_STATUSES = {5, 13, 14}
+
+
+class CompilerError(Exception):
+    """Foydalanuvchiga ko'rsatiladigan xato (noto'g'ri so'rov yoki Judge0 token bermadi)."""
+
+
+def _judge0_url():
+    return getattr(settings, 'JUDGE0_URL', 'https://ce.judge0.com').rstrip('/')
+
+
+def _b64(text):
+    return base64.b64encode(text.encode()).decode()
+
+
+def _decode(value):
+    return base64.b64decode(value).decode('utf-8', errors='replace') if value else ''
+
+
+def format_result(data):
+    """Judge0 javobi -> (status, matn); hali tugamagan bo'lsa None."""
+    status = data.get('status') or {}
+    status_id = status.get('id', 0)
+    if status_id < 3:  # 1 = navbatda, 2 = bajarilmoqda
+        return None
+    if status_id == JUDGE0_TIME_LIMIT:
+        return CompilerRun.FAILED, "⏱ Vaqt tugadi: Kod bajarilishi vaqt limitidan oshdi."
+    if status_id in JUDGE0_FAILED_STATUSES:
+        return CompilerRun.FAILED, f"❌ Xatolik yuz berdi: {status.get('description') or status_id}"
+    stdout, stderr = _decode(data.get('stdout')), _decode(data.get('stderr'))
+    compile_output = _decode(data.get('compile_output'))
+    if stdout:
+        return CompilerRun.DONE, stdout
+    if compile_output:
+        return CompilerRun.DONE, "🔴 Kompilyatsiya xatosi:\n" + compile_output
+    if stderr:
+        return CompilerRun.DONE, "🔴 Xato:\n" + stderr
+    return CompilerRun.DONE, "✅ Kod bajarildi, lekin chiqish yo'q."
+
+
+def submit(code, language, stdin='', user=None):
+    """Kodni bajaruvchiga yuboradi (kutmasdan). Qaytaradi: CompilerRun (lokal bo'lsa ko'pincha tayyor)."""
+    if language not in JUDGE0_LANG_IDS:
+        raise CompilerError("Bu til qo'llab-quvvatlanmaydi.")
+    if not code.strip():
+        raise CompilerError("Kod bo'sh.")
+    if len(code.encode()) > MAX_CODE_BYTES or len(stdin.encode()) > MAX_CODE_BYTES:
+        raise CompilerError(f"Kod yoki kiritish juda katta (maksimum {MAX_CODE_BYTES // 1024} KB).")
+    if user is not None and not user.is_authenticated:
+        user = None
+    executor = get_executor(language)
+
+    cache_key = ''
+    if getattr(settings, 'COMPILER_CACHE_ENABLED', True):
+        cache = get_result_cache()
+        if not is_deterministic(code):
+            cache.record_bypass()
+        else:
+            cache_key = make_key(executor.name, language, code, stdin)
+            result = cache.get(cache_key)
+            if result is not None:
+                # cache_key yozilmaydi: TTL asl bajarilish vaqtidan hisoblanadi, hit'lar uni cho'zmaydi
+                return CompilerRun.objects.create(
+                    token=CACHED_TOKEN_PREFIX + uuid.uuid4().hex, language=language, user=user,
+                    status=CompilerRun.DONE, result=result,
+                )
+    return executor.submit(code, language, stdin, user, cache_key)
+
+
+class Judge0Executor:
+    """Tarmoq orqali Judge0: natijani callback yoki fon poller yozadi."""
+    name = 'judge0'
+
+    def submit(self, code, language, stdin, user, cache_key=''):
+        payload = {
+            "source_code": _b64(code),
+            "language_id": JUDGE0_LANG_IDS[language],
+            "stdin": _b64(stdin) if stdin else "",
+        }
+        callback_base = getattr(settings, 'JUDGE0_CALLBACK_URL', '')
+        nonce = get_random_string(16)
+        if callback_base:
+            # Judge0 natijani shu manzilga PUT qiladi; imzo - begona so'rov natijani almashtira olmasligi uchun
+            signed = signing.dumps(nonce, salt=CALLBACK_SALT)
+            payload["callback_url"] = callback_base.rstrip('/') + reverse('compiler_callback', args=[signed])
+
+        response = get_client('judge0').post(f"{_judge0_url()}/submissions?base64_encoded=true&wait=false",
+                                             json=payload)
+        response.raise_for_status()
+        token = response.json().get("token")
+        if not token:
+            raise CompilerError("Token olinmadi.")
+
+        # Natija callback/poller orqali yoziladi - keyingi so'rovlar uni bazadan cache_key bo'yicha topadi
+        run = CompilerRun.objects.create(token=token, nonce=nonce, language=language, user=user,
+                                         cache_key=cache_key)
+        if not callback_base:
+            get_poller().watch(token)
+        return run
+
+
+def format_exec_result(result):
+    """sandbox.ExecResult -> (status, matn); matn Judge0 natijalari bilan bir xil ko'rinishda."""
+    if result.timed_out:
+        limit = getattr(settings, 'LOCAL_EXECUTOR_TIMEOUT', 5)
+        return CompilerRun.FAILED, f"⏱ Vaqt tugadi: Kod bajarilishi {limit} soniyadan ko'p vaqt oldi."
+    if result.exit_code in (-9, -24):  # SIGKILL / SIGXCPU - RLIMIT_CPU
+        return CompilerRun.FAILED, "⏱ Vaqt tugadi: CPU vaqti limiti tugadi."
+    if result.stdout:
+        return CompilerRun.DONE, result.stdout
+    if result.stderr:
+        return CompilerRun.DONE, "🔴 Xato:\n" + result.stderr
+    return CompilerRun.DONE, "✅ Kod bajarildi, lekin chiqish yo'q."
+
+
+class LocalExecutor:
+    """Lokal sandbox: cheklangan oqimlar puli; tez tugagan natija darhol, qolgani fon oqimidan yoziladi."""
+    name = 'local'
+
+    def __init__(self, workers):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sandbox-run')
+
+    def submit(self, code, language, stdin, user, cache_key=''):
+        run = CompilerRun.objects.create(token=LOCAL_TOKEN_PREFIX + uuid.uuid4().hex, language=language, user=user,
+                                         cache_key=cache_key)
+        future = self._pool.submit(sandbox.execute, language, code, stdin)
+        try:
+            run.status, run.result = self._outcome(future, timeout=INLINE_WAIT)
+        except FutureTimeout:
+            future.add_done_callback(partial(self._store, run.token, cache_key))
+            return run
+        self._save(run.token, cache_key, run.status, run.result)
+        return run
+
+    @staticmethod
+    def _outcome(future, timeout=None):
+        try:
+            return format_exec_result(future.result(timeout=timeout))
+        except FutureTimeout:
+            raise
+        except Exception as e:
+            return CompilerRun.FAILED, f"❌ Xatolik yuz berdi: {e}"
+
+    @staticmethod
+    def _save(token, cache_key, status, result):
+        _finish(token, result, status)
+        if cache_key and status == CompilerRun.DONE:
+            get_result_cache().put(cache_key, result)
+
+    @classmethod
+    def _store(cls, token, cache_key, future):
+        try:
+            status, result = cls._outcome(future)
+            cls._save(token, cache_key, status, result)
+        finally:
+            close_old_connections()
+
+
+_local_executor = None
+_judge0_executor = Judge0Executor()
+_executor_lock = threading.Lock()
+
+
+def get_executor(language):
+    """COMPILER_BACKEND='local' va sandbox bu tilni qo'llasa - LocalExecutor, aks holda Judge0."""
+    global _local_executor
+    if getattr(settings, 'COMPILER_BACKEND', 'local') != 'local' or not sandbox.supports(language):
+        return _judge0_executor
+    if _local_executor is None:
+        with _executor_lock:
+            if _local_executor is None:
+                _local_executor = LocalExecutor(getattr(settings, 'LOCAL_EXECUTOR_WORKERS', 4))
+    return _local_executor
+
+
+def _finish(token, result, status=CompilerRun.DONE):
+    return CompilerRun.objects.filter(token=token, status=CompilerRun.QUEUED).update(
+        status=status, result=result, updated_at=timezone.now(),
+    )
+
+
+def apply_callback(signed_nonce, data):
+    """Judge0 callback: imzo to'g'ri bo'lsa natija yoziladi. Qaytaradi: yangilandimi."""
+    try:
+        nonce = signing.loads(signed_nonce, salt=CALLBACK_SALT, max_age=RUN_TIMEOUT_SECONDS * 30)
+    except signing.BadSignature:
+        return False
+    outcome = format_result(data)
+    if outcome is None or not data.get('token'):
+        return False
+    status, result = outcome
+    return bool(CompilerRun.objects.filter(token=data['token'], nonce=nonce, status=CompilerRun.QUEUED).update(
+        status=status, result=result, updated_at=timezone.now(),
+    ))
+
+
+def fetch_results(tokens):
+    """Bir nechta tokenni bitta so'rovda tekshiradi; tugaganlarini yozadi. Qaytaradi: tugagan tokenlar."""
+    response = get_client('judge0').get(
+        f"{_judge0_url()}/submissions/batch",
+        params={'tokens': ','.join(tokens), 'base64_encoded': 'true', 'fields': RESULT_FIELDS},
+    )
+    response.raise_for_status()
+    finished = set()
+    for data in response.json().get('submissions') or []:
+        outcome = format_result(data or {})
+        if outcome is not None:
+            status, result = outcome
+            _finish(data['token'], result, status)
+            finished.add(data['token'])
+    return finished
+
+
+def get_result(token):
+    """Natija endpoint'i: {'status', 'result'} yoki None (token yo'q)."""
+    run = CompilerRun.objects.filter(token=token).first()
+    if run is None:
+        return None
+    if run.status == CompilerRun.QUEUED:
+        age = (timezone.now() - run.created_at).total_seconds()
+        if age > RUN_TIMEOUT_SECONDS:
+            _finish(token, f"⏱ Vaqt tugadi: Kod bajarilishi {RUN_TIMEOUT_SECONDS} soniyadan ko'p vaqt oldi.",
+                    status=CompilerRun.FAILED)
+            run.refresh_from_db()
+        elif (not token.startswith(LOCAL_TOKEN_PREFIX)
+              and (timezone.now() - run.updated_at).total_seconds() > STALE_SECONDS):
+            # Hech kim kuzatmayapti - bir marta o'zimiz so'raymiz (sleep'siz)
+            CompilerRun.objects.filter(pk=run.pk).update(updated_at=timezone.now())
+            try:
+                if token in fetch_results([token]):
+                    run.refresh_from_db()
+            except Exception:
+                pass  # Keyingi so'rovda qayta urinamiz
+    return {'status': run.status, 'result': run.result}
+
+
+class CompilerPoller:
+    """Jarayonda bitta fon oqimi: kuzatilayotgan tokenlar bo'sh bo'lsa oqim tugaydi."""
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._tokens = {}  # token -> muddat (monotonic)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, token):
+        with self._lock:
+            self._tokens[token] = time.monotonic() + RUN_TIMEOUT_SECONDS
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='compiler-poller', daemon=True)
+                self._thread.start()
+
+    def pending(self):
+        with self._lock:
+            return list(self._tokens)
+
+    def _run(self):
+        try:
+            while True:
+                time.sleep(self.interval)
+                with self._lock:
+                    now = time.monotonic()
+                    self._tokens = {t: d for t, d in self._tokens.items() if d > now}
+                    tokens = list(self._tokens)[:20]  # Judge0 batch cheklovi
+                    if not tokens:
+                        self._thread = None
+                        break
+                try:
+                    finished = fetch_results(tokens)
+                except Exception as e:
+                    print(f"COMPILER POLL ERROR: {e}")
+                    continue
+                with self._lock:
+                    for token in finished:
+                        self._tokens.pop(token, None)
+            cleanup_runs()  # Bo'sh qolganda eski natijalarni tozalaymiz
+        except Exception as e:
+            print(f"COMPILER POLL ERROR: {e}")
+        finally:
+            close_old_connections()
+
+
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_poller():
+    global _poller
+    if _poller is None:
+        with _poller_lock:
+            if _poller is None:
+                _poller = CompilerPoller()
+    return _poller
+
+
+def cleanup_runs(days=1):
+    """Bir kundan eski natijalarni o'chiradi (poller bo'sh qolganda chaqiriladi)."""
+    return CompilerRun.objects.filter(created_at__lt=timezone.now() - timedelta(days=days)).delete()[0]
@@ -0,0 +1,121 @@
+import hashlib
+import re
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .lru import LRUCache
+
+
+# ==========================================
+# KOMPILYATOR NATIJALARI KESHI (bir xil kod + kiritish -> bir xil natija)
+# ==========================================
+# O'quvchilar darslikdagi bir xil misollarni (media/projects/1-dars.py va h.k.) qayta-qayta ishga tushiradi.
+# Kalit - sha256(bajaruvchi, til, kod, stdin). Ikki qavat:
+#   xotira - jarayondagi LRU: MAX_ENTRIES ta yozuv va MAX_BYTES hajm bilan cheklangan, har yozuv TTL soniya yashaydi
+#   baza   - xotirada topilmasa CompilerRun.cache_key indeksi bo'yicha TTL ichidagi oxirgi tayyor natija
+#            (boshqa gunicorn workeri yoki Judge0 callback'i yozgan natijalar ham topiladi)
+# Faqat muvaffaqiyatli (DONE) natijalar saqlanadi - vaqt tugashi va infratuzilma xatolari keshlanmaydi.
+# Vaqt, tasodifiy son, muhit yoki tarmoqqa murojaat qiladigan kod keshdan o'tkazilmaydi (bypass): foydalanuvchi
+# har safar boshqa natija kutadi. Lug'at/to'plam tartibi kabi "yashirin" farqlar uchun oldingi natija ham
+# to'g'ri natijalardan biri, shuning uchun ular tekshirilmaydi.
+
+NONDETERMINISTIC_RE = re.compile(
+    r'random|\brand\s*\(|srand|uuid|secrets|urandom|crypto|'
+    r'\btime\b|timeit|datetime|\bdate\b|clock|chrono|hrtime|performance\.now|'
+    r'nanoTime|currentTimeMillis|microtime|Time\.now|'
+    r'getpid|environ|getenv|\bhash\s*\(|\bid\s*\(|'
+    r'thread|asyncio|setTimeout|setInterval|goroutine|\bgo\s+func|'
+    r'socket|urllib|requests|http|fetch\s*\(',
+    re.IGNORECASE,
+)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def is_deterministic(code):
+    """Kod har safar bir xil natija beradimi (vaqt/tasodif/muhitga murojaat yo'q)."""
+    return NONDETERMINISTIC_RE.search(code) is None
+
+
+def make_key(backend, language, code, stdin=''):
+    h = hashlib.sha256()
+    for part in (backend, language, code, stdin):
+        h.update(part.encode())
+        h.update(b'\0')
+    return h.hexdigest()
+
+
+class ResultCache:
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None):
+        self.ttl = ttl if ttl is not None else _setting('COMPILER_CACHE_TTL', 6 * 3600)
+        self._memory = LRUCache(max_entries or _setting('COMPILER_CACHE_ENTRIES', 2000),
+                                max_bytes or _setting('COMPILER_CACHE_MAX_BYTES', 16 * 1024 * 1024), self.ttl)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'db_hits': 0, 'misses': 0, 'bypassed': 0, 'stores': 0}
+
+    def get(self, key):
+        """Xotiradan, keyin bazadan qidiradi. Qaytaradi: natija matni yoki None."""
+        result = self._memory.get(key)
+        if result is not None:
+            self._count('hits')
+            return result
+
+        result = self._from_db(key)
+        self._count('db_hits' if result is not None else 'misses')
+        if result is not None:
+            self._memory.put(key, result)
+        return result
+
+    def _from_db(self, key):
+        from .models import CompilerRun
+
+        return (CompilerRun.objects
+                .filter(cache_key=key, status=CompilerRun.DONE,
+                        created_at__gte=timezone.now() - timedelta(seconds=self.ttl))
+                .order_by('-created_at')
+                .values_list('result', flat=True)
+                .first())
+
+    def put(self, key, result):
+        if self._memory.put(key, result):  # Bitta katta chiqish butun keshni siqib chiqarmaydi
+            self._count('stores')
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def record_bypass(self):
+        self._count('bypassed')
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s['hits'] + s['db_hits'] + s['misses']
+        return {
+            **s,
+            'evictions': self._memory.evictions,
+            'entries': len(self._memory),
+            'bytes': self._memory.size_bytes,
+            'hit_ratio': round((s['hits'] + s['db_hits']) / lookups, 3) if lookups else 0.0,
+        }
+
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache()
+    return _result_cache
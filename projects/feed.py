@@ -0,0 +1,64 @@
+from .models import FeedEntry, Project, Sync
+from .pagination import KeysetPaginator, NEWEST_KEYS
+
+
+# ==========================================
+# KUZATUVCHI LENTASI (fan-out-on-write)
+# ==========================================
+# Yangi loyiha yaratilganda muallifning barcha kuzatuvchilariga FeedEntry qatorlari bo'lib-bo'lib
+# (FANOUT_BATCH) yoziladi. Sync bo'lganda lenta muallifning so'nggi loyihalari bilan to'ldiriladi,
+# sync bekor qilinganda esa tozalanadi. /feed/ va /api/feed/ shunda bitta indeksli oraliq o'qish:
+# WHERE owner_id = ? ORDER BY created_at DESC, id DESC (feed_owner_time_idx).
+
+FANOUT_BATCH = 1000
+BACKFILL_LIMIT = 200  # Yangi sync'da muallifning nechta so'nggi loyihasi lentaga qo'shiladi
+FEED_PAGE_SIZE = 24
+
+
+def _entries(owner_ids, project):
+    return [
+        FeedEntry(owner_id=owner_id, project_id=project.pk, author_id=project.author_id,
+                  created_at=project.created_at)
+        for owner_id in owner_ids
+    ]
+
+
+def fan_out_project(project):
+    """Loyihani muallif kuzatuvchilarining lentalariga yozadi. Qaytaradi: yozilgan qatorlar soni."""
+    follower_ids = Sync.objects.filter(following__user_id=project.author_id).values_list(
+        'follower__user_id', flat=True
+    )
+    total, batch = 0, []
+    for owner_id in follower_ids.iterator(chunk_size=FANOUT_BATCH):
+        batch.append(owner_id)
+        if len(batch) >= FANOUT_BATCH:
+            FeedEntry.objects.bulk_create(_entries(batch, project), ignore_conflicts=True)
+            total, batch = total + len(batch), []
+    if batch:
+        FeedEntry.objects.bulk_create(_entries(batch, project), ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+def backfill_feed(owner_id, author_id, limit=BACKFILL_LIMIT):
+    """Yangi kuzatilgan muallifning so'nggi loyihalarini lentaga qo'shadi."""
+    projects = Project.objects.filter(author_id=author_id).order_by('-created_at')[:limit]
+    FeedEntry.objects.bulk_create(
+        [FeedEntry(owner_id=owner_id, project_id=pk, author_id=author_id, created_at=created_at)
+         for pk, created_at in projects.values_list('pk', 'created_at')],
+        ignore_conflicts=True,
+    )
+
+
+def prune_feed(owner_id, author_id):
+    return FeedEntry.objects.filter(owner_id=owner_id, author_id=author_id).delete()[0]
+
+
+def get_feed_page(user, cursor=None, page_size=FEED_PAGE_SIZE):
+    """Lenta sahifasi: object_list - Project obyektlari (muzlatilganlar o'qishda tashlab ketiladi)."""
+    queryset = FeedEntry.objects.filter(owner=user, project__is_frozen=False).select_related(
+        'project__author__profile'
+    )
+    page = KeysetPaginator(queryset, NEWEST_KEYS, page_size).get_page(cursor)
+    page.object_list = [entry.project for entry in page.object_list]
+    return page
@@ -0,0 +1,201 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+# ==========================================
+# TASHQI HTTP SO'ROVLAR (Telegram, Judge0, Cloudinary, VirusTotal)
+# ==========================================
+# Har bir tashqi servis uchun bitta requests.Session: host bo'yicha keep-alive ulanishlar puli
+# (har so'rovda yangi TCP+TLS handshake yo'q). Ustiga:
+#   timeout    - har doim bor (connect, read); chaqiruvchi alohida bermasa servis sozlamasidan
+#   retry      - ulanish xatosi / 429 / 5xx da eksponensial backoff + jitter bilan.
+#                GET har doim, boshqa metodlar faqat so'rov yuborilmagan bo'lsa (ConnectTimeout)
+#   circuit    - ketma-ket `threshold` ta muvaffaqiyatsiz chaqiruvdan keyin servis `reset` soniya
+#   breaker      "ochiq": so'rov yuborilmaydi, darhol CircuitOpenError (gunicorn workeri kutib qolmaydi).
+#                Muddat o'tgach bitta sinov so'rovi o'tkaziladi (half-open)
+# Host bo'yicha so'rovlar, xatolar, qayta urinishlar va kechikish hisoblanadi (outbound_stats).
+# Gemini o'zining SDK (google-genai) klientidan foydalanadi - bu yerga kirmaydi.
+
+# timeout - (connect, read); retries - qayta urinishlar; threshold/reset - breaker chegarasi va ochiq turadigan soniya
+DEPENDENCIES = {
+    'telegram': {'timeout': (3.05, 5), 'retries': 1, 'threshold': 5, 'reset': 30},
+    'judge0': {'timeout': (3.05, 10), 'retries': 1, 'threshold': 5, 'reset': 30},
+    'cloudinary': {'timeout': (3.05, 10), 'retries': 2, 'threshold': 8, 'reset': 20},
+    'virustotal': {'timeout': (5, 30), 'retries': 1, 'threshold': 5, 'reset': 60},
+}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 0.25
+BACKOFF_MAX_SECONDS = 4
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Servis vaqtincha "o'chirilgan" (breaker ochiq) - so'rov yuborilmadi.
+    ConnectionError dan meros: mavjud `except requests.RequestException` bloklari uni ham ushlaydi."""
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold, reset_seconds):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True  # Faqat bitta sinov so'rovi
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state, self.failures, self._probing = self.CLOSED, 0, False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class _HostStats:
+    __slots__ = ('requests', 'errors', 'retries', 'short_circuited', 'ms_total', 'ms_max')
+
+    def __init__(self):
+        self.requests = self.errors = self.retries = self.short_circuited = 0
+        self.ms_total = self.ms_max = 0.0
+
+
+class Dependency:
+    """Bitta tashqi servis: Session (ulanishlar puli) + timeout + retry + circuit breaker."""
+
+    def __init__(self, name, timeout=(3.05, 10), retries=1, threshold=5, reset=30):
+        self.name = name
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = CircuitBreaker(threshold, reset)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_setting('OUTBOUND_POOL_MAXSIZE', 10),
+                              max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._stats = {}  # host -> _HostStats
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        host = urlsplit(url).netloc
+        if not self.breaker.allow():
+            self._record(host, short_circuited=True)
+            raise CircuitOpenError(f"{self.name} vaqtincha ishlamayapti (circuit breaker ochiq)")
+        kwargs.setdefault('timeout', self.timeout)
+        # Fayl-oqim tanasi (VirusTotal upload) qayta yuborilmaydi - u allaqachon o'qilgan
+        retries = 0 if hasattr(kwargs.get('data'), 'read') else self.retries
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                self._record(host, ms=(time.perf_counter() - started) * 1000, error=True)
+                resend_safe = method == 'GET' or isinstance(e, requests.exceptions.ConnectTimeout)
+                if attempt < retries and resend_safe:
+                    attempt += 1
+                    self._backoff(host, attempt)
+                    continue
+                self.breaker.record_failure()
+                raise
+            failed = response.status_code >= 500
+            self._record(host, ms=(time.perf_counter() - started) * 1000, error=failed)
+            if response.status_code in RETRY_STATUSES and attempt < retries and method == 'GET':
+                response.close()
+                attempt += 1
+                self._backoff(host, attempt)
+                continue
+            # 4xx - servis ishlayapti (xato so'rovda), breaker uchun muvaffaqiyat
+            if failed:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+
+    def _backoff(self, host, attempt):
+        self._record(host, retry=True)
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), BACKOFF_MAX_SECONDS)
+        time.sleep(delay * random.uniform(0.5, 1.5))
+
+    # --- Statistika ---
+    def _record(self, host, ms=None, error=False, retry=False, short_circuited=False):
+        with self._lock:
+            s = self._stats.get(host)
+            if s is None:
+                s = self._stats[host] = _HostStats()
+            if ms is not None:
+                s.requests += 1
+                s.ms_total += ms
+                s.ms_max = max(s.ms_max, ms)
+            s.errors += error
+            s.retries += retry
+            s.short_circuited += short_circuited
+
+    def stats(self):
+        with self._lock:
+            hosts = {
+                host: {
+                    'requests': s.requests,
+                    'errors': s.errors,
+                    'retries': s.retries,
+                    'short_circuited': s.short_circuited,
+                    'avg_ms': round(s.ms_total / s.requests, 1) if s.requests else 0.0,
+                    'max_ms': round(s.ms_max, 1),
+                }
+                for host, s in self._stats.items()
+            }
+        return {'state': self.breaker.state, 'failures': self.breaker.failures, 'hosts': hosts}
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """Servis bo'yicha jarayonda bitta Dependency (ulanishlar puli barcha oqimlar uchun umumiy)."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = Dependency(name, **DEPENDENCIES[name])
+    return client
+
+
+def outbound_stats():
+    """stats sahifasi va API uchun: servis -> breaker holati va host bo'yicha hisoblagichlar."""
+    return {name: client.stats() for name, client in sorted(_clients.items())}
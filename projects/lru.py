@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# ==========================================
+# XOTIRADAGI LRU + TTL KESH (jarayon ichida)
+# ==========================================
+# Yozuvlar soni (max_entries) va taxminiy hajmi (max_bytes) bilan cheklangan; har yozuv `ttl` soniya yashaydi.
+# Chegaradan oshganda eng uzoq ishlatilmagan yozuvlar chiqariladi. compiler_cache va ai_assistant ishlatadi.
+
+
+class LRUCache:
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (qiymat, muddat (monotonic), hajm)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Qiymat yoki None (yo'q yoki muddati o'tgan)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size=None):
+        """Saqlaydi; bitta yozuv butun keshning 1/8 qismidan katta bo'lsa saqlamaydi. Qaytaradi: saqlandimi."""
+        size = size if size is not None else len(value.encode())
+        if size > self.max_bytes // 8:
+            return False
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+        return True
+
+    def _drop(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size_bytes(self):
+        return self._bytes
@@ -0,0 +1,93 @@
+# projects/management/commands/bench_admission.py
+import logging
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from projects import admission, compiler
+
+
+class Command(BaseCommand):
+    help = ("Kompilyator so'rovlari portlashi paytida home/trending kechikishini o'lchaydi: "
+            "qabul nazoratisiz va u bilan (admission.py)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help="Worker oqimlari (gunicorn --threads kabi)")
+        parser.add_argument('--burst', type=int, default=24, help="Bir vaqtda kod yuborayotgan mijozlar")
+        parser.add_argument('--latency', type=float, default=1.5, help="Sekin kompilyator javobi, soniya")
+        parser.add_argument('--duration', type=float, default=6.0)
+
+    def handle(self, *args, **options):
+        self.options = options
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)  # Har bir 4xx/5xx uchun ogohlantirish
+        cheap_urls = [reverse('home'), reverse('trending')]
+        for url in cheap_urls:
+            Client().get(url)  # Shablonlar va so'rovlar keshi isinsin
+
+        self.stdout.write(f"{options['threads']} oqim, {options['burst']} mijoz, "
+                          f"kompilyator {options['latency']} s, {options['duration']} s")
+        self._phase("portlashsiz", cheap_urls, burst=0, enabled=True)
+        self._phase("nazoratsiz", cheap_urls, burst=options['burst'], enabled=False)
+        self._phase("qabul nazorati", cheap_urls, burst=options['burst'], enabled=True)
+
+    def _slow_submit(self, *args, **kwargs):
+        # Judge0/Gemini sekin javob berayotgandek: worker oqimi band turadi
+        time.sleep(self.options['latency'])
+        raise compiler.CompilerError("bench")
+
+    def _phase(self, label, cheap_urls, burst, enabled):
+        admission._gates.clear()
+        workers = ThreadPoolExecutor(max_workers=self.options['threads'])
+        stop = time.monotonic() + self.options['duration']
+        latencies, statuses, lock = [], Counter(), threading.Lock()
+
+        def call(method, url, ip, data=None):
+            try:
+                client = Client(REMOTE_ADDR=ip)
+                return (client.post(url, data) if method == 'post' else client.get(url)).status_code
+            finally:
+                close_old_connections()
+
+        def burster(ip):
+            while time.monotonic() < stop:
+                status = workers.submit(call, 'post', reverse('compiler_submit'), ip,
+                                        {'code': 'print(1)', 'language': 'python'}).result()
+                with lock:
+                    statuses[status] += 1
+                if status in (429, 503):
+                    time.sleep(0.1)  # Brauzer Retry-After ni kutadi; bu yerda qisqa pauza yetarli
+
+        def prober():
+            while time.monotonic() < stop:
+                for url in cheap_urls:
+                    started = time.perf_counter()
+                    workers.submit(call, 'get', url, '10.0.0.1').result()
+                    with lock:
+                        latencies.append((time.perf_counter() - started) * 1000)
+
+        with override_settings(ADMISSION_ENABLED=enabled), \
+                mock.patch.object(compiler, 'submit', self._slow_submit):
+            threads = [threading.Thread(target=burster, args=(f'10.1.0.{i}',)) for i in range(burst)]
+            threads.append(threading.Thread(target=prober))
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        workers.shutdown()
+
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        rejected = statuses[429] + statuses[503]
+        self.stdout.write(
+            f"{label:>15}: home/trending p50={statistics.median(latencies):.0f}ms p95={p95:.0f}ms "
+            f"max={latencies[-1]:.0f}ms  kompilyator: bajarildi={sum(statuses.values()) - rejected} "
+            f"rad etildi={rejected} (503={statuses[503]}, 429={statuses[429]})"
+        )
@@ -0,0 +1,46 @@
+# projects/management/commands/bench_compiler.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from projects import sandbox
+
+SNIPPETS = {
+    'python': ('n = int(input())\nprint(sum(i * i for i in range(n)))\n', '1000'),
+    'javascript': ('const n = Number(require("fs").readFileSync(0, "utf8"));\n'
+                   'let s = 0; for (let i = 0; i < n; i++) s += i * i;\nconsole.log(s);\n', '1000'),
+}
+
+
+class Command(BaseCommand):
+    help = "Lokal sandbox (sandbox.py) kechikishini o'lchaydi: p50/p95, oldindan ishga tushirilgan pul bilan"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--language', choices=sorted(SNIPPETS), default='python')
+        parser.add_argument('--pause', type=float, default=0.05,
+                            help="Ishga tushirishlar orasidagi pauza (pul to'lishi uchun), soniya")
+
+    def handle(self, *args, **options):
+        if not sandbox.is_available():
+            raise CommandError("Lokal sandbox bu serverda ishlamaydi (Linux va `unshare -rn` kerak).")
+        language = options['language']
+        code, stdin = SNIPPETS[language]
+        sandbox.get_pool(language)
+        time.sleep(1.0)  # Birinchi jarayonlar tayyor bo'lsin
+
+        timings, failures = [], 0
+        for _ in range(options['runs']):
+            started = time.perf_counter()
+            result = sandbox.execute(language, code, stdin)
+            timings.append((time.perf_counter() - started) * 1000)
+            failures += result.exit_code != 0
+            time.sleep(options['pause'])
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f"Til: {language}, ishga tushirishlar: {len(timings)}, xatolar: {failures}")
+        self.stdout.write(self.style.SUCCESS(
+            f"p50: {statistics.median(timings):.1f} ms, p95: {p95:.1f} ms, max: {timings[-1]:.1f} ms"
+        ))
@@ -0,0 +1,72 @@
+# projects/management/commands/bench_pagination.py
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.models import Project, generate_youtube_id
+from projects.pagination import KeysetPaginator, POPULAR_KEYS, NEWEST_KEYS, DEFAULT_PAGE_SIZE
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Keyset va OFFSET paginatsiya tezligini 1k/10k/100k loyihada solishtiradi (ma'lumotlar saqlanmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s]
+        repeat = options['repeat']
+
+        self.stdout.write(f"{'loyihalar':>10} {'kalit':>12} {'1-sahifa':>10} {'oxirgi(keyset)':>15} {'oxirgi(offset)':>15}")
+        for size in sizes:
+            try:
+                with transaction.atomic():
+                    self._seed(size)
+                    for keys in (POPULAR_KEYS, NEWEST_KEYS):
+                        self._measure(size, keys, repeat)
+                    raise _Rollback()
+            except _Rollback:
+                pass
+
+    def _seed(self, size):
+        author = User.objects.create_user(username=f'bench_{generate_youtube_id(6)}')
+        batch = [
+            Project(
+                author=author, title=f'Bench loyiha {i}', slug=generate_youtube_id(11),
+                description='benchmark', image='project_thumbnails/bench.jpg',
+                youtube_link='https://youtu.be/dQw4w9WgXcQ', views=(i * 7919) % 5000,
+            )
+            for i in range(size)
+        ]
+        Project.objects.bulk_create(batch, batch_size=2000)
+
+    def _timed(self, fn, repeat):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def _measure(self, size, keys, repeat):
+        queryset = Project.objects.filter(is_frozen=False)
+        paginator = KeysetPaginator(queryset, keys, DEFAULT_PAGE_SIZE)
+
+        # Oxirgi sahifa oldidagi qatorni cursor sifatida olamiz
+        offset = max(size - DEFAULT_PAGE_SIZE, 0)
+        anchor = queryset.order_by(*keys)[offset - 1] if offset else None
+        cursor = paginator.encode_cursor(anchor) if anchor else None
+
+        first_ms = self._timed(lambda: paginator.get_page(), repeat)
+        keyset_ms = self._timed(lambda: paginator.get_page(cursor), repeat)
+        offset_ms = self._timed(
+            lambda: list(queryset.order_by(*keys)[offset:offset + DEFAULT_PAGE_SIZE]), repeat
+        )
+        self.stdout.write(
+            f"{size:>10} {keys[0]:>12} {first_ms:>8.2f}ms {keyset_ms:>13.2f}ms {offset_ms:>13.2f}ms"
+        )
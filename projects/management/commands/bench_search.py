@@ -0,0 +1,75 @@
+# projects/management/commands/bench_search.py
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.models import Project, generate_youtube_id
+from projects.search import get_search_backend, LegacySearchBackend, SEARCH_KEYS
+
+# Asosiy lug'at + sintetik "uzun dum" so'zlar: real katalogdagidek kam uchraydigan so'zlar ko'p bo'ladi
+WORDS = (
+    'python django flask telegram bot sayt mobil ilova flutter dart oyin unity java spring '
+    'react vue node express api rest parser scraper chat admin panel dokon kassa ombor '
+    'maktab test quiz kalkulyator valyuta kurs musiqa video player kamera model '
+    'neyron tarmoq tasvir matn tarjimon lugat xarita taksi yetkazish buyurtma kitob kutubxona'
+).split()
+FILLER = [f'soz{i}' for i in range(20000)]
+QUERIES = ('telegram bot', 'django', 'flutter mobil ilova', 'neyron tarmoq', 'yoqotilgan_soz')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "50k loyihali korpusda icontains va FTS (tsvector/FTS5) qidiruvini solishtiradi (ma'lumotlar saqlanmaydi)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=50000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        size, repeat = options['size'], options['repeat']
+        backend = get_search_backend()
+        try:
+            with transaction.atomic():
+                self._seed(size, backend)
+                self.stdout.write(f"{size} ta loyiha, backend: {type(backend).__name__}")
+                self.stdout.write(f"{'so`rov':>22} {'icontains':>12} {'FTS':>10} {'natija':>8}")
+                for query in QUERIES:
+                    legacy_ms = self._timed(LegacySearchBackend(), query, repeat)
+                    fts_ms = self._timed(backend, query, repeat)
+                    found = backend.search(Project.objects.filter(is_frozen=False), query).count()
+                    self.stdout.write(f"{query:>22} {legacy_ms:>10.2f}ms {fts_ms:>8.2f}ms {found:>8}")
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _seed(self, size, backend):
+        rnd = random.Random(42)
+        author = User.objects.create_user(username=f'bench_{generate_youtube_id(6)}')
+        batch = [
+            Project(
+                author=author, slug=generate_youtube_id(11),
+                title=' '.join(rnd.sample(WORDS, 3)).title(),
+                description=' '.join(rnd.sample(WORDS, 4) + rnd.choices(FILLER, k=40)),
+                image='project_thumbnails/bench.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+                views=rnd.randint(0, 5000),
+            )
+            for _ in range(size)
+        ]
+        created = Project.objects.bulk_create(batch, batch_size=2000)
+        # bulk_create signal yubormaydi, shuning uchun indeksni o'zimiz to'ldiramiz
+        for project in created:
+            project.author = author
+        backend.index_projects(created)
+
+    def _timed(self, backend, query, repeat):
+        queryset = Project.objects.filter(is_frozen=False)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            list(backend.search(queryset, query).order_by(*SEARCH_KEYS)[:24])
+        return (time.perf_counter() - start) / repeat * 1000
@@ -0,0 +1,84 @@
+# projects/management/commands/bench_view_counter.py
+import statistics
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.db.models import F
+
+from projects.models import Project, generate_youtube_id
+from projects.view_counter import ViewCounterBuffer
+
+
+class Command(BaseCommand):
+    help = "Bitta slug'ga parallel ko'rishlarda to'g'ridan-to'g'ri UPDATE va yig'ib yozish (view_counter) ni solishtiradi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--hits', type=int, default=200, help="Har bir oqim uchun ko'rishlar soni")
+
+    def handle(self, *args, **options):
+        threads, hits = options['threads'], options['hits']
+        author = User.objects.create_user(username=f'bench_{generate_youtube_id(6)}')
+        project = Project.objects.create(
+            author=author, title='Bench views', description='benchmark',
+            image='project_thumbnails/bench.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        try:
+            self.stdout.write(f"{threads} oqim x {hits} ko'rish, slug={project.slug}")
+            self._report('UPDATE + refresh', project, threads, hits, self._direct_hit)
+
+            buffer = ViewCounterBuffer()
+            self._report('view_counter', project, threads, hits,
+                         lambda p: (buffer.record(p.pk), p.views + buffer.pending(p.pk)),
+                         finish=buffer.flush)
+        finally:
+            project.delete()
+            author.delete()
+
+    @staticmethod
+    def _direct_hit(project):
+        Project.objects.filter(slug=project.slug).update(views=F('views') + 1)
+        project.refresh_from_db(fields=['views'])
+
+    def _report(self, label, project, threads, hits, hit, finish=None):
+        Project.objects.filter(pk=project.pk).update(views=0)
+        latencies, errors = [], []
+        lock = threading.Lock()
+
+        def worker():
+            local = Project.objects.get(pk=project.pk)
+            samples = []
+            try:
+                for _ in range(hits):
+                    start = time.perf_counter()
+                    try:
+                        hit(local)
+                    except Exception as e:
+                        with lock:
+                            errors.append(e)
+                    samples.append((time.perf_counter() - start) * 1000)
+            finally:
+                close_old_connections()
+                with lock:
+                    latencies.extend(samples)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+        if finish:
+            finish()
+        elapsed = time.perf_counter() - started
+
+        stored = Project.objects.values_list('views', flat=True).get(pk=project.pk)
+        latencies.sort()
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f"{label:>18}: {len(latencies) / elapsed:>9.0f} req/s  p50={statistics.median(latencies):.3f}ms  "
+            f"p99={p99:.3f}ms  xatolar={len(errors)}  bazada={stored}/{threads * hits}"
+        )
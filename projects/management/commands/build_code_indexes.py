@@ -0,0 +1,33 @@
+# projects/management/commands/build_code_indexes.py
+from django.core.management.base import BaseCommand
+
+from projects.code_index import build_project_index
+from projects.models import Project
+from projects.scan_pipeline import ScanArtifact
+from projects.source_cache import get_source_cache
+
+
+class Command(BaseCommand):
+    help = "AI yordamchi uchun kod indeksi (code_index) yo'q loyihalar uchun indeks quradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Mavjud indekslarni ham qayta qurish")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(source_code='').exclude(source_code__isnull=True)
+        if not options['all']:
+            projects = projects.filter(code_index__isnull=True)
+
+        done = empty = failed = 0
+        for project in projects.only('pk', 'source_code').iterator():
+            path = get_source_cache().get_path(project.source_code)
+            if not path:
+                failed += 1
+                continue
+            if build_project_index(project, ScanArtifact(path, project.source_code.name)):
+                done += 1
+            else:
+                empty += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Indeks qurildi: {done} ta, kod fayli yo'q: {empty} ta, fayl o'qilmadi: {failed} ta."
+        ))
@@ -0,0 +1,28 @@
+# projects/management/commands/build_source_manifests.py
+from django.core.management.base import BaseCommand
+
+from projects.archive_manifest import ARCHIVE_EXTENSIONS, extract_project_manifest
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Arxiv (zip/tar/gz/7z/rar) yuklangan, lekin manifesti yo'q loyihalar uchun manifest yaratadi."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="Mavjud manifestlarni ham qayta yaratish")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.exclude(source_code='').exclude(source_code__isnull=True)
+        if not options['all']:
+            projects = projects.filter(source_manifest__isnull=True)
+
+        done = failed = 0
+        for project in projects.only('pk', 'source_code').iterator():
+            if not project.source_code.name.lower().endswith(ARCHIVE_EXTENSIONS):
+                continue
+            manifest = extract_project_manifest(project)
+            if manifest and not manifest.get('error'):
+                done += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Manifest yaratildi: {done} ta, xato/qo'llab-quvvatlanmaydi: {failed} ta."))
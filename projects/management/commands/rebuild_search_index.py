@@ -0,0 +1,15 @@
+# projects/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from projects.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Qidiruv indeksini (PostgreSQL tsvector yoki SQLite FTS5) barcha loyihalar uchun qayta quradi"
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Qidiruv indeksi qayta qurildi ({type(backend).__name__})."))
@@ -0,0 +1,57 @@
+# projects/management/commands/recount_project_stats.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Sum, OuterRef, Subquery, IntegerField, Q, F
+from django.db.models.functions import Coalesce
+
+from projects.models import Project, Comment, Review
+
+
+def _count_of(model, **filters):
+    """Har bir loyiha uchun bog'liq yozuvlar sonini beruvchi subquery."""
+    rows = model.objects.filter(project_id=OuterRef('pk'), **filters).values('project_id')
+    return Coalesce(Subquery(rows.annotate(n=Count('pk')).values('n'), output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = "Project hisoblagichlarini (likes/saves/buyers/comments/rating) bazadagi haqiqiy qiymatlar bilan tekislaydi"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        review_sum = Review.objects.filter(project_id=OuterRef('pk')).values('project_id') \
+            .annotate(s=Sum('rating')).values('s')
+
+        actual = Project.objects.annotate(
+            real_likes=_count_of(Project.likes.through),
+            real_saves=_count_of(Project.saved_by.through),
+            real_buyers=_count_of(Project.buyers.through),
+            real_comments=_count_of(Comment),
+            real_rating_count=_count_of(Review),
+            real_rating_sum=Coalesce(Subquery(review_sum, output_field=IntegerField()), 0),
+        )
+        # Faqat drift bo'lgan loyihalarni olamiz
+        drifted = actual.exclude(
+            Q(likes_count=F('real_likes')) & Q(saves_count=F('real_saves')) &
+            Q(buyers_count=F('real_buyers')) & Q(comments_count=F('real_comments')) &
+            Q(rating_count=F('real_rating_count')) & Q(rating_sum=F('real_rating_sum'))
+        ).values_list(
+            'pk', 'real_likes', 'real_saves', 'real_buyers', 'real_comments', 'real_rating_sum', 'real_rating_count'
+        )
+
+        # Counter qiymatlari COUNTER_FIELDS tartibida keladi
+        batch = [Project(pk=row[0], **dict(zip(Project.COUNTER_FIELDS, row[1:]))) for row in drifted]
+        fixed = 0
+        for start in range(0, len(batch), batch_size):
+            fixed += self._flush(batch[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Tayyor: {fixed} ta loyiha hisoblagichi tuzatildi."))
+
+    def _flush(self, batch):
+        if not batch:
+            return 0
+        with transaction.atomic():
+            Project.objects.bulk_update(batch, Project.COUNTER_FIELDS)
+        return len(batch)
@@ -0,0 +1,27 @@
+# projects/management/commands/run_scan_worker.py
+from django.core.management.base import BaseCommand
+
+from projects.scan_queue import ScanWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Xavfsizlik skanlari navbatini (ScanJob) bajaradi. Doimiy jarayon sifatida ishga tushiring; "
+        "--once bilan navbat bo'shaguncha ishlab chiqadi (cron uchun)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Parallel skanlar soni (standart: SCAN_WORKER_CONCURRENCY)")
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shagach chiqish")
+        parser.add_argument('--max-jobs', type=int, default=None, help="Shuncha ish bajargach chiqish")
+
+    def handle(self, *args, **options):
+        worker = ScanWorker(concurrency=options['concurrency'], poll_interval=options['poll_interval'],
+                            stdout=self.stdout)
+        if not (options['once'] or options['max_jobs']):
+            worker.install_signal_handlers()
+        self.stdout.write(f"Skan worker {worker.worker_id} ishga tushdi (concurrency={worker.concurrency})")
+        processed = worker.run(once=options['once'], max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f"Skan worker to'xtadi: {processed} ta ish bajarildi."))
@@ -0,0 +1,29 @@
+# projects/management/commands/run_telegram_dispatcher.py
+from django.core.management.base import BaseCommand
+
+from projects.telegram_outbox import TelegramDispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        "Telegram xabarlari navbatini (TelegramMessage) Telegram cheklovlariga rioya qilib yuboradi. "
+        "Doimiy jarayon sifatida ishga tushiring; --once bilan navbat bo'shaguncha ishlab chiqadi (cron uchun)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Bitta partiyadagi xabarlar (standart: TELEGRAM_OUTBOX_BATCH)")
+        parser.add_argument('--concurrency', type=int, default=None,
+                            help="Parallel chatlar soni (standart: TELEGRAM_DISPATCH_CONCURRENCY)")
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true', help="Navbat bo'shagach chiqish")
+
+    def handle(self, *args, **options):
+        dispatcher = TelegramDispatcher(batch_size=options['batch_size'], concurrency=options['concurrency'],
+                                        poll_interval=options['poll_interval'], stdout=self.stdout)
+        if not options['once']:
+            dispatcher.install_signal_handlers()
+        self.stdout.write(f"Telegram dispatcher {dispatcher.worker_id} ishga tushdi "
+                          f"(partiya={dispatcher.batch_size}, concurrency={dispatcher.concurrency})")
+        processed = dispatcher.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f"Telegram dispatcher to'xtadi: {processed} ta xabar olindi."))
@@ -0,0 +1,14 @@
+# projects/management/commands/update_trending.py
+from django.core.management.base import BaseCommand
+
+from projects.trending import update_trending_scores
+
+
+class Command(BaseCommand):
+    help = "Trending ballarini so'nggi faollik (ko'rish, like, xarid, izoh) asosida qayta hisoblaydi. Cron orqali har 10-15 daqiqada ishga tushiring."
+
+    def handle(self, *args, **options):
+        updated, zeroed, pruned = update_trending_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Trending yangilandi: {updated} ta loyiha, {zeroed} ta nolga tushdi, {pruned} ta eski bucket o'chirildi."
+        ))
@@ -9,6 +9,10 @@ class UpdateLastActivityMiddleware:
     def __call__(self, request):
         response = self.get_response(request)
 
+        # 0. Yengil endpointlar (masalan, search_suggest) o'zini chiqarib tashlaydi
+        if getattr(request, 'skip_last_activity', False):
+            return response
+
         # 1. Faqat LOGIN QILGANLARNI tekshiramiz
         if request.user.is_authenticated:
             # 2. Bazaga so'rov yuborib, vaqtni yangilaymiz
@@ -0,0 +1,57 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:31
+
+import django.contrib.postgres.search
+from django.db import migrations, OperationalError
+
+
+# Bazaga qarab: PostgreSQL -> GIN indeks + vektorlarni to'ldirish, SQLite -> FTS5 soya jadvali
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS project_search_vector_gin ON projects_project USING gin (search_vector)"
+        )
+        schema_editor.execute("""
+            UPDATE projects_project p SET search_vector =
+                setweight(to_tsvector('simple', coalesce(p.title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(p.description, '')), 'B') ||
+                setweight(to_tsvector('simple', coalesce(u.username, '')), 'C')
+            FROM auth_user u WHERE u.id = p.author_id
+        """)
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS projects_project_fts "
+                "USING fts5(title, description, author, tokenize='unicode61 remove_diacritics 2')"
+            )
+        except OperationalError:
+            return  # FTS5 yo'q: search.py icontains zaxira backendiga o'tadi
+        schema_editor.execute("""
+            INSERT INTO projects_project_fts (rowid, title, description, author)
+            SELECT p.id, p.title, p.description, u.username
+            FROM projects_project p JOIN auth_user u ON u.id = p.author_id
+        """)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS project_search_vector_gin")
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS projects_project_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_project_trending_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Mavjud Sync'lar uchun lentalarni to'ldirish (feed.backfill_feed bilan bir xil: har muallifdan 200 ta)
+def backfill_feeds(apps, schema_editor):
+    Sync = apps.get_model('projects', 'Sync')
+    Project = apps.get_model('projects', 'Project')
+    FeedEntry = apps.get_model('projects', 'FeedEntry')
+    for owner_id, author_id in Sync.objects.values_list('follower__user_id', 'following__user_id').iterator():
+        projects = Project.objects.filter(author_id=author_id).order_by('-created_at')[:200]
+        FeedEntry.objects.bulk_create(
+            [FeedEntry(owner_id=owner_id, project_id=pk, author_id=author_id, created_at=created_at)
+             for pk, created_at in projects.values_list('pk', 'created_at')],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_project_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner', '-created_at', '-id'], name='feed_owner_time_idx'), models.Index(fields=['owner', 'author'], name='feed_owner_author_idx')],
+                'unique_together': {('owner', 'project')},
+            },
+        ),
+        migrations.RunPython(backfill_feeds, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0007_feed_entries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='source_manifest',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.4 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_scan_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('security_status', models.CharField(max_length=20)),
+                ('ai_analysis', models.TextField(blank=True)),
+                ('virustotal_link', models.URLField(blank=True, null=True)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_scan_verdicts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanFinding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=500)),
+                ('size', models.BigIntegerField(default=0)),
+                ('verdict', models.CharField(choices=[('danger', 'Xavfli'), ('unsure', 'Shubhali')], max_length=10)),
+                ('reasons', models.JSONField(blank=True, default=list)),
+                ('ai_result', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_findings', to='projects.project')),
+            ],
+            options={
+                'ordering': ['verdict', 'path'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0012_compiler_runs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='compilerrun',
+            name='cache_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.4 on 2026-10-18 12:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0013_compiler_run_cache_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CodeIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('data', models.BinaryField()),
+                ('chunk_count', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='code_index', to='projects.project')),
+            ],
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.4 on 2026-10-18 13:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0015_telegram_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -4,10 +4,13 @@ import re
 import string
 from django.urls import reverse
 from cloudinary_storage.storage import RawMediaCloudinaryStorage
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models, IntegrityError  # <--- IntegrityError qo'shildi
-from django.db.models.signals import post_save
+from django.db import models, transaction, IntegrityError  # <--- IntegrityError qo'shildi
+from django.db.models import F, Count, Case, When, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_init, post_save, pre_save, post_delete, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
@@ -105,11 +108,47 @@ class Project(models.Model):
     reports_count = models.PositiveIntegerField(default=0)
     is_frozen = models.BooleanField(default=False)
 
+    # --- Denormalizatsiya qilingan hisoblagichlar (signallar orqali F() bilan yangilanadi) ---
+    likes_count = models.PositiveIntegerField(default=0)
+    saves_count = models.PositiveIntegerField(default=0)
+    buyers_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)
+
+    # --- Trending: update_trending buyrug'i hisoblaydi (vaqt o'tishi bilan so'nuvchi ball) ---
+    trending_score = models.FloatField(default=0)
+
+    # --- Qidiruv: PostgreSQL'da vaznli tsvector (GIN indeks bilan), SQLite'da FTS5 soya jadvali ishlatiladi ---
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    # --- Arxiv manifesti: fayllar daraxti, tillar, asosiy fayllar boshi (archive_manifest.py) ---
+    source_manifest = models.JSONField(null=True, blank=True, editable=False)
+
+    # Oddiy save() bu maydonlarni eski qiymat bilan ustidan yozib yubormasligi kerak
+    COUNTER_FIELDS = ('likes_count', 'saves_count', 'buyers_count', 'comments_count', 'rating_sum', 'rating_count')
+    SAVE_EXCLUDED_FIELDS = COUNTER_FIELDS + ('views', 'trending_score', 'search_vector', 'source_manifest')  # alohida yoziladi
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset paginatsiya uchun: (views, id) va (created_at, id) bo'yicha indeks skan
+            models.Index(fields=['-views', '-id'], name='project_popular_idx',
+                         condition=models.Q(is_frozen=False)),
+            models.Index(fields=['-created_at', '-id'], name='project_newest_idx',
+                         condition=models.Q(is_frozen=False)),
+            models.Index(fields=['-trending_score', '-views', '-id'], name='project_trending_idx',
+                         condition=models.Q(is_frozen=False)),
+        ]
 
     # --- TO'G'IRLANDI: Xavfsiz Slug generatori ---
     def save(self, *args, **kwargs):
+        # pk=None - nusxa (obj.pk = None; obj.save()): INSERT bo'ladi, update_fields berilmaydi
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.SAVE_EXCLUDED_FIELDS
+            ]
         if not self.slug:
             self.slug = generate_youtube_id(11)
             while True:
@@ -128,6 +167,20 @@ class Project(models.Model):
         match = re.search(regex, self.youtube_link)
         return match.group(1) if match else None
 
+    def has_full_access(self, user):
+        """To'liq kod (manba, manifest preview'lari): bepul loyiha, muallif yoki xaridor."""
+        if not self.price:
+            return True
+        if user is None or not user.is_authenticated:
+            return False
+        return user.pk == self.author_id or self.buyers.filter(pk=user.pk).exists()
+
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return 0
+        return round(self.rating_sum / self.rating_count, 1)
+
     def __str__(self):
         return self.title
 
@@ -160,6 +213,21 @@ class Sync(models.Model):
         unique_together = ('follower', 'following')
 
 
+class FeedEntry(models.Model):
+    """Kuzatuvchi lentasi (fan-out-on-write): har bir yangi loyiha uning Sync kuzatuvchilariga oldindan yoziladi."""
+    owner = models.ForeignKey(User, related_name='feed_entries', on_delete=models.CASCADE)
+    project = models.ForeignKey(Project, related_name='feed_entries', on_delete=models.CASCADE)
+    author = models.ForeignKey(User, related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()  # project.created_at nusxasi (JOIN'siz saralash uchun)
+
+    class Meta:
+        unique_together = ('owner', 'project')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-id'], name='feed_owner_time_idx'),
+            models.Index(fields=['owner', 'author'], name='feed_owner_author_idx'),
+        ]
+
+
 class CommunityMessage(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     body = models.TextField()
@@ -276,4 +344,395 @@ class PrivateMessage(models.Model):
         return f"{self.sender} -> {self.receiver}"
 
     class Meta:
-        ordering = ['created_at']
\ No newline at end of file
+        ordering = ['created_at']
+
+
+# ==========================================
+# 6. HISOBLAGICHLAR (likes/saves/buyers/comments/rating)
+# ==========================================
+# Har bir yozish amali bilan bitta tranzaksiyada F() orqali yangilanadi.
+# Drift bo'lsa: python manage.py recount_project_stats
+
+M2M_COUNTERS = {
+    Project.likes.through: 'likes_count',
+    Project.saved_by.through: 'saves_count',
+    Project.buyers.through: 'buyers_count',
+}
+
+
+def bump_project_counters(project_id, **deltas):
+    """Project hisoblagichlarini F() bilan o'zgartiradi (manfiyga tushmaydi)."""
+    changes = {}
+    for field, delta in deltas.items():
+        if delta > 0:
+            changes[field] = F(field) + delta
+        elif delta < 0:
+            changes[field] = Greatest(F(field) - (-delta), 0)
+    if changes:
+        Project.objects.filter(pk=project_id).update(**changes)
+
+
+@receiver(m2m_changed)
+def update_m2m_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    field = M2M_COUNTERS.get(sender)
+    if field is None:
+        return
+
+    if action == 'post_add' and pk_set:
+        # Django pk_set ga faqat haqiqatan qo'shilgan yozuvlarni beradi
+        if reverse:
+            Project.objects.filter(pk__in=pk_set).update(**{field: F(field) + 1})
+        else:
+            bump_project_counters(instance.pk, **{field: len(pk_set)})
+
+        activity = ACTIVITY_FOR_COUNTER.get(field)
+        if activity:
+            for project_id in (pk_set if reverse else [instance.pk]):
+                record_activity(project_id, **{activity: 1 if reverse else len(pk_set)})
+
+    elif action in ('pre_remove', 'pre_clear'):
+        # O'chirishdan oldin mavjud bog'lamalarni sanaymiz (yo'qlarini hisobga olmaymiz)
+        rows = sender.objects.filter(user_id=instance.pk) if reverse else sender.objects.filter(project_id=instance.pk)
+        if pk_set is not None:
+            rows = rows.filter(**{'project_id__in' if reverse else 'user_id__in': pk_set})
+        for project_id, removed in rows.values('project_id').annotate(n=Count('pk')).values_list('project_id', 'n'):
+            bump_project_counters(project_id, **{field: -removed})
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        bump_project_counters(instance.project_id, comments_count=1)
+        record_activity(instance.project_id, comments=1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    bump_project_counters(instance.project_id, comments_count=-1)
+
+
+@receiver(pre_save, sender=Review)
+def remember_old_rating(sender, instance, **kwargs):
+    instance._old_rating = None
+    if not instance._state.adding:
+        instance._old_rating = Review.objects.filter(pk=instance.pk).values_list('rating', flat=True).first()
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        bump_project_counters(instance.project_id, rating_count=1, rating_sum=instance.rating)
+    elif instance._old_rating is not None:
+        bump_project_counters(instance.project_id, rating_sum=instance.rating - instance._old_rating)
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    bump_project_counters(instance.project_id, rating_count=-1, rating_sum=-instance.rating)
+
+
+# ==========================================
+# 7. TRENDING (soatlik faollik)
+# ==========================================
+class ProjectActivity(models.Model):
+    """Loyihaning bir soatlik faolligi. Trending ball shu jadvaldan sirpanuvchi oynada hisoblanadi."""
+    project = models.ForeignKey(Project, related_name='activity', on_delete=models.CASCADE)
+    bucket = models.DateTimeField()  # Soat boshi
+    views = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('project', 'bucket')
+        indexes = [models.Index(fields=['bucket'], name='activity_bucket_idx')]
+
+    def __str__(self):
+        return f"{self.project_id} @ {self.bucket:%Y-%m-%d %H}:00"
+
+
+ACTIVITY_FOR_COUNTER = {'likes_count': 'likes', 'buyers_count': 'purchases'}
+
+
+def record_activity(project_id, **deltas):
+    """Joriy soatlik bucket'ga faollik qo'shadi (bor bo'lsa F() bilan, yo'q bo'lsa yaratadi)."""
+    bucket = timezone.now().replace(minute=0, second=0, microsecond=0)
+    rows = ProjectActivity.objects.filter(project_id=project_id, bucket=bucket)
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            ProjectActivity.objects.create(project_id=project_id, bucket=bucket, **deltas)
+    except IntegrityError:
+        # Parallel so'rov bucket'ni birinchi yaratib qo'ydi
+        rows.update(**changes)
+
+
+def record_activity_batch(field, deltas):
+    """Ko'p loyiha uchun bitta maydonni guruhlab yozadi: {project_id: delta} (view_counter flush'i uchun)."""
+    bucket = timezone.now().replace(minute=0, second=0, microsecond=0)
+    rows = ProjectActivity.objects.filter(bucket=bucket, project_id__in=deltas)
+    existing = set(rows.values_list('project_id', flat=True))
+    if existing:
+        rows.filter(project_id__in=existing).update(**{field: F(field) + Case(
+            *[When(project_id=pk, then=Value(deltas[pk])) for pk in existing],
+            default=Value(0), output_field=models.IntegerField(),
+        )})
+    missing = [pk for pk in deltas if pk not in existing]
+    try:
+        with transaction.atomic():
+            ProjectActivity.objects.bulk_create(
+                [ProjectActivity(project_id=pk, bucket=bucket, **{field: deltas[pk]}) for pk in missing]
+            )
+    except IntegrityError:
+        for pk in missing:
+            record_activity(pk, **{field: deltas[pk]})
+
+
+# ==========================================
+# 8. QIDIRUV INDEKSI (search.py backendlari)
+# ==========================================
+@receiver(post_save, sender=Project)
+def index_project_for_search(sender, instance, **kwargs):
+    from .search import get_search_backend
+    get_search_backend().index_projects([instance])
+
+
+@receiver(post_delete, sender=Project)
+def remove_project_from_search(sender, instance, **kwargs):
+    from .search import get_search_backend
+    get_search_backend().remove_projects([instance.pk])
+
+
+@receiver(post_save, sender=User)
+def reindex_author_projects(sender, instance, created, update_fields=None, **kwargs):
+    # Faqat username o'zgarishi mumkin bo'lganda (last_login kabi yangilanishlarda emas)
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+    from .search import get_search_backend
+    get_search_backend().index_projects(Project.objects.filter(author=instance).select_related('author'))
+
+
+# ==========================================
+# 9. QIDIRUV TAKLIFLARI (suggest.py prefiks indeksi)
+# ==========================================
+class SuggestGeneration(models.Model):
+    """Taklif indeksi versiyasi (bitta qator). Signallar faqat indeksdagi maydonlar o'zgarganda oshiradi;
+    boshqa gunicorn workerlari o'zgarganini ko'rib indeksni fon oqimida qayta quradi."""
+    generation = models.PositiveBigIntegerField(default=0)
+
+
+# Indeksga kiradigan maydonlar: faqat shular o'zgarsa (yoki yaratish/o'chirish) taklif indeksi yangilanadi.
+# Skan hukmi, tahrir (tavsif, narx), cron saqlashlari versiyani oshirmaydi
+SUGGEST_FIELDS = {Project: ('title', 'slug', 'is_frozen'), User: ('username', 'is_active')}
+
+
+def _suggest_state(instance):
+    # Kechiktirilgan (only/defer) maydon - None: o'zgargan deb hisoblanadi
+    return tuple(instance.__dict__.get(name) for name in SUGGEST_FIELDS[type(instance)])
+
+
+@receiver(post_init, sender=Project)
+@receiver(post_init, sender=User)
+def remember_suggest_state(sender, instance, **kwargs):
+    instance._suggest_state = _suggest_state(instance)
+
+
+def suggest_state_changed(instance, created):
+    """Indeksdagi maydonlar bazadan o'qilgandan (yoki oxirgi saqlashdan) beri o'zgardimi."""
+    state = _suggest_state(instance)
+    changed = created or None in instance._suggest_state or state != instance._suggest_state
+    instance._suggest_state = state
+    return changed
+
+
+def bump_suggest_generation():
+    def bump():
+        if not SuggestGeneration.objects.filter(pk=1).update(generation=F('generation') + 1):
+            SuggestGeneration.objects.get_or_create(pk=1, defaults={'generation': 1})
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=Project)
+def update_suggest_project(sender, instance, created, **kwargs):
+    if not suggest_state_changed(instance, created):
+        return
+    from .suggest import suggest_index
+    if instance.is_frozen:
+        suggest_index.remove('project', instance.pk)
+    else:
+        suggest_index.upsert('project', instance.pk, instance.title, instance.slug, instance.views)
+    bump_suggest_generation()
+
+
+@receiver(post_delete, sender=Project)
+def remove_suggest_project(sender, instance, **kwargs):
+    from .suggest import suggest_index
+    suggest_index.remove('project', instance.pk)
+    bump_suggest_generation()
+
+
+@receiver(post_save, sender=User)
+def update_suggest_user(sender, instance, created, **kwargs):
+    if not suggest_state_changed(instance, created):
+        return
+    from .suggest import suggest_index
+    if instance.is_active:
+        suggest_index.upsert('user', instance.pk, instance.username, instance.username)
+    else:
+        suggest_index.remove('user', instance.pk)
+    bump_suggest_generation()
+
+
+# ==========================================
+# 10. KUZATUVCHI LENTASI (feed.py fan-out)
+# ==========================================
+@receiver(post_save, sender=Project)
+def fan_out_new_project(sender, instance, created, **kwargs):
+    if created:
+        from .feed import fan_out_project
+        fan_out_project(instance)
+
+
+@receiver(post_save, sender=Sync)
+def backfill_feed_on_sync(sender, instance, created, **kwargs):
+    if created:
+        from .feed import backfill_feed
+        backfill_feed(instance.follower.user_id, instance.following.user_id)
+
+
+@receiver(post_delete, sender=Sync)
+def prune_feed_on_unsync(sender, instance, **kwargs):
+    from .feed import prune_feed
+    prune_feed(instance.follower.user_id, instance.following.user_id)
+
+
+# ==========================================
+# 11. XAVFSIZLIK SKANI NAVBATI (scan_queue.py + run_scan_worker)
+# ==========================================
+class ScanJob(models.Model):
+    """Bazadagi skan navbati: web worker faqat qator qo'shadi, skanni alohida run_scan_worker bajaradi."""
+    QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Navbatda'), (RUNNING, 'Bajarilmoqda'), (DONE, 'Tugadi'), (FAILED, 'Xato')]
+
+    project = models.ForeignKey(Project, related_name='scan_jobs', on_delete=models.CASCADE)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.SmallIntegerField(default=0)  # Katta = oldinroq
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=4)
+    run_after = models.DateTimeField(default=timezone.now)  # Qayta urinishda backoff shu yerga yoziladi
+    locked_by = models.CharField(max_length=64, blank=True)
+    lease_expires = models.DateTimeField(null=True, blank=True)  # Heartbeat to'xtasa boshqa worker oladi
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', '-priority', 'run_after'], name='scanjob_claim_idx')]
+
+    def __str__(self):
+        return f"Scan #{self.pk} ({self.project_id}, {self.status})"
+
+
+# ==========================================
+# 12. SKAN HUKMLARI KESHI (sha256 bo'yicha, scan_pipeline.py)
+# ==========================================
+class ScanVerdict(models.Model):
+    """Bir xil mazmunli fayl qayta yuklansa Gemini/VirusTotal chaqirilmaydi - hukm shu yerdan olinadi."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField(default=0)
+    security_status = models.CharField(max_length=20)  # Faqat yakuniy hukmlar: 'safe' / 'danger'
+    ai_analysis = models.TextField(blank=True)
+    virustotal_link = models.URLField(blank=True, null=True)
+    hits = models.PositiveIntegerField(default=0)  # Necha marta qayta ishlatildi
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]}… ({self.security_status})"
+
+
+# ==========================================
+# 13. ARXIV A'ZOLARI BO'YICHA SKAN NATIJALARI (archive_scan.py)
+# ==========================================
+class ScanFinding(models.Model):
+    """Arxivdagi qaysi fayl shubhali/xavfli deb topilgani (moderator uchun; SAFE a'zolar saqlanmaydi)."""
+    VERDICT_CHOICES = [('danger', 'Xavfli'), ('unsure', 'Shubhali')]
+
+    project = models.ForeignKey(Project, related_name='scan_findings', on_delete=models.CASCADE)
+    path = models.CharField(max_length=500)
+    size = models.BigIntegerField(default=0)
+    verdict = models.CharField(max_length=10, choices=VERDICT_CHOICES)
+    reasons = models.JSONField(default=list, blank=True)  # Lokal tahlil sabablari
+    ai_result = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['verdict', 'path']  # 'danger' < 'unsure' - xavflilari birinchi
+
+    def __str__(self):
+        return f"{self.path} ({self.verdict})"
+
+
+# ==========================================
+# 14. ONLINE KOMPILYATOR NATIJALARI (compiler.py)
+# ==========================================
+class CompilerRun(models.Model):
+    """Judge0 ga yuborilgan kod: brauzer natijani token bo'yicha shu qatordan so'raydi."""
+    QUEUED, DONE, FAILED = 'queued', 'done', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Kutilmoqda'), (DONE, 'Tayyor'), (FAILED, 'Xato')]
+
+    token = models.CharField(max_length=64, unique=True)  # Judge0 tokeni
+    nonce = models.CharField(max_length=32, blank=True)   # Callback imzosi shu qiymatni tasdiqlaydi
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.SET_NULL)
+    language = models.CharField(max_length=20)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.TextField(blank=True)
+    cache_key = models.CharField(max_length=64, blank=True, db_index=True)  # compiler_cache.make_key; bo'sh - keshlanmaydi
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.language} {self.token[:8]} ({self.status})"
+
+
+# ==========================================
+# 15. AI YORDAMCHI UCHUN KOD INDEKSI (code_index.py)
+# ==========================================
+class CodeIndex(models.Model):
+    """Loyiha kodining bo'laklari va BM25 inverted indeksi (zlib + JSON); yuklash skanida quriladi."""
+    project = models.OneToOneField(Project, related_name='code_index', on_delete=models.CASCADE)
+    sha256 = models.CharField(max_length=64)  # Indekslangan fayl mazmuni - AI javoblari keshi versiyasiga kiradi
+    data = models.BinaryField()
+    chunk_count = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.project_id}: {self.chunk_count} bo'lak"
+
+
+# ==========================================
+# 16. TELEGRAM XABARLARI NAVBATI (telegram_outbox.py + run_telegram_dispatcher)
+# ==========================================
+class TelegramMessage(models.Model):
+    """Transactional outbox: xabar savdo tranzaksiyasi bilan birga yoziladi, dispatcher keyin yuboradi."""
+    QUEUED, SENDING, SENT, FAILED = 'queued', 'sending', 'sent', 'failed'
+    STATUS_CHOICES = [(QUEUED, 'Navbatda'), (SENDING, 'Yuborilmoqda'), (SENT, 'Yuborildi'), (FAILED, 'Xato')]
+
+    chat_id = models.CharField(max_length=50)
+    text = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)  # Backoff va Telegram retry_after shu yerga yoziladi
+    locked_by = models.CharField(max_length=64, blank=True)
+    lease_expires = models.DateTimeField(null=True, blank=True)  # Dispatcher o'lsa boshqasi oladi
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_after'], name='tgmessage_claim_idx')]
+
+    def __str__(self):
+        return f"Telegram #{self.pk} -> {self.chat_id} ({self.status})"
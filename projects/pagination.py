@@ -0,0 +1,107 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+
+# ==========================================
+# KEYSET (CURSOR) PAGINATSIYA
+# ==========================================
+# OFFSET/LIMIT o'rniga oxirgi ko'rilgan qator qiymatlaridan boshlab o'qiymiz:
+# WHERE (views, id) < (oxirgi_views, oxirgi_id) ORDER BY views DESC, id DESC.
+# Shu sababli 1-sahifa ham, 500-sahifa ham bir xil narxda (indeks bo'yicha) olinadi.
+
+POPULAR_KEYS = ('-views', '-id')
+NEWEST_KEYS = ('-created_at', '-id')
+DEFAULT_PAGE_SIZE = 24
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Queryset'ni berilgan kalitlar (masalan ('-views', '-id')) bo'yicha sahifalaydi.
+    Oxirgi kalit unikal bo'lishi shart (odatda '-id').
+    """
+
+    def __init__(self, queryset, keys, page_size=DEFAULT_PAGE_SIZE):
+        self.queryset = queryset
+        self.keys = tuple(keys)
+        self.page_size = page_size
+
+    # --- Cursor kodlash ---
+    def encode_cursor(self, obj):
+        values = [getattr(obj, key.lstrip('-')) for key in self.keys]
+        raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Noto'g'ri cursor kelsa None qaytaramiz (1-sahifa ko'rsatiladi)."""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.keys):
+            return None
+
+        model_meta = self.queryset.model._meta
+        parsed = []
+        for key, value in zip(self.keys, values):
+            try:
+                field = model_meta.get_field(key.lstrip('-'))
+                value = field.to_python(value)
+            except FieldDoesNotExist:
+                pass  # Annotatsiya (masalan similarity) - qiymat o'zicha qoladi
+            except Exception:
+                return None
+            parsed.append(value)
+        return parsed
+
+    def _after(self, values):
+        """(k1, k2, ...) > (v1, v2, ...) shartini Q obyektiga aylantiramiz."""
+        # Birinchi kalit bo'yicha chegara: baza indeksdan to'g'ridan-to'g'ri shu joyga "sakraydi"
+        first = self.keys[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": values[0]})
+
+        condition = Q()
+        for i, key in enumerate(self.keys):
+            name = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_key, prev_value in zip(self.keys[:i], values[:i]):
+                step &= Q(**{prev_key.lstrip('-'): prev_value})
+            condition |= step
+        return bound & condition
+
+    def get_page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.keys)
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self._after(values))
+
+        # Keyingi sahifa bormi-yo'qligini bilish uchun bitta ortiqcha qator olamiz
+        rows = list(queryset[:self.page_size + 1])
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = self.encode_cursor(rows[-1])
+        return KeysetPage(rows, next_cursor)
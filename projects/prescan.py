@@ -0,0 +1,449 @@
+import ast
+import bisect
+import itertools
+import math
+import os
+import re
+from collections import Counter
+
+
+# ==========================================
+# LOKAL OLDINDAN SKAN (Gemini'dan oldin, tarmoqsiz)
+# ==========================================
+# Python fayllar AST orqali (importlar taxalluslari bilan) tekshiriladi, boshqa tillar
+# (validate_file_extension dagi .js/.html/.css/.cpp/.java/.dart/.go/.php) - regex qoidalari bilan.
+# Ikkalasida ham uzun yuqori entropiyali satrlar (yashirilgan payload) qidiriladi.
+#   DANGER - aniq zararli naqsh (reverse shell, keylogger, tizimni o'chirish, yashirin exec)
+#   UNSURE - shubhali chaqiruv bor (o'chirish, buyruq bajarish, eval ...) -> Gemini hal qiladi
+#   SAFE   - shubhali hech narsa topilmadi -> Gemini chaqirilmaydi
+
+SAFE, DANGER, UNSURE = 'SAFE', 'DANGER', 'UNSURE'
+
+MAX_PRESCAN_BYTES = 2 * 1024 * 1024  # Kattaroq fayllar butunligicha tekshirilmaydi -> UNSURE
+BLOB_MIN_LENGTH = 200
+BLOB_MIN_ENTROPY = 4.5  # bit/belgi; oddiy kod ~3-4, base64 qilingan binar ~6
+
+TEXT_EXTENSIONS = ('.py', '.js', '.html', '.css', '.cpp', '.java', '.dart', '.go', '.php')
+SCRIPT_EXTENSIONS = ('.sh', '.bash', '.bat', '.cmd', '.ps1', '.vbs')  # Arxiv ichida uchraydi
+
+# Buyruq satrlari va yo'llar (Python satr konstantalari va boshqa tillarning matni uchun)
+DANGEROUS_SHELL = re.compile(
+    r'rm\s+-(?:rf|fr|r\s+-f)\s+(?:/|~/?|\*|\$HOME/?)(?:\s|$|["\'*])'
+    r'|/dev/tcp/|\bnc(?:at)?\s+(?:\S+\s+)*-[ec]\s|\b(?:ba)?sh\s+-i\b'
+    r'|\bmkfs(?:\.\w+)?\s|\bdd\s+if=\S+\s+of=/dev/[sh]d|:\(\)\s*\{\s*:\|:&\s*\};:'
+    r'|\bformat\s+c:|\brd\s+/s\s+/q\s+c:|\bdel\s+/[fsq]\s.*c:\\windows',
+    re.IGNORECASE,
+)
+SYSTEM_PATHS = re.compile(r'^(?:/|~|/(?:etc|bin|boot|usr|home|var|root)/?|[a-z]:\\?|[a-z]:\\windows.*)$', re.IGNORECASE)
+CREDENTIAL_PATHS = re.compile(r'Login Data|Local State|Cookies|\.ssh/id_rsa|wallet\.dat|/etc/shadow|\.aws/credentials')
+# Tez filtr: yuqoridagi naqshlar mos kelsa matnda (kichik harfda) shulardan biri albatta bor
+SHELL_NEEDLES = ('-r', '-f', '/dev/tcp/', '-e', '-c', '-i', 'mkfs', 'of=/dev/', ':|:&', ' c:', '\tc:', '\nc:',
+                 '/q', 'c:\\windows')
+CREDENTIAL_NEEDLES = ('login data', 'local state', 'cookies', '.ssh/id_rsa', 'wallet.dat', '/etc/shadow',
+                      '.aws/credentials')
+SHELL_BINARIES = re.compile(r'^(?:/bin/|/usr/bin/)?(?:ba|z|)sh$|^cmd(?:\.exe)?$|^powershell(?:\.exe)?$', re.IGNORECASE)
+
+BLOB_RE = re.compile(r'[A-Za-z0-9+/=_-]{%d,}' % BLOB_MIN_LENGTH)
+DATA_URI_RE = re.compile(r'data:[\w/+.-]+;base64,$')
+
+
+class PrescanResult:
+    def __init__(self, verdict, reasons=()):
+        self.verdict = verdict
+        self.reasons = list(reasons)
+
+    def summary(self):
+        return '; '.join(self.reasons[:5])
+
+    def __repr__(self):
+        return f'PrescanResult({self.verdict}, {self.reasons!r})'
+
+
+def shannon_entropy(text):
+    if not text:
+        return 0.0
+    total = len(text)
+    return -sum(n / total * math.log2(n / total) for n in Counter(text).values())
+
+
+def find_encoded_blobs(text):
+    """Uzun base64/hex ko'rinishidagi yuqori entropiyali satrlar (rasm data: URI lari hisobga olinmaydi)."""
+    blobs = []
+    for match in BLOB_RE.finditer(text):
+        if DATA_URI_RE.search(text[max(0, match.start() - 40):match.start()]):
+            continue
+        if shannon_entropy(match.group()) >= BLOB_MIN_ENTROPY:
+            blobs.append(match.group())
+    return blobs
+
+
+def _verdict(danger, suspicious):
+    if danger:
+        return PrescanResult(DANGER, danger)
+    if suspicious:
+        return PrescanResult(UNSURE, suspicious)
+    return PrescanResult(SAFE)
+
+
+# ==========================================
+# PYTHON (AST)
+# ==========================================
+DELETE_CALLS = {'os.remove', 'os.unlink', 'os.rmdir', 'os.removedirs', 'shutil.rmtree'}
+EXEC_CALLS = {'os.system', 'os.popen', 'os.execv', 'os.execve', 'os.execl', 'os.execlp', 'os.execvp',
+              'os.spawnl', 'os.spawnv', 'os.startfile', 'subprocess.run', 'subprocess.call',
+              'subprocess.check_call', 'subprocess.check_output', 'subprocess.Popen', 'subprocess.getoutput',
+              'subprocess.getstatusoutput', 'commands.getoutput'}
+DYNAMIC_CALLS = {'eval', 'exec', 'compile', '__import__', 'importlib.import_module'}
+DECODE_CALLS = {'base64.b64decode', 'base64.b32decode', 'base64.b85decode', 'base64.decodebytes',
+                'zlib.decompress', 'marshal.loads', 'codecs.decode', 'bytes.fromhex', 'binascii.unhexlify'}
+KEYBOARD_HOOKS = {'pynput.keyboard.Listener', 'keyboard.on_press', 'keyboard.hook', 'keyboard.record',
+                  'keyboard.on_release', 'pyHook.HookManager', 'pyxhook.HookManager',
+                  'ctypes.windll.user32.GetAsyncKeyState', 'ctypes.windll.user32.SetWindowsHookExA',
+                  'ctypes.windll.user32.SetWindowsHookExW'}
+NETWORK_MODULES = {'socket', 'requests', 'urllib', 'http', 'smtplib', 'ftplib', 'paramiko', 'aiohttp',
+                   'httpx', 'telebot', 'telegram', 'aiogram'}
+LOW_LEVEL_MODULES = {'ctypes', 'winreg', '_winreg', 'pty'}
+
+
+BODY_FIELDS = ('body', 'orelse', 'finalbody', 'handlers', 'cases')
+
+
+def _covers(lines, start, end):
+    i = bisect.bisect_left(lines, start)
+    return i < len(lines) and lines[i] <= end
+
+
+def _relevant_nodes(statements, lines):
+    """
+    Trigger qatorini qamragan statementlar ichidagi barcha tugunlar. Murakkab statementlar (def/class/if/
+    for/try ...) sarlavhasi to'liq, tanasi esa faqat kerakli qismlari bo'yicha ko'riladi - katta faylda
+    bitta shubhali qator uchun butun daraxtni aylanib chiqish shart emas.
+    """
+    for node in statements:
+        start = getattr(node, 'lineno', None)
+        decorators = getattr(node, 'decorator_list', None)
+        if decorators:
+            start = min([start] + [d.lineno for d in decorators])  # Dekoratorlar `def` qatoridan yuqorida
+        if start is not None and not _covers(lines, start, node.end_lineno or start):
+            continue
+        for field, value in ast.iter_fields(node):
+            if field in BODY_FIELDS and isinstance(value, list):
+                yield from _relevant_nodes(value, lines)
+            elif isinstance(value, ast.AST):
+                yield from ast.walk(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, ast.AST):
+                        yield from ast.walk(item)
+
+
+class _PythonAnalyzer:
+    def __init__(self):
+        self.aliases = {}  # mahalliy nom -> to'liq nom ("o" -> "os", "rm" -> "os.remove")
+        self.modules = set()
+        self.danger = []
+        self.suspicious = []
+        self.calls = set()
+        self.reads_credentials = False
+
+    def analyze(self, tree, lines):
+        """`lines` - trigger so'zlar uchragan qator raqamlari (tartiblangan); faqat shularni qamragan kod ko'riladi."""
+        self._collect_imports(tree.body)
+        calls, constants = [], []
+        for node in _relevant_nodes(tree.body, lines):
+            if isinstance(node, ast.Call):
+                calls.append(node)
+            elif isinstance(node, ast.Constant) and isinstance(node.value, str) and len(node.value) >= 6:
+                constants.append(node)
+        for node in calls:
+            name = self.resolve(node.func)
+            if name:
+                self.calls.add(name)
+                self._check_call(name, node)
+        for node in constants:
+            self._check_constant(node)
+        return self.finish()
+
+    # --- Importlar ---
+    def _collect_imports(self, statements):
+        # Faqat statementlar bo'ylab (ifodalarga kirmasdan) - taxalluslar jadvali to'liq bo'lishi uchun
+        for node in statements:
+            if isinstance(node, ast.Import):
+                self.add_import(node)
+            elif isinstance(node, ast.ImportFrom):
+                self.add_import_from(node)
+            else:
+                for field in BODY_FIELDS:
+                    children = getattr(node, field, None)
+                    if children:
+                        self._collect_imports(children)
+
+    def add_import(self, node):
+        for alias in node.names:
+            top = alias.name.split('.')[0]
+            self.modules.add(top)
+            if alias.asname:
+                self.aliases[alias.asname] = alias.name
+            else:
+                self.aliases[top] = top
+
+    def add_import_from(self, node):
+        module = node.module or ''
+        self.modules.add(module.split('.')[0])
+        for alias in node.names:
+            if alias.name != '*':
+                self.aliases[alias.asname or alias.name] = f'{module}.{alias.name}'
+
+    def resolve(self, node):
+        parts = []
+        while isinstance(node, ast.Attribute):
+            parts.append(node.attr)
+            node = node.value
+        if isinstance(node, ast.Call):
+            # socket.socket(...).connect -> "socket.socket().connect"
+            base = self.resolve(node.func)
+            return '.'.join([f'{base}()'] + parts[::-1]) if base else None
+        if not isinstance(node, ast.Name):
+            return None
+        parts.append(self.aliases.get(node.id, node.id))
+        return '.'.join(parts[::-1])
+
+    # --- Chaqiruvlar ---
+    def _const_args(self, node):
+        values = []
+        for arg in list(node.args) + [kw.value for kw in node.keywords]:
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                values.append(arg.value)
+            elif isinstance(arg, (ast.List, ast.Tuple)):
+                items = [e.value for e in arg.elts if isinstance(e, ast.Constant) and isinstance(e.value, str)]
+                values.append(' '.join(items))
+                values.extend(items)
+        return values
+
+    def _check_call(self, name, node):
+        args = self._const_args(node)
+        line = getattr(node, 'lineno', 0)
+        if name in DELETE_CALLS or name.endswith(('.unlink', '.rmtree')):
+            if any(SYSTEM_PATHS.match(a.strip()) for a in args):
+                self.danger.append(f"{line}-qator: tizim katalogini o'chirish ({name})")
+            else:
+                self.suspicious.append(f"{line}-qator: fayl o'chirish ({name})")
+        elif name in EXEC_CALLS or name.startswith(('os.exec', 'os.spawn')):
+            if any(DANGEROUS_SHELL.search(a) for a in args):
+                self.danger.append(f"{line}-qator: xavfli buyruq ({name})")
+            else:
+                self.suspicious.append(f"{line}-qator: tashqi buyruq ({name})")
+        elif name == 'pty.spawn':
+            if any(SHELL_BINARIES.match(a.strip()) for a in args):
+                self.danger.append(f"{line}-qator: interaktiv shell (pty.spawn)")
+            else:
+                self.suspicious.append(f"{line}-qator: pty.spawn")
+        elif name == 'os.dup2':
+            self.suspicious.append(f"{line}-qator: stdin/stdout qayta yo'naltirish (os.dup2)")
+        elif name in DYNAMIC_CALLS:
+            inner = node.args[0] if node.args else None
+            inner_name = self.resolve(inner.func) if isinstance(inner, ast.Call) else None
+            if name in ('eval', 'exec') and inner_name in DECODE_CALLS:
+                self.danger.append(f"{line}-qator: yashirilgan kodni bajarish ({name}({inner_name}))")
+            else:
+                self.suspicious.append(f"{line}-qator: dinamik kod ({name})")
+        elif name in KEYBOARD_HOOKS:
+            self.suspicious.append(f"{line}-qator: klaviatura kuzatuvi ({name})")
+        elif name == 'marshal.loads':
+            self.suspicious.append(f"{line}-qator: marshal.loads")
+
+    # --- Satrlar ---
+    def _check_constant(self, node):
+        if DANGEROUS_SHELL.search(node.value):
+            self.suspicious.append(f"{node.lineno}-qator: xavfli buyruq matni")
+        if CREDENTIAL_PATHS.search(node.value):
+            self.reads_credentials = True
+            self.suspicious.append(f"{node.lineno}-qator: maxfiy ma'lumotlar fayli")
+        if len(node.value) >= BLOB_MIN_LENGTH and find_encoded_blobs(node.value):
+            self.suspicious.append(f"{node.lineno}-qator: yashirilgan (yuqori entropiyali) satr")
+
+    def finish(self):
+        network = self.modules & NETWORK_MODULES
+        uses_socket = 'socket' in self.modules
+        spawns_shell = any(c in EXEC_CALLS for c in self.calls)
+        if uses_socket and ('os.dup2' in self.calls and spawns_shell or 'pty.spawn' in self.calls):
+            self.danger.append("Reverse shell: socket + os.dup2/pty + shell")
+        if any(c in KEYBOARD_HOOKS for c in self.calls) and network:
+            self.danger.append(f"Keylogger: klaviatura kuzatuvi + tarmoq ({', '.join(sorted(network))})")
+        if self.reads_credentials and network:
+            self.danger.append("Maxfiy fayllarni o'qib tarmoqqa yuborish")
+        low_level = self.modules & LOW_LEVEL_MODULES
+        if low_level:
+            self.suspicious.append(f"Past darajali modul: {', '.join(sorted(low_level))}")
+        return _verdict(self.danger, self.suspicious)
+
+
+# _PythonAnalyzer biror narsa topishi uchun qatorda shulardan biri albatta bo'ladi: chaqiruv/modul nomlari,
+# xavfli buyruq va maxfiy fayl matnlari (kichik harfda) yoki yuqori entropiyali blob
+PYTHON_TRIGGERS = ('remove', 'unlink', 'rmdir', 'rmtree', 'system', 'popen', 'exec', 'spawn', 'startfile',
+                   'subprocess', 'getoutput', 'eval', 'compile', '__import__', 'import_module', 'pty', 'dup2',
+                   'keyboard', 'HookManager', 'GetAsyncKeyState', 'SetWindowsHookEx', 'marshal', 'ctypes', 'winreg')
+# Hammasi kichik harfda, bitta regex bilan (lower() qator ajratgichlarini o'zgartirmaydi - qator raqamlari to'g'ri)
+TRIGGER_RE = re.compile('|'.join(map(re.escape, sorted(
+    {word.lower() for word in PYTHON_TRIGGERS} | set(SHELL_NEEDLES) | set(CREDENTIAL_NEEDLES), key=len, reverse=True,
+))))
+
+
+def _line_numbers(text, positions):
+    lines, line, previous = [], 1, 0
+    for pos in positions:
+        line += text.count('\n', previous, pos)
+        previous = pos
+        if not lines or lines[-1] != line:
+            lines.append(line)
+    return lines
+
+
+def _trigger_lines(text):
+    lowered = text.lower()
+    lines = _line_numbers(lowered, [m.start() for m in TRIGGER_RE.finditer(lowered)])
+    blobs = [m.start() for m in BLOB_RE.finditer(text)]
+    return sorted(set(lines + _line_numbers(text, blobs))) if blobs else lines
+
+
+def prescan_python(text):
+    # Tez yo'l: trigger uchragan qator bo'lmasa AST umuman qurilmaydi
+    lines = _trigger_lines(text)
+    if not lines:
+        return PrescanResult(SAFE)
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        # Python 2, buzilgan fayl yoki fayl bo'lagi (chunk_scan) - regex qoidalari bilan
+        return _prescan_python_fallback(text)
+    return _PythonAnalyzer().analyze(tree, lines)
+
+
+# AST qurilmasa: trigger nomli chaqiruvlar va importlar (taxalluslarni bilmaymiz - shuning uchun SAFE emas, UNSURE)
+PYTHON_FALLBACK_RE = re.compile(
+    r'\b(?:%(t)s)\w*\s*\(|^[ \t]*(?:from|import)\b[^\n]*\b(?:%(t)s)' % {'t': '|'.join(map(re.escape, PYTHON_TRIGGERS))},
+    re.MULTILINE,
+)
+
+
+def _prescan_python_fallback(text):
+    result = prescan_generic(text, '.py')
+    if result.verdict == DANGER:
+        return result
+    hits = []
+    for match in itertools.islice(PYTHON_FALLBACK_RE.finditer(text), 5):
+        line = text.count('\n', 0, match.start()) + 1
+        hits.append(f"{line}-qator: {match.group().strip()[:40]}")
+    return _verdict([], result.reasons + hits)
+
+
+# ==========================================
+# BOSHQA TILLAR (regex qoidalari)
+# ==========================================
+# (naqsh, darajasi, izoh, qaysi kengaytmalar uchun (None = hammasi), kalit so'zlar)
+# Kalit so'zlar - naqsh mos kelishi uchun matnda (kichik harfda) albatta bo'lishi kerak bo'lgan qismlar:
+# ulardan birortasi ham bo'lmasa regex umuman ishga tushirilmaydi (oddiy `in` regexdan ancha tez).
+_D, _S = DANGER, UNSURE
+_JS = ('.js', '.html')
+# Xavfli buyruq matni faqat shu qatorda buyruq bajaruvchi chaqiruv bo'lsa DANGER (izohdagisi - UNSURE)
+EXEC_HINT = re.compile(
+    r'\b(?:system|exec|execSync|spawn|shell_exec|passthru|popen|proc_open|WinExec|ShellExecute\w*)\s*\('
+    r'|exec\.Command|Runtime\.getRuntime\(\)\.exec|ProcessBuilder|Process\.(?:run|start)'
+)
+GENERIC_RULES = [
+    (re.compile(r'SetWindowsHookEx\w*\s*\(\s*WH_KEYBOARD(?:_LL)?|GetAsyncKeyState'), _D,
+     "klaviatura ushlash (keylogger)", ('.cpp',), ('setwindowshookex', 'getasynckeystate')),
+    (re.compile(r'\beval\s*\(\s*(?:atob|unescape|String\.fromCharCode)\s*\('), _D,
+     "yashirilgan JS ni bajarish", _JS, ('eval',)),
+    (re.compile(r'\b(?:eval|assert)\s*\(\s*(?:base64_decode|gzinflate|gzuncompress|str_rot13)\s*\('), _D,
+     "yashirilgan PHP ni bajarish", ('.php',), ('eval', 'assert')),
+    (re.compile(r'\b(?:eval|assert|system|exec|shell_exec|passthru|popen)\s*\(\s*\$_(?:GET|POST|REQUEST|COOKIE)\b'), _D,
+     "web-shell", ('.php',), ('$_',)),
+    (re.compile(r'child_process'), _S, "child_process", _JS, ('child_process',)),
+    (re.compile(r'\beval\s*\(|new\s+Function\s*\('), _S, "dinamik kod (eval)", _JS + ('.php',), ('eval', 'function')),
+    (re.compile(r'document\.cookie|localStorage\.getItem'), _S,
+     "cookie/localStorage o'qish", _JS, ('document.cookie', 'localstorage.getitem')),
+    (re.compile(r'fs\.(?:rm|rmdir|unlink)(?:Sync)?\s*\('), _S, "fayl o'chirish", _JS, ('fs.',)),
+    (re.compile(r'Runtime\.getRuntime\(\)\.exec|new\s+ProcessBuilder'), _S,
+     "tashqi buyruq", ('.java',), ('runtime.getruntime', 'processbuilder')),
+    (re.compile(r'\bFiles\.delete|\.delete\(\)\s*;'), _S, "fayl o'chirish", ('.java',), ('files.delete', '.delete()')),
+    (re.compile(r'\b(?:system|popen|execv?[lpe]*|CreateProcess\w*|ShellExecute\w*|WinExec)\s*\('), _S,
+     "tashqi buyruq", ('.cpp',), ('system', 'popen', 'exec', 'createprocess', 'shellexecute', 'winexec')),
+    # C remove("fayl") - bitta argumentli; std::remove(begin, end, x) algoritmi hisobga olinmaydi
+    (re.compile(r'\b(?:unlink|DeleteFile\w*|_wremove)\s*\(|(?<![:\w.])remove\s*\(\s*[^,()]*\)'), _S,
+     "fayl o'chirish", ('.cpp',), ('unlink', 'deletefile', 'remove')),
+    (re.compile(r'\bexec\.Command\s*\(|syscall\.Exec'), _S, "tashqi buyruq", ('.go',), ('exec.command', 'syscall.exec')),
+    (re.compile(r'\bos\.Remove(?:All)?\s*\('), _S, "fayl o'chirish", ('.go',), ('os.remove',)),
+    (re.compile(r'\bProcess\.(?:run|start)(?:Sync)?\s*\('), _S, "tashqi buyruq", ('.dart',), ('process.',)),
+    (re.compile(r'\.delete(?:Sync)?\s*\(\s*recursive\s*:\s*true'), _S, "fayl o'chirish", ('.dart',), ('.delete',)),
+    (re.compile(r'\b(?:system|exec|shell_exec|passthru|popen|proc_open|pcntl_exec)\s*\('), _S,
+     "tashqi buyruq", ('.php',), ('system', 'exec', 'passthru', 'popen', 'proc_open')),
+    (re.compile(r'\b(?:unlink|rmdir)\s*\('), _S, "fayl o'chirish", ('.php',), ('unlink', 'rmdir')),
+    (re.compile(r'expression\s*\(|url\(\s*[\'"]?javascript:'), _S,
+     "CSS ichida skript", ('.css', '.html'), ('expression', 'javascript:')),
+    (CREDENTIAL_PATHS, _S, "maxfiy ma'lumotlar fayli", None, CREDENTIAL_NEEDLES),
+]
+
+
+def _has_any(lowered, needles):
+    return any(needle in lowered for needle in needles)
+
+
+def prescan_generic(text, ext, lowered=None):
+    lowered = text.lower() if lowered is None else lowered
+    danger, suspicious = [], []
+    if _has_any(lowered, SHELL_NEEDLES):
+        for match in DANGEROUS_SHELL.finditer(text):
+            line_start = text.rfind('\n', 0, match.start()) + 1
+            line_end = text.find('\n', match.end())
+            line = text.count('\n', 0, match.start()) + 1
+            if EXEC_HINT.search(text[line_start:line_end if line_end >= 0 else len(text)]):
+                danger.append(f"{line}-qator: xavfli buyruq")
+            else:
+                suspicious.append(f"{line}-qator: xavfli buyruq matni")
+    for pattern, level, reason, extensions, needles in GENERIC_RULES:
+        if extensions is not None and ext not in extensions or not _has_any(lowered, needles):
+            continue
+        match = pattern.search(text)
+        if match:
+            line = text.count('\n', 0, match.start()) + 1
+            (danger if level == DANGER else suspicious).append(f"{line}-qator: {reason}")
+    if find_encoded_blobs(text):
+        suspicious.append("yashirilgan (yuqori entropiyali) satr")
+    return _verdict(danger, suspicious)
+
+
+def prescan_script(text):
+    """Shell/bat/PowerShell skriptlari: xavfli buyruq bevosita bajariladi (EXEC_HINT shart emas)."""
+    danger = []
+    for match in itertools.islice(DANGEROUS_SHELL.finditer(text), 5):
+        line = text.count('\n', 0, match.start()) + 1
+        danger.append(f"{line}-qator: xavfli buyruq")
+    # Skript har qanday buyruqni bajarishi mumkin - xavfli naqsh bo'lmasa ham AI ko'rishi kerak
+    return _verdict(danger, ["Skript fayli"])
+
+
+def prescan_text(text, name):
+    ext = os.path.splitext(name or '')[1].lower()
+    if ext == '.py':
+        return prescan_python(text)
+    if ext in TEXT_EXTENSIONS:
+        return prescan_generic(text, ext)
+    if ext in SCRIPT_EXTENSIONS:
+        return prescan_script(text)
+    return PrescanResult(UNSURE, ["Noma'lum fayl turi"])
+
+
+def prescan_bytes(data, name):
+    if b'\x00' in data[:8192]:
+        return PrescanResult(UNSURE, ["Binar fayl"])
+    return prescan_text(data.decode('utf-8', errors='ignore'), name)
+
+
+def prescan_file(path, name, size=None):
+    """Skan pipeline'i uchun: faylni to'liq (MAX_PRESCAN_BYTES gacha) o'qib tekshiradi."""
+    size = os.path.getsize(path) if size is None else size
+    if size > MAX_PRESCAN_BYTES:
+        return PrescanResult(UNSURE, ["Fayl lokal tahlil uchun juda katta"])
+    with open(path, 'rb') as f:
+        return prescan_bytes(f.read(), name)
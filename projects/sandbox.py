@@ -0,0 +1,317 @@
+import atexit
+import os
+import queue
+import secrets
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # Windows - lokal backend ishlamaydi, Judge0 ishlatiladi
+    resource = None
+
+
+# ==========================================
+# LOKAL SANDBOX (online kompilyator uchun Python / Node)
+# ==========================================
+# Har bir ishga tushirish - alohida, bir martalik jarayon:
+#   - `unshare -rnp --fork --kill-child`: alohida user + network (tarmoq yo'q) + PID namespace. Dastur
+#     (namespace'dagi 1-jarayon) tugasa yoki o'ldirilsa, u fork/setsid qilgan barcha jarayonlar ham o'ladi
+#   - server root bo'lsa - har bir ishga tushirish uchun alohida uid (UID_BASE dan): loyiha fayllari va .env
+#     o'qilmaydi, boshqa foydalanuvchining sandboxiga kira olmaydi, RLIMIT_NPROC ham faqat shu ishniki
+#   - rlimit: CPU vaqti, xotira (Python - RLIMIT_AS, Node - RLIMIT_DATA: Buffer/ArrayBuffer ham kiradi),
+#     yoziladigan fayl hajmi, ochiq fayllar va jarayonlar soni
+#   - devor soati (wall clock) ota jarayonda: muddat o'tsa butun jarayon guruhiga SIGKILL
+#   - ishchi katalog - /tmp/sandbox-<uid> (0700, shu uid niki), ishdan keyin o'chiriladi; chiqish
+#     (stdout/stderr, 0600) shu katalogdagi fayllarga meros fd orqali yoziladi, shuning uchun RLIMIT_FSIZE
+#     uni ham cheklaydi. Ishlatilmagan tayyor sandboxlar jarayon to'xtaganda yopiladi (atexit)
+# Interpretatorni ishga tushirish (Node ~300 ms) so'rovdan oldin bajariladi: pulda oldindan ishga
+# tushirilgan jarayonlar kod kelishini kutib turadi (kod alohida pipe'dan, foydalanuvchi kiritishi - stdin).
+
+OUTPUT_MAX_BYTES = 64 * 1024
+UID_BASE = 200000  # Tizim foydalanuvchilari bilan to'qnashmaydigan oraliq
+UID_RANGE = 1000000
+
+PYTHON_BOOTSTRAP = r'''
+import os, sys, traceback
+code = os.fdopen(int(sys.argv.pop(1)), "rb").read().decode("utf-8", "replace")
+if not code:
+    sys.exit(0)
+try:
+    exec(compile(code, "main.py", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+except SystemExit:
+    raise
+except BaseException as e:
+    traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+    sys.exit(1)
+'''
+
+NODE_BOOTSTRAP = r'''
+const fs = require("fs"), path = require("path");
+const code = fs.readFileSync(Number(process.argv.splice(1, 1)[0]), "utf8");
+if (code) {
+    fs.writeFileSync("main.js", code);
+    require(path.resolve("main.js"));
+}
+'''
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _default_python():
+    # pyenv/virtualenv interpretatori /root ichida bo'lishi mumkin - `nobody` uni ishga tushira olmaydi
+    return '/usr/bin/python3' if os.path.exists('/usr/bin/python3') else sys.executable
+
+
+LANGUAGES = {
+    'python': {
+        'command': lambda: [_setting('LOCAL_EXECUTOR_PYTHON', _default_python()), '-I', '-S', '-c',
+                            PYTHON_BOOTSTRAP],
+        'memory_limit': ('RLIMIT_AS', 256 * 1024 * 1024),
+    },
+    'javascript': {
+        # V8 katta virtual manzil maydonini (PROT_NONE) band qiladi - RLIMIT_AS o'rniga RLIMIT_DATA: u faqat
+        # yoziladigan xususiy xotirani sanaydi (JS heap + Buffer/ArrayBuffer)
+        'command': lambda: [_setting('LOCAL_EXECUTOR_NODE', shutil.which('node') or 'node'),
+                            '--max-old-space-size=128', '-e', NODE_BOOTSTRAP],
+        'memory_limit': ('RLIMIT_DATA', 320 * 1024 * 1024),
+    },
+}
+
+
+class ExecResult:
+    __slots__ = ('stdout', 'stderr', 'exit_code', 'timed_out', 'duration_ms')
+
+    def __init__(self, stdout, stderr, exit_code, timed_out, duration_ms):
+        self.stdout = stdout
+        self.stderr = stderr
+        self.exit_code = exit_code
+        self.timed_out = timed_out
+        self.duration_ms = duration_ms
+
+
+def _limits(memory_limit, uid):
+    cpu = _setting('LOCAL_EXECUTOR_CPU_SECONDS', 3)
+    memory_resource, memory_bytes = memory_limit
+
+    def preexec():
+        os.setsid()  # Jarayon guruhi: killpg bilan hammasi birga o'ldiriladi
+        if uid is not None:
+            os.setgroups([])
+            os.setgid(uid)
+            os.setuid(uid)
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+        resource.setrlimit(resource.RLIMIT_FSIZE, (1024 * 1024, 1024 * 1024))
+        resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+        resource.setrlimit(resource.RLIMIT_NPROC, (128, 128))
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        limit = getattr(resource, memory_resource)
+        resource.setrlimit(limit, (memory_bytes, memory_bytes))
+    return preexec
+
+
+def _make_workdir():
+    """(katalog, uid). Root bo'lsa uid tasodifiy tanlanadi va /tmp/sandbox-<uid> atomik mkdir qilinadi:
+    katalog mavjud ekan (sandbox yopilguncha) bu uid boshqa hech bir jarayondagi sandboxga berilmaydi."""
+    if os.geteuid() != 0:
+        return tempfile.mkdtemp(prefix='sandbox-'), None  # LOCAL_EXECUTOR_ALLOW_SAME_USER
+    base = _setting('LOCAL_EXECUTOR_UID_BASE', UID_BASE)
+    for _ in range(100):
+        uid = base + secrets.randbelow(UID_RANGE)
+        path = os.path.join(tempfile.gettempdir(), f'sandbox-{uid}')
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            continue
+        os.chown(path, uid, uid)
+        return path, uid
+    raise OSError("Sandbox uchun bo'sh uid topilmadi")
+
+
+def _output_file(workdir, name):
+    # Ota jarayon (root) nomidan 0600: dastur unga faqat meros qolgan fd orqali yozadi
+    return os.fdopen(os.open(os.path.join(workdir, name), os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600), 'w+b')
+
+
+class Sandbox:
+    """Oldindan ishga tushirilgan, kod kutayotgan bitta jarayon (bir marta ishlatiladi)."""
+
+    def __init__(self, language):
+        spec = LANGUAGES[language]
+        self.language = language
+        self.process = None
+        self.workdir, uid = _make_workdir()
+        self._stdout = _output_file(self.workdir, 'stdout')
+        self._stderr = _output_file(self.workdir, 'stderr')
+        code_read, self._code_write = os.pipe()
+        env = {'PATH': '/usr/bin:/bin', 'HOME': self.workdir, 'LANG': 'C.UTF-8', 'PYTHONIOENCODING': 'utf-8'}
+        try:
+            self.process = subprocess.Popen(
+                ['unshare', '-rnp', '--fork', '--kill-child', *spec['command'](), str(code_read)],
+                stdin=subprocess.PIPE, stdout=self._stdout, stderr=self._stderr, cwd=self.workdir, env=env,
+                pass_fds=(code_read,), preexec_fn=_limits(spec['memory_limit'], uid),
+            )
+        except Exception:
+            os.close(self._code_write)
+            self.close()
+            raise
+        finally:
+            os.close(code_read)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def run(self, code, stdin='', timeout=None):
+        timeout = timeout or _setting('LOCAL_EXECUTOR_TIMEOUT', 5)
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            try:
+                os.write(self._code_write, code.encode())  # Jarayon kodni kutib o'qiyapti
+            finally:
+                os.close(self._code_write)
+            self.process.communicate(stdin.encode(), timeout=timeout)
+        except subprocess.TimeoutExpired:
+            timed_out = True
+        except (BrokenPipeError, OSError):
+            pass  # Jarayon kiritishni o'qimasdan tugadi
+        finally:
+            self._kill()
+        duration = (time.perf_counter() - started) * 1000
+        try:
+            return ExecResult(self._read(self._stdout), self._read(self._stderr), self.process.returncode,
+                              timed_out, duration)
+        finally:
+            self.close()
+
+    def _read(self, f):
+        f.seek(0)
+        return f.read(OUTPUT_MAX_BYTES).decode('utf-8', errors='replace')
+
+    def _kill(self):
+        """Butun jarayon guruhi (setsid) + PID namespace: unshare o'lsa --kill-child ichidagilarni ham o'ldiradi."""
+        if self.process is None:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        self.process.wait()
+
+    def close(self):
+        self._kill()
+        self._stdout.close()
+        self._stderr.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class SandboxPool:
+    """Har bir til uchun `size` ta tayyor jarayon; olingani o'rniga fon oqimida yangisi ishga tushadi."""
+
+    def __init__(self, language, size):
+        self.language = language
+        self.size = size
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._refilling = False
+        self._closed = False
+
+    def acquire(self):
+        while True:
+            try:
+                sandbox = self._idle.get_nowait()
+            except queue.Empty:
+                sandbox = Sandbox(self.language)  # Pul bo'sh - sovuq start
+            self._refill()
+            if sandbox.alive():
+                return sandbox
+            sandbox.close()
+
+    def warm(self):
+        self._refill()
+
+    def close(self):
+        """Kutib turgan sandboxlarni yopadi (jarayon to'xtaganda - /tmp da katalog qolmasin)."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _refill(self):
+        with self._lock:
+            if self._closed or self._refilling or self._idle.qsize() >= self.size:
+                return
+            self._refilling = True
+        threading.Thread(target=self._fill, name=f'sandbox-warm-{self.language}', daemon=True).start()
+
+    def _fill(self):
+        try:
+            while not self._closed and self._idle.qsize() < self.size:
+                sandbox = Sandbox(self.language)
+                if self._closed:
+                    sandbox.close()  # close() paytida ishga tushayotgan edi
+                    break
+                self._idle.put(sandbox)
+        except Exception as e:
+            print(f"SANDBOX WARM ERROR: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_available = None
+
+
+def is_available():
+    """Lokal backend ishlay oladimi: yoqilgan, Linux, `unshare -rnp` ruxsat etilgan (bir marta tekshiriladi)."""
+    global _available
+    if not _setting('LOCAL_EXECUTOR_ENABLED', True) or resource is None or not shutil.which('unshare'):
+        return False
+    if os.geteuid() != 0 and not _setting('LOCAL_EXECUTOR_ALLOW_SAME_USER', False):
+        return False  # Foydalanuvchini almashtira olmaymiz - kod server fayllarini o'qiy olardi
+    if _available is None:
+        try:
+            _available = subprocess.run(['unshare', '-rnp', '--fork', '--kill-child', 'true'],
+                                        timeout=5).returncode == 0
+        except (OSError, subprocess.SubprocessError):
+            _available = False
+    return _available
+
+
+def supports(language):
+    return language in LANGUAGES and is_available()
+
+
+def get_pool(language):
+    pool = _pools.get(language)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(language)
+            if pool is None:
+                pool = _pools[language] = SandboxPool(language, _setting('LOCAL_EXECUTOR_WARM', 2))
+                pool.warm()
+    return pool
+
+
+@atexit.register
+def close_pools():
+    for pool in list(_pools.values()):
+        pool.close()
+
+
+def execute(language, code, stdin=''):
+    """Kodni tayyor sandboxda bajaradi. Qaytaradi: ExecResult."""
+    return get_pool(language).acquire().run(code, stdin)
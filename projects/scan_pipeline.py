@@ -0,0 +1,298 @@
+import hashlib
+import mmap
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .archive_manifest import extract_project_manifest, is_archive
+from .archive_scan import scan_archive
+from .chunk_scan import scan_chunks
+from .code_index import build_project_index
+from .models import Project, ScanFinding, ScanVerdict
+from .prescan import DANGER, SAFE, prescan_file
+from .security import (
+    INCONCLUSIVE_AI_PREFIXES, lookup_virustotal_hash, scan_with_gemini, scan_with_virustotal,
+)
+from .source_cache import get_source_cache
+
+
+# ==========================================
+# XAVFSIZLIK SKANI PIPELINE'I
+# ==========================================
+# Fayl bir marta yuklanadi (source_cache: diskka oqim bilan) -> ScanArtifact.
+# Barcha bosqichlar shu bitta lokal faylni o'qiydi:
+#   lokal tekshiruv (matn/binar, prescan.py) -> Gemini (faqat UNSURE; 10 KB dan katta fayllar chunk_scan.py da,
+#                                                zip/tar arxivlar a'zoma-a'zo archive_scan.py da)
+#                                            | VirusTotal (fayldan oqim bilan upload)
+# Gemini va VirusTotal bir-biriga bog'liq emas, shuning uchun parallel ishlaydi.
+# Undan oldin sha256 bo'yicha ScanVerdict keshi tekshiriladi: bir xil fayl qayta yuklansa hukm
+# darhol qo'yiladi. VirusTotal ham avval /files/{sha256} bilan so'raladi, upload faqat yangi fayl uchun.
+
+GEMINI_SLICE_BYTES = 10000
+BINARY_SNIFF_BYTES = 8192
+STALE_SCAN_COPY_SECONDS = 24 * 3600
+LOCAL_SAFE_RESULT = ("SAFE: Lokal tahlil - fayl o'chirish, buyruq bajarish, reverse shell, keylogger "
+                     "yoki yashirilgan kod topilmadi.")
+
+
+class ScanError(Exception):
+    """Qayta urinish mumkin bo'lgan xato (masalan, faylni yuklab bo'lmadi)."""
+
+
+class ScanArtifact:
+    """Skan uchun yuklangan faylning lokal nusxasi (source_cache blobi yoki lokal storage fayli)."""
+
+    def __init__(self, path, name, sha256=None, private=False):
+        self.path = path
+        self.name = name
+        self.private = private  # Skanning shaxsiy nusxasi - release_artifact o'chiradi
+        self.size = os.path.getsize(path)
+        self._sha256 = sha256
+
+    @property
+    def sha256(self):
+        if self._sha256 is None:
+            digest = hashlib.sha256()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._sha256 = digest.hexdigest()
+        return self._sha256
+
+    def read_slice(self, length, offset=0):
+        """Faylning [offset, offset+length) qismi - mmap orqali, butun fayl xotiraga o'qilmaydi."""
+        if self.size == 0:
+            return b''
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return mm[offset:offset + length]
+
+    def is_text(self):
+        return b'\x00' not in self.read_slice(BINARY_SNIFF_BYTES)
+
+    def open(self):
+        return open(self.path, 'rb')
+
+
+def fetch_artifact(project):
+    """Skan uchun fayl. Kesh blobi skanga shaxsiy nusxa sifatida beriladi (chaqiruvchi release_artifact qiladi):
+    boshqa so'rovdagi SourceCache._evict blobni o'chirsa ham mmap / arxiv jarayonlari o'qishda davom etadi."""
+    cache = get_source_cache()
+    path = cache.get_path(project.source_code)
+    if not path:
+        raise ScanError("Faylni serverdan yuklab bo'lmadi")
+    if os.path.dirname(path) != os.path.join(cache.root, 'blobs'):
+        return ScanArtifact(path, project.source_code.name)  # Lokal storage fayli - kesh uni o'chirmaydi
+    # Kesh bloblari sha256 bilan nomlangan - xeshni qayta hisoblash shart emas
+    known_sha = os.path.basename(path)
+    scans_dir = os.path.join(cache.root, 'scans')  # _evict faqat blobs/ ni tozalaydi
+    os.makedirs(scans_dir, exist_ok=True)
+    private = os.path.join(scans_dir, uuid.uuid4().hex)
+    _purge_stale(scans_dir)
+    try:
+        os.link(path, private)  # Bir xil disk: nusxalanmaydi, blob o'chirilsa ham inode qoladi
+    except FileNotFoundError:
+        raise ScanError("Kesh fayli skan boshlanishidan oldin o'chirildi")
+    except OSError:
+        shutil.copyfile(path, private)  # Hard link mumkin bo'lmagan fayl tizimi
+    return ScanArtifact(private, project.source_code.name, sha256=known_sha, private=True)
+
+
+def _purge_stale(scans_dir):
+    """Jarayon o'ldirilib (SIGKILL/OOM) o'chirilmay qolgan nusxalar."""
+    cutoff = time.time() - STALE_SCAN_COPY_SECONDS
+    for entry in os.scandir(scans_dir):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def release_artifact(artifact):
+    if artifact.private:
+        try:
+            os.remove(artifact.path)
+        except OSError:
+            pass
+
+
+# --- Bosqichlar (har biri faqat artifact'ni o'qiydi) ---
+def gemini_stage(artifact):
+    if is_archive(artifact.name):
+        report = scan_archive(artifact)  # ArchiveReport; 7z/rar uchun None
+        if report is not None:
+            return report
+    if not artifact.is_text():
+        return "Fayl matn formatida emas (Binary), faqat VirusTotal tekshiradi."
+    # Lokal AST/regex tahlili aniq hukm bersa Gemini chaqirilmaydi
+    local = prescan_file(artifact.path, artifact.name, artifact.size)
+    if local.verdict == SAFE:
+        return LOCAL_SAFE_RESULT
+    if local.verdict == DANGER:
+        return f"DANGER: Lokal tahlil - {local.summary()}"
+    if artifact.size > GEMINI_SLICE_BYTES:
+        # Katta fayl: birinchi 10 KB emas, butun fayl bo'laklab tekshiriladi
+        return scan_chunks(artifact)
+    code_content = artifact.read_slice(GEMINI_SLICE_BYTES).decode('utf-8', errors='ignore')
+    return scan_with_gemini(code_content)
+
+
+def virustotal_stage(artifact):
+    known = lookup_virustotal_hash(artifact.sha256)
+    if known:
+        return known
+    return scan_with_virustotal(artifact.path, os.path.basename(artifact.name))
+
+
+def decide_verdict(ai_result, vt_status):
+    """Qaytaradi: (security_status, muzlatish_kerakmi)"""
+    is_dangerous_ai = "DANGER" in str(ai_result)
+    is_dangerous_vt = vt_status and "malicious" in str(vt_status).lower()
+    if is_dangerous_ai or is_dangerous_vt:
+        return 'danger', True
+    if "SAFE" in str(ai_result):
+        return 'safe', False
+    return 'warning', None
+
+
+def is_cacheable_verdict(status, ai_result):
+    """Faqat yakuniy hukmlar keshlanadi: 'warning' va AI tahlil qilmagan "SAFE" lar har safar qayta tekshiriladi."""
+    if status == 'danger':
+        return True
+    return status == 'safe' and not str(ai_result).startswith(INCONCLUSIVE_AI_PREFIXES)
+
+
+def cached_verdict(sha256):
+    verdict = ScanVerdict.objects.filter(sha256=sha256).first()
+    if verdict:
+        ScanVerdict.objects.filter(pk=verdict.pk).update(hits=F('hits') + 1)
+    return verdict
+
+
+def store_verdict(artifact, project):
+    ScanVerdict.objects.update_or_create(sha256=artifact.sha256, defaults={
+        'size': artifact.size,
+        'security_status': project.security_status,
+        'ai_analysis': project.ai_analysis or '',
+        'virustotal_link': project.virustotal_link,
+    })
+
+
+def replace_findings(project, findings):
+    """Loyihaning ScanFinding lari oxirgi to'liq skan natijasi bilan almashtiriladi."""
+    ScanFinding.objects.filter(project=project).delete()
+    ScanFinding.objects.bulk_create([
+        ScanFinding(project=project, path=f.path[:500], size=f.size, verdict=f.verdict.lower(),
+                    reasons=f.reasons, ai_result=str(f.result or ''))
+        for f in findings
+    ])
+
+
+VERDICT_FIELDS = ['is_scanned', 'security_status', 'is_frozen', 'ai_analysis', 'virustotal_link']
+
+
+def _apply_verdict(project, status, freeze):
+    project.is_scanned = True
+    project.security_status = status
+    if freeze:
+        project.is_frozen = True
+    elif status == 'safe' and project.is_frozen and project.reports_count < 10:
+        project.is_frozen = False
+
+
+def _save_verdict(project, source_name, status, freeze, findings):
+    """Hukmni faqat skan qilingan fayl hali loyihada bo'lsa va faqat VERDICT_FIELDS ni yozadi: skan bir necha
+    daqiqa davom etadi, shu orada muallif tahrirlagan maydonlar (yoki yangi fayl) eski nusxa bilan bosilmaydi.
+    Fayl almashgan bo'lsa hukm tashlanadi - yangi fayl uchun navbatda alohida ish bor."""
+    with transaction.atomic():
+        current = (Project.objects.select_for_update().filter(pk=project.pk)
+                   .values('source_code', 'is_frozen', 'reports_count').first())
+        if current is None or current['source_code'] != source_name:
+            return False
+        project.is_frozen, project.reports_count = current['is_frozen'], current['reports_count']
+        _apply_verdict(project, status, freeze)
+        project.save(update_fields=VERDICT_FIELDS)
+        replace_findings(project, findings)
+    return True
+
+
+def run_security_scan(project_id, raise_errors=False, use_cache=True):
+    """
+    Skan pipeline'i. raise_errors=True da xato yutilmaydi - scan_queue uni backoff bilan qayta urinadi.
+    use_cache=False - sha256 keshiga qaramasdan to'liq skan (admin qayta skan so'raganda), natija keshni yangilaydi.
+    """
+    source_name = None
+    try:
+        project = Project.objects.get(id=project_id)
+        if not project.source_code:
+            return
+        source_name = project.source_code.name
+
+        # --- 1. BITTA YUKLASH (keyingi barcha bosqichlar shu lokal faylni o'qiydi) ---
+        artifact = fetch_artifact(project)
+
+        try:
+            # --- 2. ARXIV MANIFESTI VA AI UCHUN KOD INDEKSI (o'sha fayldan, qayta yuklamasdan) ---
+            try:
+                extract_project_manifest(project, artifact.path)
+            except Exception as e:
+                print(f"MANIFEST ERROR: {e}")
+            try:
+                build_project_index(project, artifact)
+            except Exception as e:
+                print(f"CODE INDEX ERROR: {e}")
+
+            # --- 3. SHA256 KESHI (bir xil mazmun avval tekshirilgan bo'lsa - tashqi API chaqirilmaydi) ---
+            verdict = cached_verdict(artifact.sha256) if use_cache else None
+            if verdict:
+                project.ai_analysis = verdict.ai_analysis
+                project.virustotal_link = verdict.virustotal_link
+                # Eski fayl bo'yicha topilmalar endi tegishli emas
+                _save_verdict(project, source_name, verdict.security_status, verdict.security_status == 'danger', [])
+                return
+
+            # --- 4. GEMINI + VIRUSTOTAL (parallel) ---
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='scan-stage') as pool:
+                ai_future = pool.submit(gemini_stage, artifact)
+                vt_future = pool.submit(virustotal_stage, artifact)
+                try:
+                    ai_result = ai_future.result()
+                except Exception as e:
+                    ai_result = f"AI Xatosi: {e}"
+                vt_link, vt_status = vt_future.result()
+            findings = getattr(ai_result, 'findings', [])
+            ai_result = str(ai_result)
+
+            # --- 5. NATIJALARNI SAQLASH VA HUKM ---
+            project.ai_analysis = ai_result
+            project.virustotal_link = vt_link
+            status, freeze = decide_verdict(ai_result, vt_status)
+            _save_verdict(project, source_name, status, freeze, findings)
+
+            if is_cacheable_verdict(status, ai_result):
+                store_verdict(artifact, project)
+        finally:
+            release_artifact(artifact)
+
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"CRITICAL SCAN ERROR: {e}")
+        try:
+            p = Project.objects.get(id=project_id)
+            if source_name is None or p.source_code.name == source_name:
+                p.is_scanned = True
+                p.security_status = 'warning'
+                p.ai_analysis = f"Tizim xatoligi yuz berdi: {str(e)}."
+                p.save(update_fields=['is_scanned', 'security_status', 'ai_analysis'])
+        except Exception:
+            pass
+
+    finally:
+        # MUHIM: Orqa fon oqimi tugagach, DB ulanishini majburiy yopamiz!
+        close_old_connections()
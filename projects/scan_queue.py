@@ -0,0 +1,196 @@
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Project, ScanJob
+
+
+# ==========================================
+# XAVFSIZLIK SKANI NAVBATI (bazada)
+# ==========================================
+# Yuklashda faqat ScanJob qatori yoziladi (yuklash tranzaksiyasi bilan birga - yo'qolmaydi).
+# run_scan_worker ishlarni "claim" qiladi: shartli UPDATE (status + lease) orqali, shuning uchun
+# bir nechta worker bitta ishni ikki marta olmaydi. Ishlayotgan ishlarning lease'i heartbeat bilan
+# uzaytiriladi; worker o'lsa lease tugaydi va ish boshqa worker tomonidan qayta olinadi.
+# Xato bo'lsa: eksponensial backoff (+ jitter) bilan qayta navbatga, max_attempts dan keyin 'failed'.
+
+PRIORITY_HIGH = 10    # Admin qayta skan so'ragan
+PRIORITY_NORMAL = 0   # Yangi yuklash
+PRIORITY_LOW = -10    # Ommaviy qayta skan / backfill
+
+BACKOFF_BASE_SECONDS = 30
+BACKOFF_MAX_SECONDS = 3600
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def lease_seconds():
+    return _setting('SCAN_JOB_LEASE_SECONDS', 300)
+
+
+def enqueue_scan(project_id, priority=PRIORITY_NORMAL):
+    """Navbatda turgan ish bo'lsa yangisi yaratilmaydi (faqat prioriteti ko'tariladi). Bajarilayotgan ish
+    bilan birlashtirilmaydi: u loyihani eski fayl bilan o'qigan - yangi fayl uchun alohida QUEUED ish kerak
+    (eski ish tugaganda fayl almashganini ko'rib hukmini yozmaydi, scan_pipeline._save_verdict)."""
+    pending = ScanJob.objects.filter(project_id=project_id, status=ScanJob.QUEUED)
+    if pending.update(priority=Greatest(F('priority'), Value(priority)), run_after=timezone.now()):
+        return pending.first()
+    return ScanJob.objects.create(project_id=project_id, priority=priority,
+                                  max_attempts=_setting('SCAN_JOB_MAX_ATTEMPTS', 4))
+
+
+def _claimable(now):
+    return Q(status=ScanJob.QUEUED, run_after__lte=now) | Q(status=ScanJob.RUNNING, lease_expires__lt=now)
+
+
+def claim_jobs(worker_id, limit):
+    """Eng yuqori prioritetli `limit` tagacha ishni shu workerga biriktiradi."""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    candidates = list(
+        ScanJob.objects.filter(_claimable(now)).order_by('-priority', 'run_after', 'id')
+        .values_list('id', flat=True)[:limit * 3]
+    )
+    claimed = []
+    for pk in candidates:
+        if len(claimed) >= limit:
+            break
+        # Compare-and-set: boshqa worker ulgurib olgan bo'lsa 0 qator yangilanadi
+        won = ScanJob.objects.filter(_claimable(now), pk=pk).update(
+            status=ScanJob.RUNNING, locked_by=worker_id, attempts=F('attempts') + 1,
+            lease_expires=now + timedelta(seconds=lease_seconds()),
+        )
+        if won:
+            claimed.append(pk)
+    return list(ScanJob.objects.filter(pk__in=claimed).order_by('-priority', 'run_after', 'id'))
+
+
+def heartbeat(worker_id, job_ids):
+    if not job_ids:
+        return 0
+    return ScanJob.objects.filter(pk__in=job_ids, locked_by=worker_id, status=ScanJob.RUNNING).update(
+        lease_expires=timezone.now() + timedelta(seconds=lease_seconds())
+    )
+
+
+def backoff_seconds(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def complete_job(job, worker_id):
+    ScanJob.objects.filter(pk=job.pk, locked_by=worker_id, status=ScanJob.RUNNING).update(
+        status=ScanJob.DONE, finished_at=timezone.now(), lease_expires=None, last_error='',
+    )
+
+
+def fail_job(job, worker_id, error):
+    """Qayta urinish (backoff) yoki oxirgi urinishda 'failed' + loyihani 'warning' holatiga o'tkazish."""
+    jobs = ScanJob.objects.filter(pk=job.pk, locked_by=worker_id, status=ScanJob.RUNNING)
+    message = str(error)[:2000]
+    if job.attempts < job.max_attempts:
+        jobs.update(status=ScanJob.QUEUED, lease_expires=None, last_error=message,
+                    run_after=timezone.now() + timedelta(seconds=backoff_seconds(job.attempts)))
+        return False
+    if jobs.update(status=ScanJob.FAILED, finished_at=timezone.now(), lease_expires=None, last_error=message):
+        Project.objects.filter(pk=job.project_id, is_scanned=False).update(
+            is_scanned=True, security_status='warning',
+            ai_analysis=f"Tizim xatoligi yuz berdi: {message[:500]}.",
+        )
+    return True
+
+
+def run_job(job, worker_id):
+    from .scan_pipeline import run_security_scan
+    try:
+        if job.attempts > job.max_attempts:
+            # Worker bir necha marta shu ish ustida o'lgan (lease tugagan) - boshqa urinmaymiz
+            fail_job(job, worker_id, 'Lease bir necha marta tugadi')
+            return
+        try:
+            # Admin so'ragan qayta skan sha256 keshini chetlab o'tadi (va uni yangilaydi)
+            run_security_scan(job.project_id, raise_errors=True, use_cache=job.priority < PRIORITY_HIGH)
+        except Project.DoesNotExist:
+            pass  # Loyiha o'chirilgan - bajariladigan ish yo'q
+        except Exception as e:
+            fail_job(job, worker_id, e)
+            return
+        complete_job(job, worker_id)
+    finally:
+        close_old_connections()
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'[:64]
+
+
+class ScanWorker:
+    """Navbatni `concurrency` ta parallel skan bilan bajaradi (run_scan_worker buyrug'i)."""
+
+    def __init__(self, concurrency=None, poll_interval=2.0, worker_id=None, stdout=None):
+        self.concurrency = concurrency or _setting('SCAN_WORKER_CONCURRENCY', 2)
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or default_worker_id()
+        self.stdout = stdout
+        self._running = {}  # job_id -> Future
+        self._stop = threading.Event()
+
+    def _log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def run(self, once=False, max_jobs=None):
+        """
+        once=True: navbat bo'shagach chiqadi (cron uchun); max_jobs: shuncha ish olgach to'xtaydi.
+        Qaytaradi: olingan ishlar soni.
+        """
+        processed = 0
+        last_heartbeat = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='scan') as pool:
+            while not self._stop.is_set():
+                self._running = {pk: f for pk, f in self._running.items() if not f.done()}
+
+                free = self.concurrency - len(self._running)
+                if max_jobs is not None:
+                    free = min(free, max_jobs - processed)
+                jobs = claim_jobs(self.worker_id, free)
+                for job in jobs:
+                    self._log(f"Skan boshlandi: #{job.pk} (loyiha {job.project_id}, urinish {job.attempts})")
+                    self._running[job.pk] = pool.submit(run_job, job, self.worker_id)
+                processed += len(jobs)
+
+                if time.monotonic() - last_heartbeat >= lease_seconds() / 3:
+                    heartbeat(self.worker_id, list(self._running))
+                    last_heartbeat = time.monotonic()
+
+                if (once or max_jobs is not None) and not jobs and not self._running:
+                    break
+                close_old_connections()
+                self._stop.wait(self.poll_interval if not jobs else 0.05)
+            # To'xtatish so'ralganda: boshlangan ishlar tugashini kutamiz (lease'ni yangilab)
+            while any(not f.done() for f in self._running.values()):
+                heartbeat(self.worker_id, [pk for pk, f in self._running.items() if not f.done()])
+                time.sleep(min(self.poll_interval, 1.0))
+        close_old_connections()
+        return processed
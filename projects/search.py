@@ -0,0 +1,153 @@
+import re
+
+from django.db import connection
+from django.db.models import Q, F, FloatField, Value, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+
+
+# ==========================================
+# QIDIRUV BACKENDLARI (PostgreSQL tsvector / SQLite FTS5)
+# ==========================================
+# Har bir backend queryset'ni filtrlaydi va `search_rank` (katta = mosroq) annotatsiyasini qo'shadi,
+# shuning uchun home/global_search filtrlar va keyset paginatsiya ('-search_rank', '-id') bilan ishlaydi.
+# Indeks signallar orqali yangilanadi (models.py), to'liq qayta qurish: rebuild_search_index.
+
+SEARCH_KEYS = ('-search_rank', '-id')
+FTS_TABLE = 'projects_project_fts'
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _terms(query):
+    """So'rovni xavfsiz so'zlarga ajratadi (FTS operatorlari va tirnoqlar tashlab yuboriladi)."""
+    return [t.lower() for t in _TERM_RE.findall(query or '')][:MAX_TERMS]
+
+
+class SearchBackend:
+    """Asosiy interfeys. Yangi backend shu metodlarni qayta yozadi."""
+    vendor = None
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index_projects(self, projects):
+        pass
+
+    def remove_projects(self, project_ids):
+        pass
+
+    def rebuild(self):
+        from .models import Project
+        self.index_projects(Project.objects.select_related('author'))
+
+
+class LegacySearchBackend(SearchBackend):
+    """Indekssiz zaxira varianti: icontains bo'yicha (FTS bo'lmagan bazalar uchun)."""
+
+    def search(self, queryset, query):
+        words = query.split()
+        lookup = (
+            Q(title__icontains=query) |
+            Q(description__icontains=query) |
+            Q(author__username__icontains=query)
+        )
+        for word in words:
+            lookup |= Q(title__icontains=word) | Q(description__icontains=word)
+        return queryset.filter(lookup).distinct().annotate(search_rank=F('views') * Value(1.0, FloatField()))
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Saqlangan, vaznli tsvector (title=A, description=B, author=C) + GIN indeks (0006 migratsiya)."""
+    vendor = 'postgresql'
+    config = 'simple'  # O'zbek tili uchun lug'at yo'q, shuning uchun stemming'siz
+
+    def _vector(self):
+        from django.contrib.postgres.search import SearchVector
+        return (SearchVector('title', weight='A', config=self.config) +
+                SearchVector('description', weight='B', config=self.config) +
+                SearchVector('author__username', weight='C', config=self.config))
+
+    def search(self, queryset, query):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        terms = _terms(query)
+        if not terms:
+            return queryset.none()
+        # Har bir so'z prefiks bo'yicha, so'zlar orasida OR (eski qidiruv semantikasi)
+        search_query = SearchQuery(' | '.join(f'{t}:*' for t in terms), search_type='raw', config=self.config)
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        )
+
+    def index_projects(self, projects):
+        from .models import Project
+        ids = [p.pk for p in projects]
+        # author__username boshqa jadvalda, shuning uchun vektor korrelyatsiyalangan subquery orqali yoziladi
+        vector = Project.objects.filter(pk=OuterRef('pk')).annotate(v=self._vector()).values('v')
+        for start in range(0, len(ids), 1000):
+            Project.objects.filter(pk__in=ids[start:start + 1000]).update(search_vector=Subquery(vector))
+
+
+class SQLiteFTS5SearchBackend(SearchBackend):
+    """FTS5 soya jadvali (rowid = project.id), bm25 bo'yicha tartiblanadi."""
+    vendor = 'sqlite'
+    weights = (10.0, 3.0, 1.0)  # title, description, author
+
+    def _match(self, terms):
+        return ' OR '.join(f'"{t}"*' for t in terms)
+
+    def search(self, queryset, query):
+        terms = _terms(query)
+        if not terms:
+            return queryset.none()
+        match = self._match(terms)
+        weights = ', '.join(str(w) for w in self.weights)
+        # FTS jadvali bilan JOIN: moslar va bm25 bitta FTS so'rovida hisoblanadi.
+        # bm25: kichik = mosroq, shuning uchun ishorasini almashtiramiz
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = projects_project.id'],
+            params=[match],
+        ).annotate(search_rank=RawSQL(f'-bm25({FTS_TABLE}, {weights})', (), output_field=FloatField()))
+
+    def index_projects(self, projects):
+        rows = [(p.pk, p.title, p.description, p.author.username) for p in projects]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(r[0],) for r in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, description, author) VALUES (%s, %s, %s, %s)', rows
+            )
+
+    def remove_projects(self, project_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in project_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        super().rebuild()
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteFTS5SearchBackend,
+}
+
+
+_fts_ready = None
+
+
+def _fts5_ready():
+    """SQLite FTS5 kengaytmasi bo'lmasa migratsiya jadvalni yaratmaydi - unda zaxira backend ishlaydi."""
+    global _fts_ready
+    if _fts_ready is None:
+        _fts_ready = FTS_TABLE in connection.introspection.table_names()
+    return _fts_ready
+
+
+def get_search_backend():
+    if connection.vendor == 'sqlite' and not _fts5_ready():
+        return LegacySearchBackend()
+    return BACKENDS.get(connection.vendor, LegacySearchBackend)()
@@ -1,5 +1,7 @@
 import os
-import requests
+import uuid
+
+from .http_client import get_client
 # YANGI KUTUBXONA
 from google import genai
 from django.conf import settings
@@ -8,18 +10,26 @@ from django.conf import settings
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY") or getattr(settings, 'GEMINI_API_KEY', None)
 VT_API_KEY = os.environ.get("VT_API_KEY") or getattr(settings, 'VT_API_KEY', None)
 
+# AI haqiqatda tahlil qilmagan javoblar: bunday "SAFE" hukm sha256 keshiga yozilmaydi
+AI_NO_KEY = "SAFE: Tahlil qilinmadi (API kalit yo'q)"
+AI_NO_ANSWER = "SAFE: AI javob bermadi."
+AI_ERROR_PREFIX = "SAFE: AI Xatosi"
+INCONCLUSIVE_AI_PREFIXES = (AI_NO_KEY, AI_NO_ANSWER, AI_ERROR_PREFIX)
+
 
-def scan_with_gemini(code_content):
+def scan_with_gemini(code_content, context=''):
     """
     Kod mantiqini Gemini 2.5 Flash orqali tekshirish.
+    context - katta fayl bo'lagi uchun izoh (masalan, "main.py, 1200-1450 qatorlar"), chunk_scan beradi.
     """
     if not GEMINI_API_KEY:
         print("DEBUG: Gemini API Key topilmadi.")
-        return "SAFE: Tahlil qilinmadi (API kalit yo'q)"
+        return AI_NO_KEY
 
     try:
         # 1. Client yaratamiz
         client = genai.Client(api_key=GEMINI_API_KEY)
+        part_note = f"Bu katta faylning bir qismi: {context}." if context else ""
 
         prompt = f"""
         Sen kiberxavfsizlik ekspertisan. Quyidagi dastur kodini tahlil qil.
@@ -32,6 +42,7 @@ def scan_with_gemini(code_content):
 
         Agar kod xavfsiz bo'lsa "SAFE" deb javob ber.
         Javobingda faqat xulosa va qisqa izoh (o'zbek tilida) bo'lsin.
+        {part_note}
 
         KOD:
         {code_content[:10000]} 
@@ -46,43 +57,116 @@ def scan_with_gemini(code_content):
         # 3. Javobni qaytaramiz
         if response.text:
             return response.text
-        return "SAFE: AI javob bermadi."
+        return AI_NO_ANSWER
 
     except Exception as e:
         # Xatolik bo'lsa ham sayt to'xtab qolmasligi uchun "SAFE" qaytaramiz
         print(f"Gemini Xatosi: {e}")
-        return f"SAFE: AI Xatosi ({str(e)})"
+        return f"{AI_ERROR_PREFIX} ({str(e)})"
+
 
+class _MultipartFile:
+    """
+    multipart/form-data tanasi fayldan bo'lib-bo'lib o'qiladi (requests `len` + `read()` orqali
+    Content-Length bilan oqim qilib yuboradi) - fayl xotiraga to'liq yuklanmaydi.
+    """
 
-def scan_with_virustotal(file_url, file_name):
+    def __init__(self, path, field, filename):
+        self.boundary = uuid.uuid4().hex
+        self._head = (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode()
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode()
+        self._file = open(path, 'rb')
+        self.len = len(self._head) + os.path.getsize(path) + len(self._tail)
+        self._parts = [self._head, None, self._tail]
+
+    @property
+    def content_type(self):
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def read(self, size=-1):
+        out = b''
+        while self._parts and (size < 0 or len(out) < size):
+            part = self._parts[0]
+            want = -1 if size < 0 else size - len(out)
+            if part is None:
+                chunk = self._file.read(want)
+                if not chunk:
+                    self._parts.pop(0)
+                out += chunk
+            else:
+                chunk = part if want < 0 else part[:want]
+                rest = part[len(chunk):]
+                if rest:
+                    self._parts[0] = rest
+                else:
+                    self._parts.pop(0)
+                out += chunk
+        return out
+
+    def close(self):
+        self._file.close()
+
+
+def _vt_gui_link(file_id):
+    return f"https://www.virustotal.com/gui/file/{file_id}"
+
+
+def lookup_virustotal_hash(sha256):
+    """
+    Upload'dan oldin: VirusTotal bu faylni (sha256 bo'yicha) allaqachon bilsa, tayyor natija.
+    Qaytaradi: (link, status) yoki None (fayl VT da yo'q yoki javob olinmadi -> upload qilinadi).
     """
-    Faylni Cloudinary URL orqali yuklab olib, VirusTotalga yuborish.
-    (Bu funksiya o'zgarishsiz qoladi)
+    if not VT_API_KEY:
+        return None
+    try:
+        response = get_client('virustotal').get(f"https://www.virustotal.com/api/v3/files/{sha256}",
+                                                headers={"x-apikey": VT_API_KEY}, timeout=(5, 15))
+        if response.status_code != 200:
+            return None  # 404 - VT bu faylni ko'rmagan
+        attributes = response.json()['data'].get('attributes', {})
+    except Exception:
+        return None
+
+    stats = attributes.get('last_analysis_stats') or {}
+    if not stats:
+        return None  # Hali tahlil qilinmagan (navbatda) - upload natijasini kutamiz
+    if stats.get('malicious', 0) > 0:
+        status = f"malicious ({stats['malicious']} ta antivirus)"
+    elif stats.get('suspicious', 0) > 0:
+        status = f"suspicious ({stats['suspicious']} ta antivirus)"
+    else:
+        status = "clean"
+    return _vt_gui_link(sha256), status
+
+
+def scan_with_virustotal(file_path, file_name):
+    """
+    Skan pipeline'i yuklagan lokal faylni VirusTotalga yuboradi (qayta yuklab olmasdan, oqim bilan).
     """
     if not VT_API_KEY:
         return None, "VirusTotal API Key topilmadi"
 
     vt_url = "https://www.virustotal.com/api/v3/files"
-    headers = {"x-apikey": VT_API_KEY}
+    body = None
 
     try:
-        print(f"VirusTotal uchun fayl yuklanmoqda: {file_url}")
-        file_response = requests.get(file_url, timeout=30)
-
-        if file_response.status_code != 200:
-            return None, "Faylni serverdan yuklab bo'lmadi"
-
-        file_content = file_response.content
-        files = {"file": (file_name, file_content)}
-
-        response = requests.post(vt_url, headers=headers, files=files)
+        body = _MultipartFile(file_path, 'file', file_name)
+        headers = {"x-apikey": VT_API_KEY, "Content-Type": body.content_type}
+        response = get_client('virustotal').post(vt_url, headers=headers, data=body, timeout=(5, 120))
 
         if response.status_code == 200:
             json_resp = response.json()
             file_id = json_resp['data']['id']
-            return f"https://www.virustotal.com/gui/file/{file_id}", "success"
+            return _vt_gui_link(file_id), "success"
         else:
             return None, f"VT Xatosi: {response.status_code}"
 
     except Exception as e:
-        return None, str(e)
\ No newline at end of file
+        return None, str(e)
+    finally:
+        if body:
+            body.close()
@@ -41,6 +41,7 @@ class ProfileSerializer(serializers.ModelSerializer):
 class ProjectSerializer(serializers.ModelSerializer):
     author_name = serializers.CharField(source='author.username', read_only=True)
     author_avatar = serializers.SerializerMethodField()
+    average_rating = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Project
@@ -48,10 +49,14 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'slug', 'title', 'description', 'image', 'source_code', 'price',
             'author_name', 'author_avatar', 'category',
-            'youtube_link', 'views', 'security_status', 'is_scanned', 'created_at'
+            'youtube_link', 'views', 'security_status', 'is_scanned', 'created_at',
+            'likes_count', 'saves_count', 'buyers_count', 'comments_count', 'rating_count', 'average_rating',
+            'trending_score'
         ]
         # source_code faqat yuklash uchun ishlaydi, ro'yxatda ko'rinmaydi
         extra_kwargs = {'source_code': {'write_only': True}}
+        # Hisoblagichlarni faqat server yangilaydi
+        read_only_fields = Project.COUNTER_FIELDS + ('trending_score',)
 
     def get_author_avatar(self, obj):
         request = self.context.get('request')
@@ -85,6 +90,22 @@ class ProjectSerializer(serializers.ModelSerializer):
         return data
 
 
+# Bitta loyiha (detail) uchun: arxiv manifesti ham qo'shiladi (ro'yxatda og'ir bo'lgani uchun yo'q)
+class ProjectDetailSerializer(ProjectSerializer):
+    source_manifest = serializers.SerializerMethodField()
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ['source_manifest']
+
+    def get_source_manifest(self, obj):
+        # previews - kalit fayllarning boshi (pullik kod): faqat sotib olganlarga, sahifadagi has_bought kabi
+        manifest = obj.source_manifest
+        request = self.context.get('request')
+        if not manifest or obj.has_full_access(getattr(request, 'user', None)):
+            return manifest
+        return {key: value for key, value in manifest.items() if key != 'previews'}
+
+
 # Izohlar uchun
 class CommentSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
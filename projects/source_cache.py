@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+from .http_client import get_client
+
+
+# ==========================================
+# MANBA KODI KESHI (Cloudinary fayllari uchun lokal disk)
+# ==========================================
+# blobs/<sha256>  - fayl mazmuni (content-addressed: bir xil fayl bir marta saqlanadi)
+# tmp/*.part      - yuklanayotgan fayllar; tayyor bo'lgach blobs/ ga os.replace (LRU ularni ko'rmaydi)
+# lines/<sha256>.lines - code_viewer qatorlar indeksi (blob bilan birga o'chiriladi)
+# meta/<sha1(storage_name)>.json - {'name', 'sha256', 'etag', 'size', 'checked_at'}
+# Hajm MAX_BYTES dan oshsa eng uzoq ishlatilmagan (mtime bo'yicha LRU) bloblar o'chiriladi.
+# REVALIDATE_SECONDS o'tgach ETag/If-None-Match bilan tekshiriladi (304 -> qayta yuklanmaydi).
+# Bir vaqtdagi bir xil miss'lar bitta yuklashni kutadi (single-flight).
+
+FETCH_TIMEOUT = 10
+MAX_FILE_BYTES = 50 * 1024 * 1024  # validate_file_size bilan bir xil
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class SourceCache:
+    def __init__(self, root=None, max_bytes=None, revalidate_seconds=None):
+        self.root = str(root or getattr(settings, 'SOURCE_CACHE_DIR',
+                                        os.path.join(tempfile.gettempdir(), 'devtube_sources')))
+        self.max_bytes = max_bytes or getattr(settings, 'SOURCE_CACHE_MAX_BYTES', 200 * 1024 * 1024)
+        self.revalidate_seconds = (revalidate_seconds if revalidate_seconds is not None
+                                   else getattr(settings, 'SOURCE_CACHE_REVALIDATE_SECONDS', 3600))
+        self._lock = threading.Lock()
+        self._inflight = {}  # storage_name -> threading.Event
+        self._stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'errors': 0,
+                       'fetches': 0, 'fetch_ms_total': 0.0, 'fetch_ms_max': 0.0}
+        os.makedirs(os.path.join(self.root, 'blobs'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'meta'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+        os.makedirs(os.path.join(self.root, 'lines'), exist_ok=True)
+
+    # --- Fayl yo'llari ---
+    def _blob_path(self, sha):
+        return os.path.join(self.root, 'blobs', sha)
+
+    def line_index_path(self, key):
+        """code_viewer indeksi: storage fayli yonida (MEDIA_ROOT) emas, kesh ildizida."""
+        return os.path.join(self.root, 'lines', key + '.lines')
+
+    def _meta_path(self, name):
+        return os.path.join(self.root, 'meta', hashlib.sha1(name.encode()).hexdigest() + '.json')
+
+    def _read_meta(self, name):
+        try:
+            with open(self._meta_path(name)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('name') != name or not os.path.exists(self._blob_path(meta['sha256'])):
+            return None
+        return meta
+
+    def _write_atomic(self, path, data):
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def _write_meta(self, meta):
+        self._write_atomic(self._meta_path(meta['name']), json.dumps(meta).encode())
+
+    # --- Ochiq API ---
+    def get_bytes(self, field_file):
+        """FieldFile mazmuni (bytes) yoki None. Lokal storage'da to'g'ridan-to'g'ri o'qiladi."""
+        if not field_file:
+            return None
+        try:
+            url = field_file.url
+        except Exception:
+            url = None
+        if not url or not url.startswith(('http://', 'https://')):
+            try:
+                with field_file.open('rb') as f:
+                    return f.read(MAX_FILE_BYTES)
+            except Exception:
+                return None
+        return self.fetch(field_file.name, url)
+
+    def get_text(self, field_file):
+        data = self.get_bytes(field_file)
+        return data.decode('utf-8', errors='ignore') if data is not None else None
+
+    def get_path(self, field_file):
+        """Keshdagi (yoki lokal storage'dagi) fayl yo'li - butun faylni xotiraga o'qimasdan ishlash uchun."""
+        if not field_file:
+            return None
+        try:
+            url = field_file.url
+        except Exception:
+            url = None
+        if not url or not url.startswith(('http://', 'https://')):
+            try:
+                return field_file.path
+            except Exception:
+                return None
+        meta = self._resolve(field_file.name, url)
+        if not meta:
+            return None
+        path = self._blob_path(meta['sha256'])
+        self._touch(path)
+        return path
+
+    def fetch(self, name, url):
+        meta = self._resolve(name, url)
+        return self._read_blob(meta) if meta else None
+
+    def _resolve(self, name, url):
+        """Yangi (yoki 304 bilan tasdiqlangan) meta; yuklab bo'lmasa None."""
+        meta = self._read_meta(name)
+        if meta and time.time() - meta['checked_at'] < self.revalidate_seconds:
+            self._count('hits')
+            return meta
+
+        # Single-flight: bitta oqim yuklaydi, qolganlar natijani kutadi
+        with self._lock:
+            event = self._inflight.get(name)
+            leader = event is None
+            if leader:
+                event = self._inflight[name] = threading.Event()
+        if not leader:
+            event.wait(FETCH_TIMEOUT + 1)
+            meta = self._read_meta(name)
+            self._count('hits' if meta else 'errors')
+            return meta
+
+        try:
+            return self._refresh(name, url, meta)
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+            event.set()
+
+    def _refresh(self, name, url, meta):
+        headers = {'If-None-Match': meta['etag']} if meta and meta.get('etag') else {}
+        started = time.perf_counter()
+        try:
+            response = get_client('cloudinary').get(url, headers=headers, timeout=(3.05, FETCH_TIMEOUT), stream=True)
+        except requests.RequestException:
+            self._count('errors')
+            # Tarmoq xatosida eski nusxa ham yaroqli (Cloudinary fayllari deyarli o'zgarmaydi)
+            return meta
+        finally:
+            self._record_fetch((time.perf_counter() - started) * 1000)
+
+        # stream=True: ulanish pulga faqat javob yopilganda qaytadi - 304 va xato yo'llarida ham
+        with response:
+            return self._store(name, response, meta)
+
+    def _store(self, name, response, meta):
+        """Javobni qayta ishlaydi: 304 - meta yangilanadi, 200 - blob diskka yoziladi."""
+        if response.status_code == 304 and meta:
+            meta['checked_at'] = time.time()
+            self._write_meta(meta)
+            self._count('revalidated')
+            return meta
+        if response.status_code != 200:
+            self._count('errors')
+            return None
+
+        # Diskka bo'lib-bo'lib yoziladi: katta fayl (50 MB gacha) xotiraga to'liq yuklanmaydi
+        digest, size = hashlib.sha256(), 0
+        # tmp/ - blobs/ bilan bir diskda (os.replace atomik), lekin _evict yuklanayotgan faylni o'chirmaydi
+        fd, tmp = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    chunk = chunk[:MAX_FILE_BYTES - size]
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                    if size >= MAX_FILE_BYTES:
+                        break
+            sha = digest.hexdigest()
+            os.replace(tmp, self._blob_path(sha))
+        except (OSError, requests.RequestException):
+            self._count('errors')
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return meta
+        meta = {'name': name, 'sha256': sha, 'etag': response.headers.get('ETag'),
+                'size': size, 'checked_at': time.time()}
+        self._write_meta(meta)
+        self._count('misses')
+        self._evict()
+        return meta
+
+    @staticmethod
+    def _touch(path):
+        try:
+            os.utime(path)  # LRU: oxirgi ishlatilgan vaqt
+        except OSError:
+            pass
+
+    def _read_blob(self, meta):
+        path = self._blob_path(meta['sha256'])
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        self._touch(path)
+        return data
+
+    def _evict(self):
+        blobs_dir = os.path.join(self.root, 'blobs')
+        entries = []
+        for entry in os.scandir(blobs_dir):
+            if not BLOB_NAME_RE.match(entry.name):
+                continue  # Faqat tayyor sha256 bloblar hisoblanadi va o'chiriladi
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        # Meta fayllar blob o'chsa o'zi yaroqsiz bo'ladi (_read_meta tekshiradi)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+            try:
+                os.remove(self.line_index_path(os.path.basename(path)))
+            except OSError:
+                pass
+
+    # --- Statistika ---
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _record_fetch(self, ms):
+        with self._lock:
+            self._stats['fetches'] += 1
+            self._stats['fetch_ms_total'] += ms
+            self._stats['fetch_ms_max'] = max(self._stats['fetch_ms_max'], ms)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+        lookups = s['hits'] + s['misses'] + s['revalidated']
+        return {
+            'hits': s['hits'],
+            'misses': s['misses'],
+            'revalidated': s['revalidated'],
+            'errors': s['errors'],
+            'hit_ratio': round((s['hits'] + s['revalidated']) / lookups, 3) if lookups else 0.0,
+            'avg_fetch_ms': round(s['fetch_ms_total'] / s['fetches'], 1) if s['fetches'] else 0.0,
+            'max_fetch_ms': round(s['fetch_ms_max'], 1),
+        }
+
+
+_source_cache = None
+_source_cache_lock = threading.Lock()
+
+
+def get_source_cache():
+    global _source_cache
+    if _source_cache is None:
+        with _source_cache_lock:
+            if _source_cache is None:
+                _source_cache = SourceCache()
+    return _source_cache
@@ -0,0 +1,182 @@
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+
+from django.db import close_old_connections
+from django.urls import reverse
+
+
+# ==========================================
+# QIDIRUV TAKLIFLARI (Autocomplete) - xotiradagi prefiks indeks
+# ==========================================
+# Saralangan (kalit, tur, id) ro'yxati ustida bisect: prefiks oralig'ini topish O(log n).
+# Loyiha nomi, username va ko'p so'ralgan qidiruvlar indekslanadi. Indeks birinchi murojaatda
+# bazadan quriladi, keyin Project/User signallari orqali qisman yangilanadi (models.py),
+# shuning uchun /search/suggest/ so'rovida bazaga murojaat yo'q.
+# Indeks har jarayonda alohida: nom/slug/muzlatish o'zgarganda (yaratish/o'chirishda) signallar
+# SuggestGeneration ni ham oshiradi. Har VERSION_CHECK_SECONDS da fon oqimi versiyani tekshiradi va boshqa
+# worker o'zgartirgan bo'lsa indeksni qayta quradi - so'rov oqimi kutmaydi, takliflar eski indeksdan beriladi.
+# Qidiruv taklifga faqat QUERY_MIN_COUNT ta turli mijoz (user/IP) so'raganda chiqadi - bitta mijoz
+# qayta-qayta qidirib istalgan matnni ommaviy taklifga aylantira olmaydi.
+
+MAX_SCAN = 256  # Bitta prefiks uchun ko'rib chiqiladigan nomzodlar chegarasi
+QUERY_MIN_COUNT = 3  # Qidiruvni shuncha turli mijoz so'ragach taklif sifatida chiqadi
+MAX_CLIENTS_PER_QUERY = 64  # Ball shu yerda to'xtaydi, xotira cheklangan
+MAX_TRACKED_QUERIES = 5000
+VERSION_CHECK_SECONDS = 10
+URL_NAMES = {'project': 'project_detail', 'user': 'public_profile'}  # 'query' -> url yo'q (global_search)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return ' '.join(text.lower().split())
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._keys = []  # [(kalit, tur, id)] - saralangan
+        self._items = {}  # (tur, id) -> {'type', 'text', 'url_arg', 'score', 'keys'}
+        self._query_clients = {}  # normallashgan qidiruv -> uni so'ragan mijozlar to'plami
+        self._lock = threading.RLock()
+        self._check_lock = threading.Lock()
+        self.is_built = False
+        self.generation = None  # Qurilgan paytdagi SuggestGeneration
+        self.checked_at = 0.0
+
+    # --- Qurish ---
+    def build(self, projects, users):
+        """projects: (id, title, slug, views) lar, users: (id, username) lar."""
+        with self._lock:
+            self._keys, self._items = [], {}
+            for pk, title, slug, views in projects:
+                self._add('project', pk, title, slug, views, bulk=True)
+            for pk, username in users:
+                self._add('user', pk, username, username, 0, bulk=True)
+            for query, clients in self._query_clients.items():
+                if len(clients) >= QUERY_MIN_COUNT:
+                    self._add('query', query, query, None, len(clients), bulk=True)
+            self._keys.sort()
+            self.is_built = True
+
+    def build_from_db(self):
+        from django.contrib.auth.models import User
+        from .models import Project
+        # Versiya ma'lumotdan oldin o'qiladi: qurish paytidagi o'zgarish keyingi tekshiruvda yana qurdiradi.
+        # Ma'lumot qulfsiz o'qiladi - qayta qurish paytida takliflar eski indeksdan berilaveradi
+        generation = current_generation()
+        projects = list(Project.objects.filter(is_frozen=False).values_list('id', 'title', 'slug', 'views'))
+        users = list(User.objects.filter(is_active=True).values_list('id', 'username'))
+        self.build(projects, users)
+        self.generation, self.checked_at = generation, time.monotonic()
+
+    # --- Qisman yangilash ---
+    def _add(self, kind, ident, text, url_arg, score, bulk=False):
+        norm = normalize(text)
+        words = norm.split(' ')
+        # To'liq matn va har bir so'z boshidan qidirish mumkin bo'lsin ("bot" -> "Python Bot")
+        keys = {' '.join(words[i:]) for i in range(len(words))} if norm else set()
+        self._items[(kind, ident)] = {'type': kind, 'text': text, 'url_arg': url_arg, 'score': score, 'keys': keys}
+        for key in keys:
+            if bulk:
+                self._keys.append((key, kind, ident))
+            else:
+                insort(self._keys, (key, kind, ident))
+
+    def _remove(self, kind, ident):
+        item = self._items.pop((kind, ident), None)
+        if not item:
+            return
+        for key in item['keys']:
+            i = bisect_left(self._keys, (key, kind, ident))
+            if i < len(self._keys) and self._keys[i] == (key, kind, ident):
+                del self._keys[i]
+
+    def upsert(self, kind, ident, text, url_arg, score=0):
+        with self._lock:
+            if not self.is_built:
+                return  # Qurilganda baribir bazadan olinadi
+            self._remove(kind, ident)
+            self._add(kind, ident, text, url_arg, score)
+
+    def remove(self, kind, ident):
+        with self._lock:
+            self._remove(kind, ident)
+
+    def record_query(self, query, client):
+        """Qidiruvni so'ragan mijoz (admission.client_key) bilan qayd qiladi; yetarlicha turli mijoz so'rasa
+        taklifga qo'shiladi."""
+        norm = normalize(query)
+        if len(norm) < 2:
+            return
+        with self._lock:
+            clients = self._query_clients.setdefault(norm, set())
+            if len(clients) < MAX_CLIENTS_PER_QUERY:
+                clients.add(client)
+            count = len(clients)
+            if len(self._query_clients) > MAX_TRACKED_QUERIES:
+                # Eng kam mijoz so'ragan yarmini tashlab yuboramiz
+                popular = sorted(self._query_clients.items(), key=lambda item: -len(item[1]))
+                self._query_clients = dict(popular[:MAX_TRACKED_QUERIES // 2])
+            if count >= QUERY_MIN_COUNT and self.is_built:
+                self._remove('query', norm)
+                self._add('query', norm, norm, None, count)
+
+    # --- Qidirish ---
+    def suggest(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            i = bisect_left(self._keys, (prefix,))
+            seen, found = set(), []
+            while i < len(self._keys) and len(seen) < MAX_SCAN:
+                key, kind, ident = self._keys[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, ident) not in seen:
+                    seen.add((kind, ident))
+                    found.append(self._items[(kind, ident)])
+                i += 1
+        found.sort(key=lambda item: (-item['score'], item['text']))
+        # URL faqat qaytariladigan bir nechta natija uchun quriladi (qurishda reverse() qimmat)
+        return [{'type': item['type'], 'text': item['text'], 'url': self._url(item)} for item in found[:limit]]
+
+    @staticmethod
+    def _url(item):
+        route = URL_NAMES.get(item['type'])
+        return reverse(route, args=[item['url_arg']]) if route else None
+
+
+suggest_index = PrefixIndex()
+
+
+def current_generation():
+    from .models import SuggestGeneration
+    return SuggestGeneration.objects.filter(pk=1).values_list('generation', flat=True).first() or 0
+
+
+def refresh_suggest_index():
+    """Fon oqimi: versiya o'zgargan bo'lsa indeksni qayta quradi. _check_lock ni chaqiruvchi olgan."""
+    try:
+        if current_generation() != suggest_index.generation:
+            suggest_index.build_from_db()
+    except Exception as e:
+        print(f"Suggest indeks yangilash xatosi: {e}")  # Keyingi tekshiruvda qayta urinadi
+    finally:
+        suggest_index._check_lock.release()
+        close_old_connections()
+
+
+def get_suggest_index():
+    if not suggest_index.is_built:
+        with suggest_index._check_lock:
+            if not suggest_index.is_built:
+                suggest_index.build_from_db()  # Faqat jarayondagi birinchi murojaat
+    elif (time.monotonic() - suggest_index.checked_at >= VERSION_CHECK_SECONDS
+          and suggest_index._check_lock.acquire(blocking=False)):
+        # Bitta fon oqimi tekshiradi; so'rov bazaga murojaat qilmasdan joriy indeksdan foydalanadi
+        suggest_index.checked_at = time.monotonic()
+        threading.Thread(target=refresh_suggest_index, name='suggest-refresh', daemon=True).start()
+    return suggest_index
@@ -0,0 +1,277 @@
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .http_client import get_client
+from .models import TelegramMessage
+from .utils import TELEGRAM_BOT_TOKEN
+
+
+# ==========================================
+# TELEGRAM XABARLARI NAVBATI (transactional outbox)
+# ==========================================
+# buy_project / confirm_purchase Telegramga o'zi murojaat qilmaydi: enqueue() TelegramMessage qatorini
+# o'sha tranzaksiya ichida yozadi. Savdo bekor bo'lsa (rollback) xabar ham yo'qoladi, commit bo'lsa -
+# albatta yuboriladi; Profile qatorlari Telegram javobini kutib qulflanib turmaydi.
+# run_telegram_dispatcher (Procfile: telegram_dispatcher - alohida doimiy jarayon, ishlamasa xabarlar
+# navbatda qoladi) navbatdan BATCH tagacha xabarni claim qiladi (scan_queue kabi shartli UPDATE
+# + lease) va Telegram cheklovlariga rioya qilib yuboradi:
+#   umumiy  - soniyasiga GLOBAL_RATE tagacha xabar (Telegram: ~30/s)
+#   chat    - bitta chatga CHAT_INTERVAL soniyada bittadan ko'p emas; bitta chat xabarlari tartib bilan
+# Natijalar: 200 - yuborildi (partiya bitta UPDATE bilan belgilanadi); 429 - Telegram aytgan retry_after
+# dan keyin qayta (urinish hisoblanmaydi); 400/403 (bot bloklangan, chat yo'q) - qayta urinilmaydi;
+# 5xx / tarmoq xatosi - eksponensial backoff (+ jitter), MAX_ATTEMPTS dan keyin 'failed'.
+
+BACKOFF_BASE_SECONDS = 15
+BACKOFF_MAX_SECONDS = 3600
+LEASE_SECONDS = 120
+LEASE_MARGIN_SECONDS = 15  # Lease tugashiga shuncha qolganda yuborilmagan xabarlar navbatga qaytariladi
+KEEP_SENT_DAYS = 7
+PURGE_INTERVAL_SECONDS = 3600
+PERMANENT_STATUSES = {400, 403, 404}
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(chat_id, text):
+    """Xabarni navbatga yozadi (chaqiruvchining tranzaksiyasi ichida). chat_id bo'sh bo'lsa - hech narsa."""
+    if not chat_id:
+        return None
+    return TelegramMessage.objects.create(chat_id=str(chat_id), text=text)
+
+
+class ChatRateLimiter:
+    """Umumiy + chat bo'yicha cheklov (chunk_scan.RateLimiter faqat umumiy). Har bir yuborish uchun vaqt
+    "band qilinadi", oqim o'sha vaqtgacha uxlaydi."""
+
+    MAX_CHATS = 10000
+
+    def __init__(self, rate=None, chat_interval=None, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 1.0 / (rate or _setting('TELEGRAM_GLOBAL_RATE', 25))
+        self.chat_interval = chat_interval if chat_interval is not None else _setting('TELEGRAM_CHAT_INTERVAL', 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self._next_global = 0.0
+        self._next_chat = OrderedDict()  # chat_id -> keyingi ruxsat etilgan vaqt
+        self._lock = threading.Lock()
+
+    def reserve(self, chat_id):
+        """Shu chatga yuborish mumkin bo'lgan vaqtni band qiladi; qaytaradi: kutish kerak bo'lgan soniya."""
+        with self._lock:
+            now = self.clock()
+            at = max(now, self._next_global, self._next_chat.get(chat_id, 0.0))
+            self._next_global = at + self.interval
+            self._next_chat[chat_id] = at + self.chat_interval
+            self._next_chat.move_to_end(chat_id)
+            while len(self._next_chat) > self.MAX_CHATS:
+                self._next_chat.popitem(last=False)
+            return at - now
+
+    def wait(self, chat_id):
+        delay = self.reserve(chat_id)
+        if delay > 0:
+            self.sleep(delay)
+
+    def pause(self, seconds, chat_id=None):
+        """429 dan keyin: chat (yoki hammasi) `seconds` davomida yuborilmaydi."""
+        with self._lock:
+            until = self.clock() + seconds
+            if chat_id is None:
+                self._next_global = max(self._next_global, until)
+            else:
+                self._next_chat[chat_id] = max(self._next_chat.get(chat_id, 0.0), until)
+
+
+def _claimable(now):
+    return (Q(status=TelegramMessage.QUEUED, run_after__lte=now)
+            | Q(status=TelegramMessage.SENDING, lease_expires__lt=now))
+
+
+def claim_batch(worker_id, limit):
+    """Eng eski `limit` tagacha xabarni shu dispatcherga biriktiradi (compare-and-set, scan_queue.claim_jobs kabi)."""
+    if limit <= 0:
+        return []
+    now = timezone.now()
+    candidates = list(
+        TelegramMessage.objects.filter(_claimable(now)).order_by('run_after', 'id').values_list('id', flat=True)[:limit]
+    )
+    if not candidates:
+        return []
+    TelegramMessage.objects.filter(_claimable(now), pk__in=candidates).update(
+        status=TelegramMessage.SENDING, locked_by=worker_id, attempts=F('attempts') + 1,
+        lease_expires=now + timedelta(seconds=LEASE_SECONDS),
+    )
+    return list(TelegramMessage.objects.filter(pk__in=candidates, locked_by=worker_id,
+                                               status=TelegramMessage.SENDING).order_by('id'))
+
+
+def backoff_seconds(attempts):
+    delay = min(BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def deliver(message):
+    """Bitta xabarni yuboradi. Qaytaradi: ('sent' | 'retry' | 'failed', retry_after soniya yoki None, xato matni)."""
+    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
+    try:
+        response = get_client('telegram').post(
+            url, json={'chat_id': message.chat_id, 'text': message.text, 'parse_mode': 'HTML'}
+        )
+    except requests.RequestException as e:
+        return 'retry', None, str(e)
+    if response.status_code == 200:
+        return 'sent', None, ''
+    try:
+        body = response.json()
+    except ValueError:
+        body = {}
+    error = f"{response.status_code}: {body.get('description') or response.text[:200]}"
+    if response.status_code == 429:
+        return 'retry', (body.get('parameters') or {}).get('retry_after', 5), error
+    if response.status_code in PERMANENT_STATUSES:
+        return 'failed', None, error
+    return 'retry', None, error
+
+
+def _release(messages, worker_id):
+    """Yuborishga navbat yetmagan xabarlar: urinish hisoblanmaydi, darhol boshqa partiyaga."""
+    TelegramMessage.objects.filter(pk__in=[m.pk for m in messages], locked_by=worker_id,
+                                   status=TelegramMessage.SENDING).update(
+        status=TelegramMessage.QUEUED, attempts=F('attempts') - 1, lease_expires=None, locked_by='',
+    )
+
+
+def _retry(message, worker_id, delay, error, counted=True):
+    mine = TelegramMessage.objects.filter(pk=message.pk, locked_by=worker_id, status=TelegramMessage.SENDING)
+    if counted and message.attempts >= _setting('TELEGRAM_OUTBOX_MAX_ATTEMPTS', 8):
+        mine.update(status=TelegramMessage.FAILED, lease_expires=None, last_error=error[:2000])
+        return
+    mine.update(status=TelegramMessage.QUEUED, lease_expires=None, last_error=error[:2000],
+                attempts=F('attempts') - (0 if counted else 1),
+                run_after=timezone.now() + timedelta(seconds=delay))
+
+
+def default_worker_id():
+    return f'tg:{socket.gethostname()}:{os.getpid()}'[:64]
+
+
+class TelegramDispatcher:
+    """Navbatni partiyalab yuboradi (run_telegram_dispatcher buyrug'i). Har bir chat - bitta oqimda, tartib bilan."""
+
+    def __init__(self, batch_size=None, concurrency=None, poll_interval=1.0, worker_id=None, stdout=None,
+                 limiter=None):
+        self.batch_size = batch_size or _setting('TELEGRAM_OUTBOX_BATCH', 100)
+        self.concurrency = concurrency or _setting('TELEGRAM_DISPATCH_CONCURRENCY', 4)
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or default_worker_id()
+        self.stdout = stdout
+        self.limiter = limiter or ChatRateLimiter()
+        self._stop = threading.Event()
+        self._last_purge = 0.0
+
+    def _log(self, message):
+        if self.stdout:
+            self.stdout.write(message)
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def install_signal_handlers(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+    def _send_chat(self, messages, deadline):
+        """Bitta chat xabarlari. Qaytaradi: yuborilganlar id lari (qolganlari shu yerning o'zida yangilanadi)."""
+        sent = []
+        try:
+            for i, message in enumerate(messages):
+                if self._stop.is_set() or time.monotonic() + self.limiter.chat_interval > deadline:
+                    _release(messages[i:], self.worker_id)
+                    break
+                self.limiter.wait(message.chat_id)
+                outcome, retry_after, error = deliver(message)
+                if outcome == 'sent':
+                    sent.append(message.pk)
+                elif outcome == 'failed':
+                    TelegramMessage.objects.filter(pk=message.pk, locked_by=self.worker_id).update(
+                        status=TelegramMessage.FAILED, lease_expires=None, last_error=error[:2000])
+                elif retry_after is not None:
+                    # 429: Telegram aytgan muddatgacha shu chat to'xtaydi; qolgan xabarlar ham kutadi
+                    self.limiter.pause(retry_after, message.chat_id)
+                    _retry(message, self.worker_id, retry_after, error, counted=False)
+                    for rest in messages[i + 1:]:
+                        _retry(rest, self.worker_id, retry_after, error, counted=False)
+                    break
+                else:
+                    _retry(message, self.worker_id, backoff_seconds(message.attempts), error)
+        finally:
+            close_old_connections()
+        return sent
+
+    def dispatch_batch(self, pool):
+        """Bitta partiya: claim -> chatlar bo'yicha parallel yuborish -> yuborilganlar bitta UPDATE bilan.
+        Qaytaradi: olingan xabarlar soni."""
+        messages = claim_batch(self.worker_id, self.batch_size)
+        if not messages:
+            return 0
+        chats = {}
+        for message in messages:
+            chats.setdefault(message.chat_id, []).append(message)
+        deadline = time.monotonic() + LEASE_SECONDS - LEASE_MARGIN_SECONDS
+        sent = [pk for ids in pool.map(lambda group: self._send_chat(group, deadline), chats.values()) for pk in ids]
+        if sent:
+            TelegramMessage.objects.filter(pk__in=sent, locked_by=self.worker_id).update(
+                status=TelegramMessage.SENT, sent_at=timezone.now(), lease_expires=None, last_error='',
+            )
+        self._log(f"Telegram: {len(messages)} ta xabar ({len(chats)} chat), yuborildi: {len(sent)}")
+        return len(messages)
+
+    def purge(self):
+        """KEEP_SENT_DAYS dan eski yuborilgan xabarlarni o'chiradi ('failed' lar tekshirish uchun qoladi)."""
+        cutoff = timezone.now() - timedelta(days=KEEP_SENT_DAYS)
+        return TelegramMessage.objects.filter(status=TelegramMessage.SENT, sent_at__lt=cutoff).delete()[0]
+
+    def run(self, once=False):
+        """once=True: navbat bo'shagach chiqadi (cron uchun). Qaytaradi: olingan xabarlar soni."""
+        processed = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='telegram') as pool:
+            while not self._stop.is_set():
+                count = self.dispatch_batch(pool)
+                processed += count
+                if time.monotonic() - self._last_purge >= PURGE_INTERVAL_SECONDS:
+                    self.purge()
+                    self._last_purge = time.monotonic()
+                if once and not count:
+                    break
+                close_old_connections()
+                if not count:
+                    self._stop.wait(self.poll_interval)
+        close_old_connections()
+        return processed
+
+
+def outbox_stats():
+    """stats sahifasi va API uchun: holat bo'yicha soni va eng eski navbatdagi xabar yoshi (soniya)."""
+    counts = dict(TelegramMessage.objects.values_list('status').annotate(n=Count('id')))
+    oldest = TelegramMessage.objects.filter(status=TelegramMessage.QUEUED).aggregate(m=Min('created_at'))['m']
+    return {
+        'queued': counts.get(TelegramMessage.QUEUED, 0),
+        'sending': counts.get(TelegramMessage.SENDING, 0),
+        'sent': counts.get(TelegramMessage.SENT, 0),
+        'failed': counts.get(TelegramMessage.FAILED, 0),
+        'oldest_queued_seconds': int((timezone.now() - oldest).total_seconds()) if oldest else 0,
+    }
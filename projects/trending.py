@@ -0,0 +1,50 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Project, ProjectActivity
+
+
+# ==========================================
+# TRENDING BALL (vaqt o'tishi bilan so'nadi)
+# ==========================================
+# ball = Σ (views*1 + likes*3 + comments*4 + purchases*8) * 0.5 ** (yosh_soat / HALF_LIFE_HOURS)
+# Faqat WINDOW ichidagi soatlik bucket'lar hisobga olinadi. Natija Project.trending_score ga yoziladi,
+# sahifalar esa uni bitta indeks skan bilan o'qiydi (project_trending_idx).
+
+WEIGHTS = {'views': 1.0, 'likes': 3.0, 'comments': 4.0, 'purchases': 8.0}
+HALF_LIFE_HOURS = 24
+WINDOW = timedelta(days=7)
+TRENDING_KEYS = ('-trending_score', '-views', '-id')
+
+
+def bucket_score(row, now):
+    age_hours = max((now - row['bucket']).total_seconds() / 3600, 0)
+    raw = sum(row[field] * weight for field, weight in WEIGHTS.items())
+    return raw * 0.5 ** (age_hours / HALF_LIFE_HOURS)
+
+
+def update_trending_scores(now=None, batch_size=500):
+    """
+    Faqat oynada faolligi bor yoki hozir ball > 0 bo'lgan loyihalarni qayta hisoblaydi,
+    shuning uchun narx katalog hajmiga emas, faol loyihalar soniga bog'liq.
+    Qaytaradi: (yangilangan, nolga tushirilgan, o'chirilgan_bucketlar)
+    """
+    now = now or timezone.now()
+    since = now - WINDOW
+
+    scores = {}
+    rows = ProjectActivity.objects.filter(bucket__gte=since).values(
+        'project_id', 'bucket', *WEIGHTS.keys()
+    )
+    for row in rows.iterator(chunk_size=2000):
+        scores[row['project_id']] = scores.get(row['project_id'], 0.0) + bucket_score(row, now)
+
+    batch = [Project(pk=pk, trending_score=round(score, 4)) for pk, score in scores.items()]
+    with transaction.atomic():
+        Project.objects.bulk_update(batch, ['trending_score'], batch_size=batch_size)
+        # Oynadan chiqib ketganlar: ball nolga tushadi
+        zeroed = Project.objects.filter(trending_score__gt=0).exclude(pk__in=list(scores)).update(trending_score=0)
+        pruned, _ = ProjectActivity.objects.filter(bucket__lt=since).delete()
+    return len(batch), zeroed, pruned
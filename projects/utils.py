@@ -1,4 +1,4 @@
-import requests
+from .http_client import get_client
 
 # BotFather bergan token
 TELEGRAM_BOT_TOKEN = "8259030267:AAGz9p2u4tt32yt3eMnpDk67yO2R3vtLXN0"
@@ -19,7 +19,7 @@ def send_telegram_message(chat_id, message):
     }
 
     try:
-        requests.post(url, json=payload, timeout=5)
+        get_client('telegram').post(url, json=payload)
     except Exception as e:
         print(f"Telegramga yuborishda xato: {e}")
 
@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, When, Value, F, IntegerField
+
+
+# ==========================================
+# KO'RISHLAR SONINI YIG'IB YOZISH (Write-coalescing)
+# ==========================================
+# Har bir ko'rishda UPDATE qilish o'rniga hisobni xotirada yig'amiz va
+# bir necha soniyada (yoki N ta ko'rishda) bitta UPDATE ... CASE bilan bazaga yozamiz.
+# Muddat keyingi ko'rishda tekshiriladi; ko'rishlar to'xtab qolsa (sokin worker) fon oqimi har flush_interval
+# da yozadi - hisob xotirada uzoq turib SIGKILL/OOM da yo'qolmaydi. Jarayon to'xtaganda qolgani atexit orqali
+# yoziladi (apps.py). flush_interval=0 - fon oqimi ham, vaqt bo'yicha flush ham yo'q (testlar).
+# Flush bitta tranzaksiya: views UPDATE va soatlik faollik birga yoziladi yoki birga qaytariladi va partiya
+# navbatga qaytadi - xato ko'rishlarni yo'qotmaydi va qayta urinishda ikki marta sanamaydi.
+# O'qishda bazadagi qiymatga hali yozilmagan qism (pending) qo'shiladi.
+
+FLUSH_INTERVAL = getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 5)  # soniya
+FLUSH_EVERY_HITS = getattr(settings, 'VIEW_COUNTER_FLUSH_HITS', 200)
+
+
+class ViewCounterBuffer:
+    def __init__(self, flush_interval=FLUSH_INTERVAL, flush_every=FLUSH_EVERY_HITS):
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._pending = {}
+        self._hits = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    def _ensure_timer(self):
+        # Birinchi ko'rishda ishga tushadi (gunicorn fork qilgandan keyin, har worker uchun o'zi)
+        if not self.flush_interval:
+            return
+        if self._timer is None or not self._timer.is_alive():
+            self._timer = threading.Thread(target=self._run_timer, name='view-counter-flush', daemon=True)
+            self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            with self._lock:
+                due = bool(self._pending) and time.monotonic() - self._last_flush >= self.flush_interval
+            if due:
+                try:
+                    self.flush()
+                finally:
+                    close_old_connections()
+
+    def record(self, project_id, count=1):
+        """Ko'rishni qayd qiladi. Shu chaqiruv bazaga flush qilgan bo'lsa True qaytaradi."""
+        with self._lock:
+            self._pending[project_id] = self._pending.get(project_id, 0) + count
+            self._hits += count
+            self._ensure_timer()
+            due = (self._hits >= self.flush_every or
+                   bool(self.flush_interval) and time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+        return due
+
+    def pending(self, project_id):
+        """Hali bazaga yozilmagan ko'rishlar soni."""
+        with self._lock:
+            return self._pending.get(project_id, 0)
+
+    def flush(self):
+        """Yig'ilgan hisobni bitta UPDATE bilan bazaga yozadi. Yozilgan ko'rishlar sonini qaytaradi."""
+        from .models import Project, record_activity_batch
+
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._hits = 0
+                self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    Project.objects.filter(pk__in=batch).update(views=F('views') + Case(
+                        *[When(pk=pk, then=Value(delta)) for pk, delta in batch.items()],
+                        default=Value(0), output_field=IntegerField(),
+                    ))
+                    record_activity_batch('views', batch)  # Trending uchun soatlik faollik
+            except Exception as e:
+                # Baza ishlamasa ko'rishlar yo'qolmasin: hech narsa yozilmadi, keyingi flush'da qayta urinamiz
+                print(f"View counter flush xatosi: {e}")
+                with self._lock:
+                    for pk, delta in batch.items():
+                        self._pending[pk] = self._pending.get(pk, 0) + delta
+                        self._hits += delta
+                return 0
+            return sum(batch.values())
+
+
+view_counter = ViewCounterBuffer()
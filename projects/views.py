@@ -1,20 +1,16 @@
 import json
-import base64
-import time
-from django.db import close_old_connections
-import threading
 from decimal import Decimal
 from datetime import timedelta
 import requests
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.contrib.postgres.search import TrigramSimilarity
-from django.db import transaction, connection
-from django.db.models import Avg, F, Sum, Count, Q, Max
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
+from django.db import transaction
+from django.db.models import F, Sum, Count, Q, Max
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.template.loader import render_to_string
 from django.views.decorators.clickjacking import xframe_options_exempt
 from django.views.decorators.csrf import csrf_exempt
@@ -26,6 +22,23 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .admission import (ReleaseOnClose, acquire, admit, admission_stats, client_key, rejection_message,
+                        rejection_response, slot)
+from . import ai_assistant
+from .archive_manifest import is_archive
+from . import compiler
+from .code_viewer import read_lines, FIRST_SCREEN_LINES, LOCKED_PREVIEW_LINES
+from .feed import get_feed_page
+from .compiler_cache import get_result_cache
+from .http_client import CircuitOpenError, outbound_stats
+from .pagination import KeysetPaginator, DEFAULT_PAGE_SIZE, NEWEST_KEYS
+from .trending import TRENDING_KEYS
+from .scan_queue import enqueue_scan
+from .search import get_search_backend, SEARCH_KEYS
+from .source_cache import get_source_cache
+from .suggest import get_suggest_index, suggest_index
+from . import telegram_outbox
+from .view_counter import view_counter
 from .forms import (
     ProjectForm, UserRegisterForm, UserUpdateForm,
     ProfileUpdateForm, ReviewForm  # <--- Barcha formalar bitta joyda
@@ -33,11 +46,10 @@ from .forms import (
 from .models import (
     Project, ProjectImage, Sync, CommunityMessage,
     Contact, Transaction, Deposit, Withdrawal,
-    Comment, PrivateMessage, Review, Profile  # <--- Shu yerga Profile qo'shildi
+    Comment, PrivateMessage, Review, Profile,  # <--- Shu yerga Profile qo'shildi
+    CompilerRun, CodeIndex,
 )
-# --- XAVFSIZLIK TIZIMI IMPORTLARI ---
-from .security import scan_with_gemini, scan_with_virustotal
-from .serializers import ProjectSerializer, RegisterSerializer, ProfileSerializer
+from .serializers import ProjectSerializer, ProjectDetailSerializer, RegisterSerializer, ProfileSerializer
 from .utils import generate_telegram_link  # Import qilishni unutmang
 from .utils import send_telegram_message
 from .utils import verify_telegram_token
@@ -66,71 +78,6 @@ def get_code_snippet(project):
         return "// Kodni o'qib bo'lmadi."
 
 
-def run_security_scan(project_id):
-    try:
-        project = Project.objects.get(id=project_id)
-        if not project.source_code:
-            return
-
-        file_url = project.source_code.url
-        file_name = project.source_code.name
-
-        # --- 1. GEMINI TEKSHIRUVI ---
-        ai_result = "Tahlil qilinmadi"
-        try:
-            response = requests.get(file_url, timeout=20)
-            if response.status_code == 200:
-                try:
-                    code_content = response.content.decode('utf-8', errors='ignore')
-                    ai_result = scan_with_gemini(code_content)
-                except:
-                    ai_result = "Fayl matn formatida emas (Binary), faqat VirusTotal tekshiradi."
-            else:
-                ai_result = f"Faylni yuklab bo'lmadi. Status: {response.status_code}"
-        except Exception as e:
-            ai_result = f"AI/Request Xatosi: {e}"
-
-        # --- 2. VIRUSTOTAL TEKSHIRUVI ---
-        vt_link, vt_status = scan_with_virustotal(file_url, file_name)
-
-        # --- 3. NATIJALARNI SAQLASH ---
-        project.ai_analysis = ai_result
-        project.virustotal_link = vt_link
-        project.is_scanned = True
-
-        # --- 4. HUKM CHIQARISH ---
-        is_dangerous_ai = "DANGER" in str(ai_result)
-        is_dangerous_vt = vt_status and "malicious" in str(vt_status).lower()
-
-        if is_dangerous_ai or is_dangerous_vt:
-            project.security_status = 'danger'
-            project.is_frozen = True
-        elif "SAFE" in str(ai_result):
-            project.security_status = 'safe'
-            if project.is_frozen and project.reports_count < 10:
-                project.is_frozen = False
-        else:
-            project.security_status = 'warning'
-
-        project.save()
-
-    except Exception as e:
-        print(f"CRITICAL SCAN ERROR: {e}")
-        try:
-            p = Project.objects.get(id=project_id)
-            p.is_scanned = True
-            p.security_status = 'warning'
-            p.ai_analysis = f"Tizim xatoligi yuz berdi: {str(e)}."
-            p.save()
-        except:
-            pass
-
-    finally:
-        # MUHIM: Orqa fon (Thread) tugagach, DB ulanishini majburiy yopamiz!
-        # Aks holda sayt xotirasi to'lib, qotib qoladi.
-        close_old_connections()
-
-
 # ==========================================
 # 2. ASOSIY SAHIFA
 # ==========================================
@@ -138,30 +85,35 @@ def run_security_scan(project_id):
 
 
 def _search_projects(query, base_queryset=None):
-    """Qidiruvni PostgreSQL va SQLite uchun mos ishlatadi."""
+    """Qidiruv backendi (PostgreSQL tsvector / SQLite FTS5) orqali; natijada `search_rank` bo'ladi."""
     queryset = base_queryset if base_queryset is not None else Project.objects.filter(is_frozen=False)
     clean_query = (query or '').strip()
 
     if not clean_query:
         return queryset
 
-    if connection.vendor == 'postgresql':
-        return queryset.annotate(
-            similarity=TrigramSimilarity('title', clean_query) +
-                       TrigramSimilarity('description', clean_query)
-        ).filter(similarity__gt=0.1).order_by('-similarity', '-views')
-
-    words = [w for w in clean_query.split() if w]
-    lookup = (
-        Q(title__icontains=clean_query) |
-        Q(description__icontains=clean_query) |
-        Q(author__username__icontains=clean_query)
-    )
+    return get_search_backend().search(queryset, clean_query).order_by(*SEARCH_KEYS)
+
+
+def _render_project_page(request, template_name, queryset, keys, context=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Loyihalar ro'yxatini keyset (cursor) bo'yicha sahifalab chiqaradi.
+    AJAX so'rovda faqat kartalar HTML fragmenti va keyingi cursor qaytadi ("Ko'proq yuklash").
+    """
+    queryset = queryset.select_related('author__profile')
+    page = KeysetPaginator(queryset, keys, page_size).get_page(request.GET.get('cursor'))
 
-    for word in words:
-        lookup |= Q(title__icontains=word) | Q(description__icontains=word)
+    if request.headers.get('x-requested-with') == 'XMLHttpRequest':
+        return JsonResponse({
+            'html': render_to_string('project_cards_partial.html',
+                                     {'projects': page.object_list, 'request': request}),
+            'next_cursor': page.next_cursor,
+        })
+
+    context = dict(context or {})
+    context.update({'projects': page.object_list, 'next_cursor': page.next_cursor})
+    return render(request, template_name, context)
 
-    return queryset.filter(lookup).distinct()
 
 def home_page(request):
     query = request.GET.get('q', '').strip()
@@ -185,15 +137,17 @@ def home_page(request):
     elif price_filter == 'premium':
         projects = projects.filter(price__gt=0)
 
-    # 4. Saralash
+    # 4. Saralash (keyset kalitlari)
     if sort == 'newest':
-        projects = projects.order_by('-created_at')
-    elif not (query and connection.vendor == 'postgresql'):
-        # PostgreSQL qidiruvda relevance (similarity) ni saqlab qolamiz
-        projects = projects.order_by('-views')
+        keys = NEWEST_KEYS
+    elif query:
+        # Qidiruvda relevance (search_rank) ni saqlab qolamiz
+        keys = SEARCH_KEYS
+    else:
+        # "Ommaboplar": materiallashtirilgan trending ball bo'yicha
+        keys = TRENDING_KEYS
 
-    return render(request, 'home.html', {
-        'projects': projects,
+    return _render_project_page(request, 'home.html', projects, keys, {
         'categories': Project.CATEGORY_CHOICES,
         'search_query': query,
         'current_category': category,
@@ -208,6 +162,7 @@ def global_search(request):
     users = User.objects.none()
 
     if query:
+        suggest_index.record_query(query, client_key(request))
         users = User.objects.filter(
             Q(username__icontains=query) |
             Q(first_name__icontains=query) |
@@ -222,6 +177,13 @@ def global_search(request):
     })
 
 
+def search_suggest(request):
+    """Navbar autocomplete: faqat xotiradagi prefiks indeksdan, bazaga murojaatsiz."""
+    request.skip_last_activity = True  # Middleware har bir harf uchun Profile'ni yangilamasin
+    query = request.GET.get('q', '')[:100]
+    return JsonResponse({'suggestions': get_suggest_index().suggest(query)})
+
+
 # ==========================================
 # 3. LOYIHA AMALLARI (WEB)
 # ==========================================
@@ -243,12 +205,9 @@ def create_project(request):
                 for img in request.FILES.getlist('more_images'):
                     ProjectImage.objects.create(project=p, image=img)
 
-                # 3. XAVFSIZLIK: SCANNI TRANZAKSIYA TUGAGACH ISHGA TUSHIRISH (TUZATILDI)
+                # 3. XAVFSIZLIK: skan navbatga qo'yiladi (shu tranzaksiya bilan birga), run_scan_worker bajaradi
                 if p.source_code:
-                    # Lambda funksiya orqali commit bo'lgandan keyin threadni ishga tushiramiz
-                    transaction.on_commit(
-                        lambda: threading.Thread(target=run_security_scan, args=(p.id,), daemon=True).start()
-                    )
+                    enqueue_scan(p.id)
                     messages.success(request, f"'{p.title}' yuklandi! Xavfsizlik tekshiruvi orqa fonda boshlandi... 🛡️")
                 else:
                     messages.success(request, f"'{p.title}' muvaffaqiyatli yuklandi!")
@@ -281,11 +240,11 @@ def update_project(request, pk):
                 p.is_scanned = False
                 p.security_status = 'pending'
                 p.save()
+                # Eski arxiv manifesti va kod indeksi yangi fayl uchun yaroqsiz (skan oqimi qayta yaratadi)
+                Project.objects.filter(pk=p.pk).update(source_manifest=None)
+                CodeIndex.objects.filter(project=p).delete()
 
-                # TUZATILDI: on_commit ishlatildi
-                transaction.on_commit(
-                    lambda: threading.Thread(target=run_security_scan, args=(p.id,), daemon=True).start()
-                )
+                enqueue_scan(p.id)
                 messages.info(request, "Yangi kod qayta tekshirilmoqda...")
             else:
                 p.save()
@@ -318,9 +277,10 @@ def delete_project(request, pk):
 def project_detail(request, slug):
     project = get_object_or_404(Project, slug=slug)
 
-    # 1. Ko'rishlar sonini oshirish
-    Project.objects.filter(slug=slug).update(views=F('views') + 1)
-    project.refresh_from_db()
+    # 1. Ko'rishlar sonini oshirish (xotirada yig'iladi, bazaga guruhlab yoziladi)
+    if view_counter.record(project.pk):
+        project.refresh_from_db(fields=['views'])
+    project.views += view_counter.pending(project.pk)
 
     # 2. AJAX CHAT UCHUN LOGIKA (Pastdagi izohlar)
     if request.headers.get('x-requested-with') == 'XMLHttpRequest' and request.method == 'POST':
@@ -340,24 +300,24 @@ def project_detail(request, slug):
         return JsonResponse({'error': 'Bo\'sh xabar yozmang'}, status=400)
 
     # 3. KODNI O'QISH
-    code_content = "// Kodni o'qib bo'lmadi."
-    if project.source_code:
-        try:
-            if hasattr(project.source_code, 'url'):
-                import requests
-                response = requests.get(project.source_code.url, timeout=5)
-                if response.status_code == 200:
-                    code_content = response.content.decode('utf-8', errors='ignore')
+    # Faqat birinchi ekran (qolgani project_code API orqali scroll'da yuklanadi).
+    # Fayl lokal disk keshidan (source_cache) qatorlar indeksi bo'yicha o'qiladi.
+    # Arxivlar (zip/tar/...) matn sifatida o'qilmaydi: sahifa manifestdan tuzilmani ko'rsatadi.
+    # Kod o'qish uchun o'rin bo'lmasa sahifa kodsiz ochiladi (qolgan qismi kutib turmaydi).
+    is_archive_source = bool(project.source_code) and is_archive(project.source_code.name)
+    code_page, code_content = None, "// Kodni o'qib bo'lmadi."
+    if not is_archive_source:
+        with slot('source', request) as rejected:
+            if rejected is None:
+                code_page = _read_code_range(request, project, 0, FIRST_SCREEN_LINES)
             else:
-                with project.source_code.open('r') as f:
-                    code_content = f.read()
-        except:
-            pass
+                code_content = "// " + rejection_message(rejected)
+    if code_page:
+        code_content = '\n'.join(code_page['lines'])
 
-    # 4. REYTING TIZIMI MA'LUMOTLARI
-    reviews = project.reviews.all().order_by('-created_at')
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg'] or 0
-    avg_rating = round(avg_rating, 1)
+    # 4. REYTING TIZIMI MA'LUMOTLARI (hisoblagichlardan, qo'shimcha COUNT/AVG so'rovisiz)
+    reviews = project.reviews.select_related('user').order_by('-created_at')
+    avg_rating = project.average_rating
 
     # 5. BAHOLASH MUMKINMI?
     # 5. BAHOLASH MUMKINMI? (MANTIQ YANGILANDI)
@@ -403,6 +363,12 @@ def project_detail(request, slug):
     context = {
         'project': project,
         'code_content': code_content,
+        'code_page': code_page,
+        'is_archive_source': is_archive_source,
+        'manifest': project.source_manifest,
+        # Arxivning qaysi fayli hukmga sabab bo'lgani - faqat muallif va moderatorlarga
+        'scan_findings': project.scan_findings.all()[:20] if (
+            request.user.is_staff or request.user == project.author) else None,
         'reviews': reviews,
         'avg_rating': avg_rating,
         'can_review': can_review,
@@ -410,6 +376,8 @@ def project_detail(request, slug):
         'form': review_form,  # Reyting formasi
         'has_bought': (project.price == 0 or (
                     request.user.is_authenticated and project.buyers.filter(id=request.user.id).exists())),
+        'is_liked': request.user.is_authenticated and project.likes.filter(pk=request.user.pk).exists(),
+        'is_saved': request.user.is_authenticated and project.saved_by.filter(pk=request.user.pk).exists(),
         'live_preview': project.source_code.name.lower().endswith('.html') if project.source_code else False,
         'is_synced': request.user.is_authenticated and Sync.objects.filter(follower=request.user.profile,
                                                                            following=project.author.profile).exists() if request.user.is_authenticated else False
@@ -418,24 +386,52 @@ def project_detail(request, slug):
     return render(request, 'project_detail.html', context)
 
 
+def _code_line_limit(request, project):
+    """Premium loyihani sotib olmaganlarga faqat qisqa preview (None = cheklovsiz)."""
+    return None if project.has_full_access(request.user) else LOCKED_PREVIEW_LINES
+
+
+def _read_code_range(request, project, start, count):
+    path = get_source_cache().get_path(project.source_code)
+    if not path:
+        return None
+    try:
+        return read_lines(path, start, count, limit=_code_line_limit(request, project))
+    except OSError:
+        return None
+
+
+@admit('source', json_field='error')
+def project_code(request, slug):
+    """Kod ko'ruvchi API: ?start=200&count=200 -> {'lines', 'start', 'end', 'total_lines', 'has_more'}"""
+    project = get_object_or_404(Project, slug=slug)
+    try:
+        start = int(request.GET.get('start', 0))
+        count = int(request.GET.get('count', FIRST_SCREEN_LINES))
+    except ValueError:
+        return JsonResponse({'error': "Noto'g'ri oraliq"}, status=400)
+
+    page = _read_code_range(request, project, start, count)
+    if page is None:
+        return JsonResponse({'error': "Kodni o'qib bo'lmadi"}, status=404)
+    return JsonResponse(page)
+
+
 @xframe_options_exempt
+@admit('source')
 def live_project_view(request, slug):  # <--- pk emas, slug bo'lishi shart!
     project = get_object_or_404(Project, slug=slug)  # <--- slug orqali qidiramiz
 
     if not project.source_code:
         return HttpResponse("Kod yo'q", content_type="text/plain")
 
-    try:
-        response = requests.get(project.source_code.url)
-        if response.status_code == 200:
-            content = response.content.decode('utf-8', errors='ignore')
-            res = HttpResponse(content, content_type="text/html")
-            # Brauzer bloklamasligi uchun xavfsizlik sarlavhalarini qo'shamiz
-            res["X-Frame-Options"] = "ALLOWALL"
-            return res
+    content = get_source_cache().get_text(project.source_code)
+    if content is None:
         return HttpResponse("Fayl topilmadi", content_type="text/plain")
-    except Exception as e:
-        return HttpResponse(f"Xatolik: {e}", content_type="text/plain")
+    res = HttpResponse(content, content_type="text/html")
+    # Brauzer bloklamasligi uchun xavfsizlik sarlavhalarini qo'shamiz
+    res["X-Frame-Options"] = "ALLOWALL"
+    return res
 
 
 # ==========================================
@@ -445,15 +441,18 @@ def live_project_view(request, slug):  # <--- pk emas, slug bo'lishi shart!
 def like_project(request, pk):
     if request.method == 'POST':
         p = get_object_or_404(Project, pk=pk)
-        if request.user in p.likes.all():
-            p.likes.remove(request.user)
-            liked = False
-        else:
-            p.likes.add(request.user)
-            liked = True
-            if p.author != request.user:
-                notify.send(request.user, recipient=p.author, verb='like bosdi', target=p)
-        return JsonResponse({'total_likes': p.likes.count(), 'is_liked': liked})
+        # likes_count signal orqali shu tranzaksiya ichida F() bilan yangilanadi
+        with transaction.atomic():
+            if p.likes.filter(pk=request.user.pk).exists():
+                p.likes.remove(request.user)
+                liked = False
+            else:
+                p.likes.add(request.user)
+                liked = True
+        if liked and p.author != request.user:
+            notify.send(request.user, recipient=p.author, verb='like bosdi', target=p)
+        total_likes = Project.objects.values_list('likes_count', flat=True).get(pk=pk)
+        return JsonResponse({'total_likes': total_likes, 'is_liked': liked})
     return JsonResponse({'error': 'POST required'}, status=400)
 
 
@@ -461,7 +460,7 @@ def like_project(request, pk):
 def save_project(request, pk):
     if request.method == 'POST':
         p = get_object_or_404(Project, pk=pk)
-        if request.user in p.saved_by.all():
+        if p.saved_by.filter(pk=request.user.pk).exists():
             p.saved_by.remove(request.user)
             saved = False
         else:
@@ -541,7 +540,7 @@ def buy_project(request, pk):
                 f"Xaridor: {request.user.username}\n\n"
                 f"<i>Pul 3 kundan keyin yoki xaridor tasdiqlasa balansga o'tadi.</i>"
             )
-            send_telegram_message(author_profile.telegram_id, msg)
+            telegram_outbox.enqueue(author_profile.telegram_id, msg)  # Tranzaksiya bilan birga; yuborish - dispatcherda
 
         notify.send(request.user, recipient=project.author, verb='sotib oldi (puli muzlatildi)', target=project)
         messages.success(request, f"'{project.title}' sotib olindi! Pul xavfsizlik uchun vaqtincha muzlatildi.")
@@ -575,106 +574,92 @@ def report_project(request, pk):
 # 5. TOOLS & WALLET & PROFIL
 # ==========================================
 def online_compiler(request):
-    # Judge0 CE language IDs
-    JUDGE0_LANG_IDS = {
-        'python':     71,   # Python 3
-        'javascript': 63,   # Node.js
-        'cpp':        54,   # C++ (GCC 9.2.0)
-        'java':       62,   # Java (OpenJDK 13)
-        'go':         60,   # Go
-        'php':        68,   # PHP
-        'csharp':     51,   # C# (Mono)
-        'ruby':       72,   # Ruby
-    }
-
+    # Kod so'rov ichida kutilmaydi: sahifa compiler_submit ga yuboradi va compiler_result ni so'raydi
+    code, stdin_input, current_lang, token = "", "", "python", None
     result = ""
-    code = ""
-    stdin_input = ""
-    current_lang = "python"
-    languages = [
-        ('python', 'Python'),
-        ('javascript', 'Node.js'),
-        ('cpp', 'C++'),
-        ('java', 'Java'),
-        ('go', 'Go'),
-        ('php', 'PHP'),
-        ('csharp', 'C#'),
-        ('ruby', 'Ruby'),
-    ]
 
     if request.method == 'POST':
+        # JavaScript'siz forma: yuboramiz va sahifa tokenni o'zi kuzatadi
         code = request.POST.get('code', '')
         current_lang = request.POST.get('language', 'python')
         stdin_input = request.POST.get('input', '')
-
-        lang_id = JUDGE0_LANG_IDS.get(current_lang, 71)
-
-        try:
-            # 1. Submission yaratish
-            payload = {
-                "source_code": base64.b64encode(code.encode()).decode(),
-                "language_id": lang_id,
-                "stdin": base64.b64encode(stdin_input.encode()).decode() if stdin_input else "",
-            }
-            sub_resp = requests.post(
-                "https://ce.judge0.com/submissions?base64_encoded=true&wait=false",
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
-            )
-            sub_resp.raise_for_status()
-            token = sub_resp.json().get("token")
-
-            if not token:
-                result = "❌ Xatolik: Token olinmadi."
-            else:
-                # 2. Natijani kutish (polling, max 12 soniya)
-                for _ in range(8):
-                    time.sleep(1.5)
-                    res_resp = requests.get(
-                        f"https://ce.judge0.com/submissions/{token}?base64_encoded=true",
-                        timeout=10
-                    )
-                    res_data = res_resp.json()
-                    status_id = res_data.get("status", {}).get("id", 0)
-                    if status_id >= 3:  # 3 = Accepted, 4+ = xato holatlari
-                        stdout = res_data.get("stdout") or ""
-                        stderr = res_data.get("stderr") or ""
-                        compile_output = res_data.get("compile_output") or ""
-
-                        if stdout:
-                            result = base64.b64decode(stdout).decode("utf-8", errors="replace")
-                        elif compile_output:
-                            result = "🔴 Kompilyatsiya xatosi:\n" + base64.b64decode(compile_output).decode("utf-8", errors="replace")
-                        elif stderr:
-                            result = "🔴 Xato:\n" + base64.b64decode(stderr).decode("utf-8", errors="replace")
-                        else:
-                            result = "✅ Kod bajarildi, lekin chiqish yo'q."
-                        break
+        with slot('compiler', request) as rejected:
+            try:
+                if rejected is not None:
+                    result = rejection_message(rejected)
                 else:
-                    result = "⏱ Vaqt tugadi: Kod bajarilishi 12 soniyadan ko'p vaqt oldi."
-
-        except requests.exceptions.Timeout:
-            result = "⏱ Xatolik: Server 10 soniyada javob bermadi. Qayta urinib ko'ring."
-        except requests.exceptions.ConnectionError:
-            result = "🌐 Xatolik: Kompilyator serveriga ulanib bo'lmadi. Internet aloqasini tekshiring."
-        except Exception as e:
-            result = f"❌ Xatolik yuz berdi: {str(e)}"
-
-        if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-            return JsonResponse({'result': result})
+                    run = compiler.submit(code, current_lang, stdin_input, user=request.user)
+                    if run.status == run.QUEUED:
+                        token = run.token
+                    else:
+                        result = run.result  # Keshdan yoki lokal sandboxdan darhol tayyor
+            except Exception as e:
+                result = _compiler_error_message(e)
 
     return render(request, 'compiler.html', {
         'result': result,
-        'languages': languages,
+        'languages': compiler.LANGUAGES,
         'code': code,
         'input': stdin_input,
         'current_lang': current_lang,
+        'pending_token': token,
     })
 
 
+def _compiler_error_message(error):
+    if isinstance(error, compiler.CompilerError):
+        return f"❌ Xatolik: {error}"
+    if isinstance(error, CircuitOpenError):
+        # Judge0 oxirgi so'rovlarda javob bermadi - workerni band qilmasdan darhol qaytamiz
+        return "⏳ Kompilyator serveri vaqtincha ishlamayapti. Birozdan so'ng qayta urinib ko'ring."
+    if isinstance(error, requests.exceptions.Timeout):
+        return "⏱ Xatolik: Server 10 soniyada javob bermadi. Qayta urinib ko'ring."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "🌐 Xatolik: Kompilyator serveriga ulanib bo'lmadi. Internet aloqasini tekshiring."
+    return f"❌ Xatolik yuz berdi: {error}"
+
+
+@admit('compiler', json_field='result', methods=('POST',))
+def compiler_submit(request):
+    """POST: kodni navbatga qo'yadi va darhol token qaytaradi (202)."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    try:
+        run = compiler.submit(request.POST.get('code', ''), request.POST.get('language', 'python'),
+                              request.POST.get('input', ''), user=request.user)
+    except Exception as e:
+        status_code = 400 if isinstance(e, compiler.CompilerError) else 503
+        return JsonResponse({'status': 'failed', 'result': _compiler_error_message(e)}, status=status_code)
+    return JsonResponse({'token': run.token, 'status': run.status, 'result': run.result,
+                         'result_url': reverse('compiler_result', args=[run.token])},
+                        status=202 if run.status == CompilerRun.QUEUED else 200)
+
+
+def compiler_result(request, token):
+    """GET: natija bazadan (Judge0 ni kutmasdan); tayyor bo'lmasa status='queued'."""
+    data = compiler.get_result(token)
+    if data is None:
+        return JsonResponse({'error': 'Topilmadi'}, status=404)
+    return JsonResponse(data)
+
+
+@csrf_exempt
+def compiler_callback(request, signed):
+    """Judge0 natijani shu yerga PUT qiladi (JUDGE0_CALLBACK_URL sozlangan bo'lsa)."""
+    if request.method not in ('PUT', 'POST'):
+        return JsonResponse({'error': 'PUT required'}, status=405)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'JSON emas'}, status=400)
+    if not compiler.apply_callback(signed, data):
+        return JsonResponse({'ok': False}, status=403)
+    return JsonResponse({'ok': True})
+
+
 def cpp_test(request):
-    return online_compiler(request)
+    # Sahifa natijani compiler_submit/compiler_result orqali oladi
+    return render(request, 'cpp_test.html')
 
 
 @login_required
@@ -846,46 +831,37 @@ def my_notifications(request):
 
 @login_required
 def syncing_projects(request):
-    # 1. Men kuzatayotgan (Sync bo'lgan) barcha bog'lamalarni olamiz
-    # 'select_related' baza bilan ishlashni tezlashtiradi (User va Profile ma'lumotlarini birdan oladi)
+    # 1. Men kuzatayotgan (Sync bo'lgan) profillar (tepadagi "story" qatori uchun)
     my_syncs = Sync.objects.filter(follower=request.user.profile).select_related('following__user')
 
-    # 2. Shu bog'lamalardan mualliflarning ID larini ajratib olamiz
-    author_profile_ids = [sync.following.id for sync in my_syncs]
-
-    # 3. Shu mualliflarning BARCHA loyihalarini olamiz (Eski va yangi)
-    # is_frozen=False qo'shdik, chunki bloklangan loyihalar chiqmasligi kerak
-    feed_projects = Project.objects.filter(
-        author__profile__id__in=author_profile_ids,
-        is_frozen=False
-    ).order_by('-created_at')
+    # 2. Lenta oldindan yig'ilgan (FeedEntry): bitta indeksli oraliq o'qish, keyset sahifalash
+    page = get_feed_page(request.user, request.GET.get('cursor'))
 
-    # 4. Context tayyorlaymiz
-    context = {
-        'synced_profiles': my_syncs,  # <--- MANA SHU QATOR YETISHMAYOTGAN EDI
-        'projects': feed_projects
-    }
-
-    return render(request, 'syncing.html', context)
+    return render(request, 'syncing.html', {
+        'synced_profiles': my_syncs,
+        'projects': page.object_list,
+        'next_cursor': page.next_cursor,
+    })
 
 
 @login_required
 def liked_videos(request):
-    return render(request, 'home.html', {'projects': Project.objects.filter(likes=request.user)})
+    return _render_project_page(request, 'home.html', Project.objects.filter(likes=request.user), NEWEST_KEYS)
 
 
 @login_required
 def my_videos(request):
-    return render(request, 'home.html', {'projects': Project.objects.filter(author=request.user)})
+    return _render_project_page(request, 'home.html', Project.objects.filter(author=request.user), NEWEST_KEYS)
 
 
 @login_required
 def saved_projects(request):
-    return render(request, 'home.html', {'projects': request.user.saved_projects.all()})
+    return _render_project_page(request, 'home.html', request.user.saved_projects.all(), NEWEST_KEYS)
 
 
 def trending(request):
-    return render(request, 'home.html', {'projects': Project.objects.filter(is_frozen=False).order_by('-views')[:20]})
+    return _render_project_page(request, 'home.html', Project.objects.filter(is_frozen=False), TRENDING_KEYS,
+                                page_size=20)
 
 
 def help_page(request):
@@ -969,6 +945,25 @@ class ProjectListAPI(generics.ListAPIView):
     serializer_class = ProjectSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        queryset = super().get_queryset().select_related('author__profile')
+        # ?sort=trending -> trending ball indeksi bo'yicha
+        if self.request.query_params.get('sort') == 'trending':
+            queryset = queryset.order_by(*TRENDING_KEYS)
+        return queryset
+
+
+class FeedAPI(APIView):
+    """Sync qilingan mualliflar lentasi: {'results': [...], 'next_cursor': ...}"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        page = get_feed_page(request.user, request.query_params.get('cursor'))
+        return Response({
+            'results': ProjectSerializer(page.object_list, many=True, context={'request': request}).data,
+            'next_cursor': page.next_cursor,
+        })
+
 
 class ProjectCreateAPI(generics.CreateAPIView):
     queryset = Project.objects.all()
@@ -985,14 +980,11 @@ class ProjectCreateAPI(generics.CreateAPIView):
             ProjectImage.objects.create(project=project, image=img)
 
         if project.source_code:
-            # TUZATILDI: on_commit ishlatildi
-            transaction.on_commit(
-                lambda: threading.Thread(target=run_security_scan, args=(project.id,), daemon=True).start()
-            )
+            enqueue_scan(project.id)
 
 class ProjectDetailAPI(generics.RetrieveAPIView):
     queryset = Project.objects.all()
-    serializer_class = ProjectSerializer
+    serializer_class = ProjectDetailSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
 
@@ -1119,6 +1111,12 @@ def admin_dashboard(request):
         'online_users': online_users,
         'top_spenders': top_spenders,
         'top_sellers': top_sellers,
+        'source_cache': get_source_cache().stats(),
+        'compiler_cache': get_result_cache().stats(),
+        'ai_cache': ai_assistant.get_answer_cache().stats(),
+        'outbound': outbound_stats(),
+        'admission': admission_stats(),
+        'telegram_outbox': telegram_outbox.outbox_stats() if request.user.is_superuser else None,  # Bazaga so'rov
     }
     return render(request, 'stats.html', context)
 
@@ -1214,7 +1212,7 @@ def confirm_purchase(request, pk):
 
         # Sotuvchiga xabar
         if seller_profile.telegram_id:
-            send_telegram_message(
+            telegram_outbox.enqueue(
                 seller_profile.telegram_id,
                 f"✅ <b>Pul yechildi!</b>\n\nXaridor tasdiqladi. <b>${trx.amount}</b> asosiy balansingizga o'tdi."
             )
@@ -1299,6 +1297,8 @@ def auto_release_cron(request):
 
     from django.core import management
     management.call_command('release_funds')
+    management.call_command('update_trending')
+    # Skanlar bu yerda bajarilmaydi (web workerni band qiladi): alohida `run_scan_worker` jarayoni (Procfile)
 
     return HttpResponse("OK")
 
@@ -1392,13 +1392,10 @@ def project_ai_ask(request, pk):
     """
     Loyiha ichida AI yordamchi.
     Foydalanuvchi savol beradi, AI loyiha ma'lumotlari asosida javob beradi.
+    Takroriy savollar keshdan (ai_assistant) - Gemini va qabul nazorati o'rnisiz.
     """
     if request.method == 'POST':
         try:
-            import google.generativeai as genai
-            import os
-
-            # 1. Ma'lumotlarni olish
             project = get_object_or_404(Project, pk=pk)
             data = json.loads(request.body)
             user_question = data.get('question', '')
@@ -1406,36 +1403,67 @@ def project_ai_ask(request, pk):
             if not user_question:
                 return JsonResponse({'answer': "Iltimos, savol yozing."})
 
-            # 2. AI uchun kontekst tayyorlash
-            # Biz AIga loyiha haqida qisqacha ma'lumot beramiz
-            context = (
-                f"Sen 'DevTube' platformasida sotuvchi yordamchisisan. "
-                f"Loyiha nomi: '{project.title}'. "
-                f"Tavsifi: '{project.description}'. "
-                f"Narxi: {'$' + str(project.price) if project.price > 0 else 'Bepul'}. "
-                f"Xavfsizlik tahlili: '{project.ai_analysis}'. "
-                f"Foydalanuvchi savoli: '{user_question}'. "
-                f"Vazifang: Foydalanuvchiga loyihani tushuntirish va sotib olishga qiziqtirish. "
-                f"Javobni qisqa, do'stona va o'zbek tilida ber."
-            )
+            full_access = project.has_full_access(request.user)  # Kod bo'laklari faqat muallif/xaridorga
+            answer = ai_assistant.cached_answer(project, user_question, full_access)
+            if answer is None:
+                with slot('ai', request) as rejected:
+                    if rejected is not None:
+                        return rejection_response(rejected, json_field='answer')
+                    answer = ai_assistant.generate_answer(project, user_question, full_access)
+            return JsonResponse({'answer': answer})
 
-            # 3. Gemini API ga so'rov
-            api_key = os.environ.get("GEMINI_API_KEY")
-            if not api_key:
-                return JsonResponse({'answer': "Tizim xatosi: API kalit topilmadi."})
+        except Exception as e:
+            return JsonResponse({'answer': f"Xatolik yuz berdi: {str(e)}"})
 
-            genai.configure(api_key=api_key)
+    return JsonResponse({'error': 'POST required'}, status=400)
 
-            # --- MANA SHU YERNI O'ZGARTIRING ---
-            # Ro'yxatdagi eng zo'r variantni qo'ydik:
-            model = genai.GenerativeModel('gemini-2.5-flash')
 
-            response = model.generate_content(context)
+def _sse(data, event=None):
+    head = f"event: {event}\n" if event else ""
+    return f"{head}data: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-            # 4. Javobni qaytarish
-            return JsonResponse({'answer': response.text})
 
+@csrf_exempt
+def project_ai_stream(request, pk):
+    """
+    project_ai_ask ning oqimli varianti (Server-Sent Events): model tokenlari kelishi bilan uzatiladi.
+    Hodisalar: `data: {"text": ...}` bo'laklari, oxirida `event: done` yoki `event: error`.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    project = get_object_or_404(Project, pk=pk)
+    try:
+        user_question = json.loads(request.body).get('question', '')
+    except ValueError:
+        user_question = ''
+    if not user_question:
+        return JsonResponse({'answer': "Iltimos, savol yozing."}, status=400)
+
+    full_access = project.has_full_access(request.user)
+    answer = ai_assistant.cached_answer(project, user_question, full_access)
+    release = lambda: None  # Keshdan - o'rin kerak emas
+    if answer is None:
+        # O'rin oqim tugaguncha band (worker oqimi ham shuncha band)
+        rejected, release = acquire('ai', request)
+        if rejected is not None:
+            return rejection_response(rejected, json_field='answer')
+
+    def events():
+        try:
+            yield ": ok\n\n"  # Sarlavhalar darhol ketadi - brauzer kutishni ko'rsatadi
+            if answer is not None:
+                yield _sse({'text': answer})
+            else:
+                for text in ai_assistant.stream_answer(project, user_question, full_access):
+                    yield _sse({'text': text})
+            yield _sse({}, event='done')
         except Exception as e:
-            return JsonResponse({'answer': f"Xatolik yuz berdi: {str(e)}"})
-
-    return JsonResponse({'error': 'POST required'}, status=400)
\ No newline at end of file
+            yield _sse({'text': f"Xatolik yuz berdi: {e}"}, event='error')
+        finally:
+            release()  # Model tugashi bilan; javob yopilmasdan oldin
+
+    response = StreamingHttpResponse(ReleaseOnClose(events(), release),
+                                     content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx/Render proksi bo'laklarni yig'ib turmasin
+    return response
\ No newline at end of file